@@ -1,18 +1,16 @@
 # storage_controller.py
 from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
-from PyQt5.QtWidgets import QApplication, QPushButton, QVBoxLayout
+from PyQt5.QtWidgets import QApplication, QMessageBox, QPushButton, QVBoxLayout
 from PyQt5 import QtWidgets
 from datetime import datetime, date,timedelta # 根据你实际用到的名字来选
 from decimal import Decimal
 from PyQt5.QtWidgets import QSizePolicy
 
-from src.database.db_schema import Bao
 from src.view.storage_view import StorageView
 from src.model.storage_model import StorageModel
-from src.database.water_report_dao import (
-    upsert_well, upsert_daily_report,
-    upsert_meter_room, upsert_prod_team,
-    upsert_work_area, list_children, list_root, find_by_sequence, upsert_water_well, DBSession)
+from src.database.water_report_dao import (find_daily_reports, find_latest_daily_reports, load_hierarchy,
+                                           save_daily_reports)
+from src.core.db_worker import get_db_worker, PRIORITY_WRITE
 
 class SimpleTableModel(QAbstractTableModel):
     def __init__(self, headers, rows):
@@ -63,7 +61,7 @@ class StorageController:
 
         self.model_list=[]
 
-        self.report_list_yesterday=[]
+        self.report_list_yesterday=[]  # 与 model_list 对应：每口井今天之前最近一次的日报（缺报时向前取）
 
         self.current_well_yesterday_report = None
 
@@ -176,30 +174,31 @@ class StorageController:
         today = date.today()
         self.report_list_yesterday = []
 
-        # 根据权限列表解析区域信息
-        for area in list_root():
-            if area.area_name == self.permission_list[1]:
-                self.area_id = area.area_id
-                for team in list_children("area", self.area_id):
-                    if team.team_name == self.permission_list[2]:
-                        self.team_id = team.team_id
-                        for room in list_children("team", self.team_id):
-                            if room.room_no == self.permission_list[3]:
-                                self.room_id = room.id
+        # 根据权限列表解析区域信息（一次加载本作业区的层级快照）
+        hierarchy = load_hierarchy("area", self.permission_list[1])
+        area = hierarchy.find("area", self.permission_list[1])
+        team = hierarchy.find("team", self.permission_list[2], area) if area else None
+        room = hierarchy.find("room", self.permission_list[3], team) if team else None
+        if room is None:
+            return
+        self.area_id, self.team_id, self.room_id = area.id, team.id, room.id
 
         # 找到计量间后，取其所有Bao，筛选“水报”
-        bao_list = list_children("room", self.room_id)
-        water_bao = [b for b in bao_list if b.bao_typeid == "水报"]
+        water_bao = [b for b in hierarchy.children(room, "bao") if b.name == "水报"]
         if not water_bao:
             return
 
         # 取第一个水报Bao，遍历其所有井
-        wells = list_children("bao", water_bao[0].id)
+        wells = hierarchy.children(water_bao[0], "well")
+        # 一次查询取回所有井今天的日报，再一次查询取回每口井今天之前最近一次的日报
+        well_ids = [well.id for well in wells]
+        reports = find_daily_reports(well_ids, [today])
+        previous_reports = find_latest_daily_reports(well_ids, today)
         for well in wells:
             model = StorageModel()
-            model.wellNum = well.well_code
+            model.wellNum = well.name
 
-            r = find_by_sequence([self.area_id, self.team_id, self.room_id, well.id, today])
+            r = reports[today].get(well.id)
             if r is not None:
                 model.injectFuc = r.injection_mode
                 model.productLong = r.prod_hours
@@ -215,8 +214,7 @@ class StorageController:
                 model.note = r.remark
 
             self.model_list.append(model)
-            self.report_list_yesterday.append(
-                find_by_sequence([self.area_id, self.team_id, self.room_id, well.id, self.yesterday]))
+            self.report_list_yesterday.append(previous_reports.get(well.id))
 
     def creat_table(self):
 
@@ -284,27 +282,9 @@ class StorageController:
             except (TypeError, ValueError):
                 return None
 
+        reports = []
         for model in self.model_list:
-            # 1. 逐级确保外键存在
-            area_id = upsert_work_area(self.permission_list[1])
-            teams = list_children("area", self.permission_list[1])
-            for t in teams:
-                if self.permission_list[2] == t.team_name:
-                    self.team_no = t.team_no
-            team_id = upsert_prod_team(area_id, self.team_no, team_name=self.permission_list[2])
-            room_id = upsert_meter_room(team_id, room_no=self.permission_list[3], is_injection=False)
-
-            # 通过 room_id 查找对应的 bao_id（水报ID）
-            with DBSession() as db:
-                bao = db.query(Bao).filter(Bao.room_id == room_id).first()
-                if not bao:
-                    raise ValueError(f"找不到对应的水报bao，room_id={room_id}")
-                bao_id = bao.id
-
-            # 使用 bao_id 调用水井接口
-            well_id = upsert_water_well(bao_id, well_code=model.wellNum)
-
-            # 2. 准备日报字典，带转换和空值处理
+            # 准备日报字典，带转换和空值处理
             rpt = dict(
                 report_date=date.today(),
                 injection_mode=model.injectFuc or None,
@@ -320,9 +300,32 @@ class StorageController:
                 meter_stage2=to_float_or_none(model.secondExecl),
                 meter_stage3=to_float_or_none(model.thirdExcel)
             )
+            reports.append((model.wellNum, rpt))
+
+        # 整个计量间在一个事务内写入，层级只解析一次；写入在数据库线程中执行。
+        # 同一计量间连续点击保存时，尚未开始的旧任务被替换：新任务包含同样的井和最新数据，
+        # 结果由新任务的回调一并提示；不同计量间的保存互不替换
+        area_name, team_name, room_no = self.permission_list[1:4]
+        get_db_worker().submit(
+            save_daily_reports, area_name, team_name, room_no, reports,
+            priority=PRIORITY_WRITE, key=("water_save", area_name, team_name, room_no),
+            on_result=self._on_saved_to_db,
+            on_error=self._on_save_failed,
+        )
+
+    def _on_saved_to_db(self, outcomes):
+        """提示每口井的保存结果，有跳过的井时用警告框列出"""
+        skipped = [f"{well_code or '(空)'}：{outcome}" for well_code, outcome in outcomes
+                   if outcome.startswith("跳过")]
+        saved = len(outcomes) - len(skipped)
+        if skipped:
+            QMessageBox.warning(self.view, "保存完成",
+                                f"已保存 {saved} 口井，以下井未保存：\n" + "\n".join(skipped))
+        else:
+            QMessageBox.information(self.view, "保存完成", f"已保存 {saved} 口井的日报")
 
-            report_id = upsert_daily_report(well_id, rpt)
-            print(f"日报已写入，report_id={report_id}")
+    def _on_save_failed(self, error):
+        QMessageBox.critical(self.view, "保存失败", f"日报写入失败，数据未保存：\n{error}")
 
     # ---------- 加载：Model → 界面 ----------
     def load_from_model(self):
@@ -2,88 +2,214 @@ import re
 import uuid
 from typing import Optional
 
+import numpy as np
 import PyQt5.QtWidgets as QtWidgets
-from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QThread, pyqtSignal, QTimer
-from PyQt5.QtWidgets import (QApplication, QMessageBox, QPushButton,
-                             QAbstractItemView, QRadioButton, QWidget, QHBoxLayout)
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QThread, pyqtSignal, QTimer, QEvent, QRect
+from PyQt5.QtWidgets import (QApplication, QMessageBox, QPushButton, QAbstractItemView,
+                             QStyledItemDelegate, QStyleOptionViewItem, QStyleOptionButton, QStyle)
 from datetime import date, datetime, timedelta
 import sys
 import pickle
 import os
 import logging
-from src.core.constant import ROOT_DIR
+from src.core.constant import ROOT_DIR, FORMULA_NOTIFY_FILE
 from src.view.storage_oil_view import OilStorageView
 from src.model.storage_oil_model import OilWellModel, ReportData
+from src.model.report_store import ReportStore
+from src.model.formula_engine import FormulaEngine, FormulaError, report_number
 from src.database.oil_report_dao import MySQLManager
-from src.database.water_report_dao import list_root, list_children, find_by_sequence
+from src.database.report_journal import ReportJournal
+from src.core.db_worker import get_db_worker, PRIORITY_INTERACTIVE, PRIORITY_WRITE, PRIORITY_BULK
+from src.database.water_report_dao import (backfill_oil_report_well_ids, find_oil_reports, find_latest_oil_reports,
+                                           find_well_profiles, load_hierarchy, save_well_profiles,
+                                           seed_oil_reports)
+from src.database.db_schema import WELL_PROFILE_FIELDS
+from src.database.column_types import OIL_NUMERIC_COLUMNS, check_number
 
 
 # 数据持久化工具类，保持在本地一天
 class DataPersistence:
-    """用于保存和加载当天数据，确保程序重启后同一天数据不丢失"""
+    """
+    用于保存和加载当天数据，确保程序重启后同一天数据不丢失。
+    数据写入追加式日志：单元格修改只追加变化的字段，整体保存时压缩为快照。
+    """
 
-    def __init__(self, save_path=ROOT_DIR / "data" / "oil_well_data.pkl"):
-        self.save_path = save_path
+    def __init__(self, save_path=ROOT_DIR / "data" / "oil_well_data.journal",
+                 legacy_path=ROOT_DIR / "data" / "oil_well_data.pkl"):
+        self.journal = ReportJournal(save_path)
+        self.legacy_path = legacy_path
 
     def save_data(self, reports, current_date):
-        """保存数据及对应的日期"""
+        """全量保存数据及对应的日期（压缩日志）"""
         try:
-            data = {
-                "date": current_date,
-                "reports": reports
-            }
-            with open(self.save_path, "wb") as f:
-                pickle.dump(data, f)
+            self.journal.reset(current_date, {str(r.id): r.to_dict() for r in reports})
+            return True
+        except Exception as e:
+            print(f"保存数据失败: {e}")
+            return False
+
+    def save_changes(self, reports, current_date, fields=None):
+        """只追加记录报表变化的字段；fields 为 None 时记录整条报表"""
+        try:
+            self.journal.set_date(current_date)
+            for report in reports:
+                values = report.to_dict()
+                if fields is not None:
+                    values = {k: values[k] for k in fields if k in values}
+                self.journal.update(str(report.id), values)
             return True
         except Exception as e:
             print(f"保存数据失败: {e}")
             return False
 
+    def flush(self):
+        """立即落盘尚未 fsync 的修改"""
+        try:
+            self.journal.flush()
+        except Exception as e:
+            print(f"保存数据失败: {e}")
+
     def load_data(self):
         """加载数据，返回(数据列表, 保存日期)或(None, None)"""
         try:
-            if not os.path.exists(self.save_path):
-                return None, None
-
-            with open(self.save_path, "rb") as f:
-                data = pickle.load(f)
-            return data["reports"], data["date"]
+            saved_date, records = self.journal.load()
+            if not records:
+                return self._load_legacy()
+            return [self._to_report(fields) for fields in records.values()], saved_date
         except Exception as e:
             print(f"加载数据失败: {e}")
             return None, None
 
+    def _load_legacy(self):
+        """读取旧版 pickle 文件，转存为日志后改名为 .migrated，之后日志为空时不会再读回旧数据"""
+        if not os.path.exists(self.legacy_path):
+            return None, None
+        with open(self.legacy_path, "rb") as f:
+            data = pickle.load(f)
+        reports = [self._to_report(r.to_dict()) for r in data["reports"]]
+        if self.save_data(reports, data["date"]):
+            os.replace(self.legacy_path, f"{self.legacy_path}.migrated")
+        return reports, data["date"]
+
+    @staticmethod
+    def _to_report(fields):
+        return ReportData.from_dict(fields)
+
     def delete_data(self):
         """删除保存的文件"""
-        if os.path.exists(self.save_path):
-            os.remove(self.save_path)
+        self.journal.delete()
+        if os.path.exists(self.legacy_path):
+            os.remove(self.legacy_path)
+
+# 报表的标识字段，其余字段都为空时视为未填写
+_IDENTITY_FIELDS = {"id", "create_time", "platform", "well_code", "total_bucket_sign"}
+
+
+def has_report_input(values):
+    """报表字段字典中是否有填写内容"""
+    return any(value not in ("", None) for key, value in values.items() if key not in _IDENTITY_FIELDS)
+
+
+def new_day_report(platform, well_code, day, profile=None):
+    """指定日期的空报表，ID由平台、井号和日期组成；井静态资料沿用 profile"""
+    report = ReportData(platform, well_code)
+    report.create_time = day
+    report.id = f"{platform}_{well_code}_{day}"
+    if profile:
+        apply_profile(report, profile)
+    return report
+
+
+def apply_profile(report, profile):
+    """用井静态资料填充报表中为空的对应字段"""
+    for name in WELL_PROFILE_FIELDS:
+        if not getattr(report, name, "") and profile.get(name):
+            setattr(report, name, profile[name])
+
+# 表格各列对应的ReportData字段（最后一列为不显示的记录ID）
+TABLE_FIELDS = [
+    "platform", "well_code", "create_time", "total_bucket_sign", "total_bucket", "time_sign",
+    "oil_pressure", "casing_pressure", "back_pressure", "press_data", "prod_hours",
+    "a2_stroke", "a2_frequency", "work_stroke", "effective_stroke", "fill_coeff_test",
+    "lab_water_cut", "reported_water", "fill_coeff_liquid", "last_tubing_time",
+    "pump_diameter", "block", "transformer", "remark", "well_times",
+    "liquid_per_bucket", "sum_value", "liquid1", "production_coeff", "a2_24h_liquid",
+    "liquid2", "oil_volume", "fluctuation_range", "shutdown_time", "theory_diff",
+    "theory_displacement", "k_value", "daily_liquid", "daily_oil", "production_time",
+    "total_oil",
+]
+
+
+def table_row(report):
+    """把报表转换为表格行"""
+    row = report.to_dict()
+    display_row = [row.get(field, "") for field in TABLE_FIELDS]
+    display_row[2] = str(row.get("create_time", ""))
+    display_row[3] = row.get("total_bucket_sign", "是")
+    display_row.append(row.get("id", ""))
+    return display_row
+
+
+# 表格列标题，与 TABLE_FIELDS 一一对应
+TABLE_HEADERS = [
+    "平台", "井号", "日期", "是否合量斗数", "合量斗数", "时间标记", "油压", "套压", "回压",
+    "憋压数据", "生产时间", "A2冲程", "A2冲次", "功图冲次",
+    "有效排液冲程", "充满系数", "化验含水", "上报含水",
+    "充满系数液量", "上次动管柱时间", "泵径", "区块", "变压器", "备注", "井次",
+    "每桶液量", "和", "液量1", "生产系数", "A2 24h液量", "液量2",
+    "油量", "波动范围", "停产时间", "理论差值", "理论排量", "K值",
+    "日产液", "日产油", "时间", "总产油"
+]
+
+
+def _field_getter(field, default=""):
+    return lambda report: getattr(report, field, default)
+
+
+# 列 -> 取值函数，表格直接从报表对象读取显示内容
+COLUMN_GETTERS = [_field_getter(field) for field in TABLE_FIELDS]
+COLUMN_GETTERS[2] = lambda report: str(getattr(report, "create_time", ""))
+COLUMN_GETTERS[3] = _field_getter("total_bucket_sign", "是")
+# 字段 -> 列
+FIELD_COLUMNS = {field: col for col, field in enumerate(TABLE_FIELDS)}
+
 
 #从输入框获取到表格
 class SimpleTableModel(QAbstractTableModel):
-    def __init__(self, headers, rows, controller):
+    """直接引用报表对象的表格模型，显示时按列读取字段，不保存数据副本"""
+
+    def __init__(self, headers, store, controller):
         super().__init__()
         self.headers = headers
-        self.rows = rows  # 格式: [[平台, 井号, 日期, ..., id], ...]（id不显示）
         self.controller = controller
+        # 行顺序、合并布局和行号索引由 ReportStore 维护，模型只持有当前显示的那一份
+        self.reports, self.spans, self.row_by_id = store.layout()
 
     def rowCount(self, parent=QModelIndex()):
-        return len(self.rows)
+        return len(self.reports)
 
     def columnCount(self, parent=QModelIndex()):
         return len(self.headers)
 
     def data(self, index, role=Qt.DisplayRole):
         if role == Qt.DisplayRole:
-            return self.rows[index.row()][index.column()]
+            return COLUMN_GETTERS[index.column()](self.reports[index.row()])
         return None
 
     def setData(self, index, value, role=Qt.EditRole):
-        """允许修改单元格数据并同步到数据源"""
+        """修改直接写入报表对象，再由控制器重算并保存"""
         if role == Qt.EditRole and index.isValid():
             row = index.row()
             col = index.column()
 
-            # 更新模型数据
-            self.rows[row][col] = value
+            # 数值列只接受数据库能保存的数字，否则提示并保留原值
+            if TABLE_FIELDS[col] in OIL_NUMERIC_COLUMNS:
+                message = check_number(value)
+                if message:
+                    QMessageBox.warning(self.controller.view, "输入错误", f"{self.headers[col]}：{message}")
+                    return False
+
+            setattr(self.reports[row], TABLE_FIELDS[col], value)
             self.dataChanged.emit(index, index)
 
             self.controller.sync_table_cell_change(row, col, value)
@@ -96,116 +222,279 @@ class SimpleTableModel(QAbstractTableModel):
         return None
 
     def flags(self, index):
+        if index.column() <= 3:
+            # 平台、井号、日期不在表格中修改；是否合量斗数由委托的单选框修改
+            return Qt.ItemIsEnabled | Qt.ItemIsSelectable
         return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsEditable
 
-    def update_data(self, new_rows):
-        """更新模型数据并通知视图刷新"""
+    def report_at(self, row):
+        return self.reports[row] if 0 <= row < len(self.reports) else None
+
+    def set_reports(self, store):
+        """
+        按报表集合刷新。行的组成和顺序不变时只通知数据变化，
+        增删井或平台分组变化时才重置模型。
+        """
+        ordered, spans, row_by_id = store.layout()
+        if ordered is self.reports or [r.id for r in ordered] == [r.id for r in self.reports]:
+            self.reports, self.spans, self.row_by_id = ordered, spans, row_by_id
+            if ordered:
+                self.dataChanged.emit(self.index(0, 0),
+                                      self.index(len(ordered) - 1, self.columnCount() - 1))
+            return
         self.beginResetModel()
-        self.rows = new_rows
+        self.reports, self.spans, self.row_by_id = ordered, spans, row_by_id
         self.endResetModel()
 
+    def refresh_reports(self, reports, fields=None):
+        """
+        只通知给定报表所在行刷新；fields 给出时只刷新这些字段对应的列。
+        返回 False 表示有报表不在表格中，需要整表刷新。
+        """
+        columns = [FIELD_COLUMNS[f] for f in fields if f in FIELD_COLUMNS] if fields is not None else None
+        if columns == []:
+            return True
+        first, last = (min(columns), max(columns)) if columns else (0, self.columnCount() - 1)
+        for report in reports:
+            row = self.row_by_id.get(report.id)
+            if row is None:
+                return False
+            self.dataChanged.emit(self.index(row, first), self.index(row, last))
+        return True
 
-# 是否单选框容器类，用于处理单选框状态变化
-class RadioButtonWidget(QWidget):
-    state_changed = pyqtSignal(int, str, str, bool)  # 行索引, 平台, 井号, 是否选中"是"
-
-    def __init__(self, row_idx, platform, well_code, initial_state, parent=None):
-        super().__init__(parent)
-        self.row_idx = row_idx
-        self.platform = platform
-        self.well_code = well_code
-
-        layout = QHBoxLayout(self)
-        layout.setContentsMargins(2, 2, 2, 2)
-        layout.setSpacing(5)
-
-        self.radio_yes = QRadioButton("是")
-        self.radio_no = QRadioButton("否")
-
-        if initial_state == "是":
-            self.radio_yes.setChecked(True)
-        else:
-            self.radio_no.setChecked(True)
-
-        self.radio_yes.toggled.connect(self.on_state_changed)
 
-        layout.addWidget(self.radio_yes)
-        layout.addWidget(self.radio_no)
-        self.setLayout(layout)
+# 是否合量斗数列的委托：直接绘制“是/否”单选框并处理点击，不再为每行创建控件
+class TotalBucketSignDelegate(QStyledItemDelegate):
+    state_changed = pyqtSignal(int, str, str, bool)  # 行索引, 平台, 井号, 是否选中"是"
 
-    def on_state_changed(self, checked):
-        if checked:
-            self.state_changed.emit(self.row_idx, self.platform, self.well_code, True)
-        else:
-            self.state_changed.emit(self.row_idx, self.platform, self.well_code, False)
+    OPTIONS = ("是", "否")
+
+    def _option_rects(self, rect):
+        """把单元格平分为左右两块，分别放“是”和“否”"""
+        half = rect.width() // 2
+        return (QRect(rect.left() + 2, rect.top(), half - 2, rect.height()),
+                QRect(rect.left() + half, rect.top(), rect.width() - half - 2, rect.height()))
+
+    def paint(self, painter, option, index):
+        # 先按默认样式绘制背景和选中状态，文字由单选框代替
+        item_option = QStyleOptionViewItem(option)
+        self.initStyleOption(item_option, index)
+        item_option.text = ""
+        style = item_option.widget.style() if item_option.widget else QApplication.style()
+        style.drawControl(QStyle.CE_ItemViewItem, item_option, painter, item_option.widget)
+
+        current = index.data(Qt.DisplayRole) or "是"
+        for text, rect in zip(self.OPTIONS, self._option_rects(option.rect)):
+            button = QStyleOptionButton()
+            button.rect = rect
+            button.text = text
+            button.state = QStyle.State_Enabled | (QStyle.State_On if current == text else QStyle.State_Off)
+            style.drawControl(QStyle.CE_RadioButton, button, painter, item_option.widget)
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() != QEvent.MouseButtonRelease or event.button() != Qt.LeftButton:
+            return False
+        for text, rect in zip(self.OPTIONS, self._option_rects(option.rect)):
+            if rect.contains(event.pos()):
+                if index.data(Qt.DisplayRole) != text:
+                    row = index.row()
+                    self.state_changed.emit(row, model.index(row, 0).data() or "",
+                                            model.index(row, 1).data() or "", text == "是")
+                return True
+        return False
 
-#在后台线程中保存数据
-class DbUpdateThread(QThread):
-    result_signal = pyqtSignal(bool, str)
+    def createEditor(self, parent, option, index):
+        return None
 
-    def __init__(self, reports_data, index):
+def liquid_per_bucket_formula(time_sign):
+    """根据时间标记选择液量/斗数公式名，无时间标记时返回None"""
+    if not time_sign:
+        return None
+    formula_suffix = ""
+    if time_sign == "功图":
+        formula_suffix = "（功图）"
+    elif time_sign in ["60", "流量计"]:
+        formula_suffix = "（60/流量计）"
+    return f"liquid_per_bucket{formula_suffix}"
+
+
+def target_fields(engine, fields=None):
+    """按计算顺序返回需要计算的公式字段；fields 为 None 时计算全部"""
+    if fields is None:
+        return engine.targets
+    wanted = set(fields)
+    if "liquid_per_bucket" in wanted:
+        wanted.update(field for field in engine.targets if field.startswith("liquid_per_bucket"))
+    # 上游公式一并计算，下游使用的中间结果与整表计算时一致
+    return engine.with_upstream(wanted)
+
+
+def compute_reports(engine, reports, fields=None, progress=None, is_cancelled=None):
+    """
+    列式批量计算多条报表并写回报表对象；fields 指定时只计算这些字段。
+    progress(已完成, 总数) 在每条公式算完后调用；is_cancelled() 返回True时放弃计算。
+    返回写入的字段集合，被取消时返回None。
+    """
+    columns = engine.value_columns(reports)
+
+    liquid_per_bucket_values = None
+    groups = {}
+    if fields is None or "liquid_per_bucket" in fields:
+        # 液量/斗数按时间标记分组，每组在计算顺序中轮到该公式时算一次
+        liquid_per_bucket_values = [""] * len(reports)
+        for row, report in enumerate(reports):
+            formula_name = liquid_per_bucket_formula(report.time_sign)
+            if formula_name:
+                groups.setdefault(formula_name, []).append(row)
+        engine.assign_column(columns, "liquid_per_bucket", liquid_per_bucket_values)
+
+    results_by_field = {}
+    targets = target_fields(engine, fields)
+    for done, field in enumerate(targets, 1):
+        if is_cancelled is not None and is_cancelled():
+            return None
+        if not field.startswith("liquid_per_bucket"):
+            results_by_field[field] = engine.evaluate_columns(field, columns)
+        elif field in groups:
+            rows = groups[field]
+            results = engine.evaluate_columns(field, columns, np.array(rows), zero_as_empty=True)
+            for row, value in zip(rows, results):
+                liquid_per_bucket_values[row] = value
+            engine.assign_column(columns, "liquid_per_bucket", liquid_per_bucket_values)
+        if progress is not None:
+            progress(done, len(targets))
+
+    for row, report in enumerate(reports):
+        if liquid_per_bucket_values is not None:
+            report.liquid_per_bucket = liquid_per_bucket_values[row]
+        for field, results in results_by_field.items():
+            setattr(report, field, results[row])
+
+    written = set(results_by_field)
+    if liquid_per_bucket_values is not None:
+        written.add("liquid_per_bucket")
+    return written
+
+
+class ReportSnapshot:
+    """报表计算所需字段的副本，后台线程只读写副本，不触碰界面正在使用的对象"""
+
+    def __init__(self, report, fields):
+        self.id = report.id
+        self.numbers = {}
+        for field in fields:
+            setattr(self, field, getattr(report, field, ""))
+            self.numbers[field] = report_number(report, field)
+
+    def number(self, name):
+        return self.numbers[name] if name in self.numbers else report_number(self, name)
+
+
+#在后台线程中按快照重算公式
+class RecalcThread(QThread):
+    progress_signal = pyqtSignal(int, int, int)  # 批次号, 已完成公式数, 公式总数
+    result_signal = pyqtSignal(int, object)  # 批次号, {报表ID: {字段: 值}}
+
+    def __init__(self, generation, engine, snapshots, fields=None):
         super().__init__()
-        self.reports_data = reports_data
-        self.index = index
+        self.generation = generation
+        self.engine = engine
+        self.snapshots = snapshots
+        self.fields = fields
+        self.cancelled = False
 
-    def run(self):
-        try:
-            # 保存当前数据到本地文件
-            DataPersistence().save_data(self.reports_data, date.today())
-            self.result_signal.emit(True, "更新成功")
-        except Exception as e:
-            self.result_signal.emit(False, f"操作失败: {str(e)}")
-
-#异步数据库操作线程，避免界面卡顿
-class DbAsyncThread(QThread):
-    result_signal = pyqtSignal(bool, str)
-
-    def __init__(self, db_manager, action, reports_data=None):
-        super().__init__()
-        self.db_manager = db_manager
-        self.action = action
-        self.reports_data = reports_data
+    def cancel(self):
+        """放弃计算；已在运行的公式算完后退出，不再发出结果"""
+        self.cancelled = True
 
     def run(self):
         try:
-            if self.action == 'sync':
-                reports_dict = [report.to_dict() for report in self.reports_data]
-                success, msg = self.db_manager.sync_to_backup(reports_dict)
-            elif self.action == 'clear':
-                success, msg = self.db_manager.clear_current_table()
-            else:
-                raise ValueError(f"未知操作类型: {self.action}")
-
-            self.result_signal.emit(success, msg)
+            written = compute_reports(
+                self.engine, self.snapshots, self.fields,
+                progress=lambda done, total: self.progress_signal.emit(self.generation, done, total),
+                is_cancelled=lambda: self.cancelled,
+            )
+            if written is None or self.cancelled:
+                return
+            results = {s.id: {field: getattr(s, field) for field in written} for s in self.snapshots}
+            self.result_signal.emit(self.generation, results)
         except Exception as e:
-            self.result_signal.emit(False, f"操作失败: {str(e)}")
+            print(f"后台计算报表失败: {e}")
 
 #定时检查数据库中的公式是否有变更
 class FormulaCheckThread(QThread):
+    """
+    后台检查公式是否更新：只查询公式版本号（单行主键查询），版本变化时才通知重新加载。
+    未变化时逐步拉长检查间隔；同机客户端更新公式时通过通知文件立即唤醒。
+    """
     formula_changed = pyqtSignal()
 
+    MIN_INTERVAL = 10  # 秒
+    MAX_INTERVAL = 120  # 秒
+
     def __init__(self, db_manager):
         super().__init__()
         self.db_manager = db_manager
-        self.last_formulas_hash = None
+        self.last_marker = None
+        self.interval = self.MIN_INTERVAL
+        self.notify_mtime = self._notify_mtime()
         self.running = True
 
     def run(self):
         while self.running:
             try:
-                current_formulas = self.get_formulas()
-                current_hash = hash(tuple(current_formulas))
-
-                if self.last_formulas_hash is None:
-                    self.last_formulas_hash = current_hash
-                elif current_hash != self.last_formulas_hash:
-                    self.last_formulas_hash = current_hash
+                if self.check_changed():
                     self.formula_changed.emit()
-
-                self.msleep(30000)  # 每30秒检查一次
+                    self.interval = self.MIN_INTERVAL
+                else:
+                    self.interval = min(self.interval * 2, self.MAX_INTERVAL)
             except Exception as e:
                 print(f"公式检查线程错误: {e}")
-                self.msleep(10000)
+                self.interval = self.MAX_INTERVAL
+            self._wait(self.interval)
+
+    def _wait(self, seconds):
+        """分段休眠，收到停止请求或本机通知文件变化时提前返回"""
+        for _ in range(int(seconds)):
+            if not self.running:
+                return
+            self.msleep(1000)
+            mtime = self._notify_mtime()
+            if mtime != self.notify_mtime:
+                self.notify_mtime = mtime
+                return
+
+    @staticmethod
+    def _notify_mtime():
+        try:
+            return os.path.getmtime(FORMULA_NOTIFY_FILE)
+        except OSError:
+            return None
+
+    def check_changed(self):
+        """版本号（或退化情况下的公式哈希）与上次不同时返回True"""
+        revision = self.get_revision()
+        if revision is not None:
+            marker = ("revision", revision)
+        else:
+            # 数据库尚无版本号记录时，退回到比较全部公式
+            marker = ("hash", hash(tuple(self.get_formulas())))
+
+        changed = self.last_marker is not None and marker != self.last_marker
+        self.last_marker = marker
+        return changed
+
+    def get_revision(self):
+        """读取公式版本号，版本号表或记录不存在时返回None"""
+        try:
+            from sqlalchemy.orm import Session
+            from database.db_oil_schema import FormulaRevision
+
+            with Session(self.db_manager.engine) as session:
+                return session.query(FormulaRevision.revision).filter(FormulaRevision.id == 1).scalar()
+        except Exception as e:
+            print(f"获取公式版本号失败: {e}")
+            return None
 
     def get_formulas(self):
         try:
@@ -232,13 +521,19 @@ class FormulaCheckThread(QThread):
 
 #公式溯源
 class FormulaDependency:
+    """
+    公式依赖图：记录每条公式直接引用的字段，并给出拓扑计算顺序。
+    公式不再内联展开，中间字段按顺序先算出再被下游引用。
+    """
     def __init__(self):
         self.field_formula_map = {}  # 字段名 -> 原始公式
-        self.field_deps_map = {}  # 字段名 -> 依赖的原始输入字段
+        self.field_deps_map = {}  # 字段名 -> 公式直接引用的字段（输入字段或其他公式字段）
+        self.order = []  # 按依赖关系排好的计算顺序
 
     def build_dependencies(self, formulas):
         self.field_formula_map.clear()
         self.field_deps_map.clear()
+        self.order = []
 
         for formula in formulas:
             if "=" not in formula:
@@ -247,25 +542,50 @@ class FormulaDependency:
             target_field = target_field.strip()
             self.field_formula_map[target_field] = expr.strip()
 
+        for field, expr in self.field_formula_map.items():
+            variables = re.findall(r'\b[a-zA-Z_][a-zA-Z0-9_]*\b', expr)
+            self.field_deps_map[field] = list(dict.fromkeys(variables))
+
+        self.order = self._topological_order()
+
+    def _upstream_formulas(self, field, variants):
+        """字段直接依赖的公式字段；引用 liquid_per_bucket 等基础名时依赖其全部变体公式"""
+        upstream = []
+        for var in self.field_deps_map.get(field, []):
+            if var in variants:
+                upstream.extend(v for v in variants[var] if v != field)
+            elif var in self.field_formula_map:
+                upstream.append(var)
+        return upstream
+
+    def _topological_order(self):
+        """深度优先求拓扑顺序，存在循环依赖时抛出 FormulaError"""
+        # 液量/斗数（功图）等带全角括号后缀的公式视为同一字段的不同变体
+        variants = {}
         for field in self.field_formula_map:
-            self._parse_dependencies(field, self.field_formula_map[field], set())
+            variants.setdefault(field.split("（", 1)[0], []).append(field)
 
-    def _parse_dependencies(self, field, expr, visited):
-        if field in visited:
-            return
-        visited.add(field)
-
-        variables = re.findall(r'\b[a-zA-Z_][a-zA-Z0-9_]*\b', expr)
-        raw_input_vars = []
-        for var in variables:
-            if var in self.field_formula_map:
-                self._parse_dependencies(var, self.field_formula_map[var], visited)
-                expr = expr.replace(var, f"({self.field_formula_map[var]})")
-            else:
-                raw_input_vars.append(var)
+        order = []
+        state = {}  # 字段 -> 1 正在访问 / 2 已完成
+        path = []
 
-        self.field_formula_map[field] = expr
-        self.field_deps_map[field] = raw_input_vars
+        def visit(field):
+            if state.get(field) == 2:
+                return
+            if state.get(field) == 1:
+                cycle = path[path.index(field):] + [field]
+                raise FormulaError(f"公式存在循环依赖: {' -> '.join(cycle)}")
+            state[field] = 1
+            path.append(field)
+            for upstream in self._upstream_formulas(field, variants):
+                visit(upstream)
+            path.pop()
+            state[field] = 2
+            order.append(field)
+
+        for field in self.field_formula_map:
+            visit(field)
+        return order
 
 
 class OilStorageController:
@@ -273,75 +593,52 @@ class OilStorageController:
         self.view = OilStorageView()
         self.init_ui()
         self.db_manager = MySQLManager()
+        self.db_worker = get_db_worker()
         self.data_persistence = DataPersistence()
 
         self.formulas = []
         self.formula_check_thread = None
+        self.recalc_thread = None  # 当前有效的后台重算线程
+        self.recalc_threads = set()  # 含已取消但尚未退出的线程，结束前保留引用
+        self.recalc_generation = 0
+        self.recalc_dirty = set()  # 后台计算期间在界面线程中重算过的报表ID
         self.formula_deps = FormulaDependency()
-
-        self.header_to_field = {
-            "油压": "oil_pressure",
-            "套压": "casing_pressure",
-            "回压": "back_pressure",
-            "合量斗数": "total_bucket",
-            "时间标记": "time_sign",
-            "憋压数据": "press_data",
-            "生产时间": "prod_hours",
-            "A2冲程": "a2_stroke",
-            "A2冲次": "a2_frequency",
-            "功图冲次": "work_stroke",
-            "有效排液冲程": "effective_stroke",
-            "充满系数": "fill_coeff_test",
-            "化验含水": "lab_water_cut",
-            "上报含水": "reported_water",
-            "充满系数液量": "fill_coeff_liquid",
-            "上次动管柱时间": "last_tubing_time",
-            "泵径": "pump_diameter",
-            "区块": "block",
-            "变压器": "transformer",
-            "备注": "remark",
-            "井次": "well_times",
-            "液量/斗数": "liquid_per_bucket",
-            "和": "sum_value",
-            "液量": "liquid1",
-            "生产系数": "production_coeff",
-            "A2 24h液量": "a2_24h_liquid",
-            "液量（资料员）": "liquid2",
-            "油量": "oil_volume",
-            "波动范围": "fluctuation_range",
-            "停产时间": "shutdown_time",
-            "理论排量-液量差值": "theory_diff",
-            "理论排量": "theory_displacement",
-            "K值": "k_value",
-            "日产液": "daily_liquid",
-            "日产油": "daily_oil",
-            "时间": "production_time",
-            "产油": "total_oil"
-        }
+        self.formula_engine = FormulaEngine()
 
         # 添加防递归标志
         self.is_refreshing = False
 
+        # 每口井今天之前最近一次填写的日报 {(平台, 井号): 字段字典}，加载历史数据时直接读取
+        self.previous_reports = {}
+
         # 尝试加载本地保存的数据
         saved_reports, saved_date = self.data_persistence.load_data()
         today = date.today()
 
-        # 判断是否是同一天数据
+        # 判断是否是同一天数据；报表集合维护按ID、平台和表格行的索引
         if saved_reports and saved_date == today:
-            self.current_reports = saved_reports
-            for report in self.current_reports:
+            self.report_store = ReportStore(saved_reports)
+            for report in self.report_store:
                 if not hasattr(report, 'total_bucket_sign'):
                     report.total_bucket_sign = "是"
         else:
-            self.current_reports = []  # 删除默认构造数据逻辑
-
-        # 构建ID到报表的映射，提高查找效率
-        self.report_id_map = {report.id: report for report in self.current_reports}
+            self.report_store = ReportStore()  # 删除默认构造数据逻辑
+            if saved_reports and saved_date is not None and saved_date < today:
+                # 跨日时程序未运行：前一天未上报的数据补报到历史报表
+                self.archive_reports(saved_reports, saved_date)
+        self.report_day = today  # 当前报表所属日期
+        self.room_wells = []  # 本计量间的油井 (well_id, 井号, 平台)，跨日时预置日报
+        self.well_ids = {}  # (平台, 井号) -> well_id，保存井静态资料时使用
         self.current_record_id = None
         self.current_report_date = None
-        self.radio_widgets = []
-
-        # 设置定时器，每天凌晨更新日期并清空数据
+        self.platform_spans = {}
+
+        # 在本地零点准时跨日；每小时再检查一次，防止系统休眠错过定时
+        self.rollover_timer = QTimer()
+        self.rollover_timer.setSingleShot(True)
+        self.rollover_timer.setTimerType(Qt.PreciseTimer)
+        self.rollover_timer.timeout.connect(self.check_and_update_daily)
+        self.schedule_rollover()
         self.timer = QTimer()
         self.timer.timeout.connect(self.check_and_update_daily)
         self.timer.start(3600000)
@@ -365,9 +662,17 @@ class OilStorageController:
         if self.is_refreshing:
             return
 
+        print("检测到公式更新，重新加载公式并计算数据")
+        # 公式在数据库线程中读取，读取完成后回到界面线程重新计算
+        self.db_worker.submit(
+            self.fetch_formulas, priority=PRIORITY_INTERACTIVE, key="oil_fetch_formulas",
+            on_result=self._on_formulas_fetched,
+            on_error=lambda e: QMessageBox.critical(self.view, "公式更新错误", f"公式更新失败: {str(e)}"),
+        )
+
+    def _on_formulas_fetched(self, formulas):
         try:
-            print("检测到公式更新，重新加载公式并计算数据")
-            self.load_formulas()
+            self.apply_formulas(formulas)
             self.calculate_all_reports()
             self.load_history_data()
         except Exception as e:
@@ -375,157 +680,202 @@ class OilStorageController:
 
     def load_formulas(self):
         try:
-            from sqlalchemy.orm import Session
-            from database.db_oil_schema import FormulaData
-
-            with Session(self.db_manager.engine) as session:
-                records = session.query(FormulaData.formula).all()
-
-            field_mapping = {
-                "油压": "oil_pressure",
-                "套压": "casing_pressure",
-                "回压": "back_pressure",
-                "合量斗数": "total_bucket",
-                "时间标记": "time_sign",
-                "憋压数据": "press_data",
-                "生产时间": "prod_hours",
-                "A2冲程": "a2_stroke",
-                "A2冲次": "a2_frequency",
-                "功图冲次": "work_stroke",
-                "有效排液冲程": "effective_stroke",
-                "充满系数": "fill_coeff_test",
-                "化验含水": "lab_water_cut",
-                "上报含水": "reported_water",
-                "充满系数液量": "fill_coeff_liquid",
-                "上次动管柱时间": "last_tubing_time",
-                "泵径": "pump_diameter",
-                "区块": "block",
-                "变压器": "transformer",
-                "备注": "remark",
-                "井次":"well_times",
-                "液量/斗数": "liquid_per_bucket",
-                "液量/斗数（功图）": "liquid_per_bucket",
-                "液量/斗数（60/流量计）": "liquid_per_bucket1",
-                "和": "sum_value",
-                "液量": "liquid1",
-                "生产系数": "production_coeff",
-                "A2 24h液量": "a2_24h_liquid",
-                "液量（资料员）": "liquid2",
-                "油量": "oil_volume",
-                "波动范围": "fluctuation_range",
-                "停产时间": "shutdown_time",
-                "理论排量-液量差值": "theory_diff",
-                "理论排量": "theory_displacement",
-                "K值": "k_value",
-                "日产液": "daily_liquid",
-                "日产油": "daily_oil",
-                "时间": "production_time",
-                "产油": "total_oil"
-            }
-
-            self.formulas = []
-            for record in records:
-                formula_str = record[0] if (record and len(record) > 0) else None
-                if isinstance(formula_str, str) and formula_str.strip():
-                    processed_formula = formula_str.strip()
-                    # 替换字段映射，使用更高效的正则方式
-                    for ch_field, en_field in field_mapping.items():
-                        processed_formula = re.sub(rf"\b{re.escape(ch_field)}\b", en_field, processed_formula)
-                    self.formulas.append(processed_formula)
-
-            self.formula_deps.build_dependencies(self.formulas)
-            print(f"加载公式成功，共 {len(self.formulas)} 条")
+            self.apply_formulas(self.fetch_formulas())
         except Exception as e:
             print(f"加载公式失败: {e}")
             self.formulas = []
 
+    def fetch_formulas(self):
+        """从数据库读取公式并把中文字段名替换为报表字段名"""
+        from sqlalchemy.orm import Session
+        from database.db_oil_schema import FormulaData
+
+        with Session(self.db_manager.engine) as session:
+            records = session.query(FormulaData.formula).all()
+
+        field_mapping = {
+            "油压": "oil_pressure",
+            "套压": "casing_pressure",
+            "回压": "back_pressure",
+            "合量斗数": "total_bucket",
+            "时间标记": "time_sign",
+            "憋压数据": "press_data",
+            "生产时间": "prod_hours",
+            "A2冲程": "a2_stroke",
+            "A2冲次": "a2_frequency",
+            "功图冲次": "work_stroke",
+            "有效排液冲程": "effective_stroke",
+            "充满系数": "fill_coeff_test",
+            "化验含水": "lab_water_cut",
+            "上报含水": "reported_water",
+            "充满系数液量": "fill_coeff_liquid",
+            "上次动管柱时间": "last_tubing_time",
+            "泵径": "pump_diameter",
+            "区块": "block",
+            "变压器": "transformer",
+            "备注": "remark",
+            "井次":"well_times",
+            "液量/斗数": "liquid_per_bucket",
+            "液量/斗数（功图）": "liquid_per_bucket",
+            "液量/斗数（60/流量计）": "liquid_per_bucket1",
+            "和": "sum_value",
+            "液量": "liquid1",
+            "生产系数": "production_coeff",
+            "A2 24h液量": "a2_24h_liquid",
+            "液量（资料员）": "liquid2",
+            "油量": "oil_volume",
+            "波动范围": "fluctuation_range",
+            "停产时间": "shutdown_time",
+            "理论排量-液量差值": "theory_diff",
+            "理论排量": "theory_displacement",
+            "K值": "k_value",
+            "日产液": "daily_liquid",
+            "日产油": "daily_oil",
+            "时间": "production_time",
+            "产油": "total_oil"
+        }
+
+        formulas = []
+        for record in records:
+            formula_str = record[0] if (record and len(record) > 0) else None
+            if isinstance(formula_str, str) and formula_str.strip():
+                processed_formula = formula_str.strip()
+                # 替换字段映射，使用更高效的正则方式
+                for ch_field, en_field in field_mapping.items():
+                    processed_formula = re.sub(rf"\b{re.escape(ch_field)}\b", en_field, processed_formula)
+                formulas.append(processed_formula)
+        return formulas
+
+    def apply_formulas(self, formulas):
+        """建立依赖图并编译公式"""
+        self.formulas = formulas
+        self.formula_deps.build_dependencies(self.formulas)
+        # 换用新的引擎对象，后台线程仍在使用的旧引擎不受影响
+        engine = FormulaEngine()
+        engine.load(self.formula_deps.field_formula_map, self.formula_deps.field_deps_map,
+                    self.formula_deps.order)
+        self.formula_engine = engine
+        for field, error in self.formula_engine.errors.items():
+            print(f"公式无效 [{field}]: {error}")
+        print(f"加载公式成功，共 {len(self.formulas)} 条")
+
     def calculate_all_reports(self):
         if not self.formulas or self.is_refreshing:
             print("没有可用的公式或正在刷新，跳过计算")
             return
 
-        # 批量计算时使用循环，避免重复操作
-        for report in self.current_reports:
-            self.calculate_report(report)
+        # 在后台线程按列批量计算，完成后由 on_recalc_finished 统一写回
+        self.start_recalculation()
+
+    def start_recalculation(self, fields=None):
+        """按当前报表的快照启动后台重算；新的请求会取消尚未完成的旧请求"""
+        if self.recalc_thread is not None:
+            self.recalc_thread.cancel()
+        self.recalc_generation += 1
+        self.recalc_dirty = set()
+
+        engine = self.formula_engine
+        input_fields = set(engine.slot_index) | {"time_sign"}
+        snapshots = [ReportSnapshot(report, input_fields) for report in self.report_store]
+
+        thread = RecalcThread(self.recalc_generation, engine, snapshots, fields)
+        thread.progress_signal.connect(self.on_recalc_progress)
+        thread.result_signal.connect(self.on_recalc_finished)
+        thread.finished.connect(lambda t=thread: self.recalc_threads.discard(t))
+        self.recalc_threads.add(thread)
+        self.recalc_thread = thread
+        thread.start()
+
+    def on_recalc_progress(self, generation, done, total):
+        if generation == self.recalc_generation:
+            self.view.set_recalc_progress(done, total)
+
+    def on_recalc_finished(self, generation, results):
+        """在界面线程中一次性写回后台计算结果；计算期间被修改过的报表按最新数据重算"""
+        if generation != self.recalc_generation:
+            return
+        self.recalc_thread = None
+        self.view.set_recalc_progress(0, 0)
+
+        dirty, self.recalc_dirty = self.recalc_dirty, set()
+        for report in self.report_store:
+            values = results.get(report.id)
+            if values is None or report.id in dirty:
+                # 快照之后新增或修改过的报表，快照结果已过期
+                self.calculate_report(report)
+                continue
+            for field, value in values.items():
+                setattr(report, field, value)
 
-        self.data_persistence.save_data(self.current_reports, date.today())
+        self.data_persistence.save_data(self.report_store, date.today())
         self.load_history_data()
 
-    def calculate_report(self, report):
-        try:
-            report_dict = report.__dict__
-            numeric_fields = {}
-
-            # 优化数值转换逻辑
-            for field, value in report_dict.items():
-                try:
-                    numeric_fields[field] = float(value) if value and str(value).strip() else ""
-                except (ValueError, TypeError):
-                    numeric_fields[field] = value
-
-            time_sign = report.time_sign
-            liquid_per_bucket_value = ""
-
-            if time_sign:
-                formula_suffix = ""
-                if time_sign == "功图":
-                    formula_suffix = "（功图）"
-                elif time_sign in ["60", "流量计"]:
-                    formula_suffix = "（60/流量计）"
-
-                formula_name = f"liquid_per_bucket{formula_suffix}"
-                expr = self.formula_deps.field_formula_map.get(formula_name, "")
-
-                if expr:
-                    try:
-                        deps = self.formula_deps.field_deps_map.get(formula_name, [])
-                        # 优化依赖检查逻辑
-                        missing_deps = []
-                        for dep in deps:
-                            dep_value = numeric_fields.get(dep, "")
-                            if not dep_value or str(dep_value).strip() == "":
-                                missing_deps.append(dep)
-
-                        if not missing_deps:
-                            # 使用更安全的表达式计算方式
-                            result = eval(expr, {"__builtins__": None}, numeric_fields)
-                            if isinstance(result, (int, float)):
-                                liquid_per_bucket_value = str(round(result, 2))
-                            else:
-                                liquid_per_bucket_value = str(result)
-                    except Exception as e:
-                        print(f"液量/斗数计算失败: {e}，公式: {expr}")
-                        liquid_per_bucket_value = ""
-
-            report.liquid_per_bucket = liquid_per_bucket_value
-            numeric_fields["liquid_per_bucket"] = liquid_per_bucket_value
-
-            # 计算其他字段
-            for field in self.formula_deps.field_formula_map:
-                if field.startswith("liquid_per_bucket"):
-                    continue
-
-                expr = self.formula_deps.field_formula_map[field]
-                deps = self.formula_deps.field_deps_map[field]
-
-                # 快速检查是否有缺失依赖
-                has_empty_dep = any(
-                    not str(numeric_fields.get(dep, "")).strip()
-                    for dep in deps
-                )
+    def _mark_recalc_dirty(self, reports):
+        if self.recalc_thread is not None:
+            self.recalc_dirty.update(report.id for report in reports)
+
+    def _target_fields(self, fields=None):
+        """按计算顺序返回需要计算的公式字段；fields 为 None 时计算全部"""
+        return target_fields(self.formula_engine, fields)
+
+    def affected_fields(self, changed_fields):
+        """
+        输入字段变化后需要重算的公式字段。
+        液量/斗数的各条公式统一以 liquid_per_bucket 表示。
+        """
+        engine = self.formula_engine
+        changed = set(changed_fields)
+        affected = set(engine.dependents_of(changed))
+        # 时间标记决定液量/斗数使用哪条公式；液量/斗数变化后继续向下游传播
+        if "time_sign" in changed or any(field.startswith("liquid_per_bucket") for field in affected):
+            affected.add("liquid_per_bucket")
+            affected.update(engine.dependents_of(changed | {"liquid_per_bucket"}))
+        return affected
+
+    def recalculate(self, reports, changed_fields):
+        """只重算受字段变化影响的公式，且只针对给定报表，返回重算的字段"""
+        fields = self.affected_fields(changed_fields)
+        if not fields or not reports:
+            return fields
+        if len(reports) == 1:
+            self.calculate_report(reports[0], fields)
+        else:
+            self.calculate_reports(reports, fields)
+        return fields
 
-                if has_empty_dep:
-                    setattr(report, field, "")
-                    continue
+    def calculate_reports(self, reports, fields=None):
+        """列式批量计算多条报表，结果统一写回；fields 指定时只计算这些字段"""
+        if not reports:
+            return
+        self._mark_recalc_dirty(reports)
+        try:
+            compute_reports(self.formula_engine, reports, fields)
+        except Exception as e:
+            print(f"批量计算报表失败: {e}")
 
-                try:
-                    result = eval(expr, {"__builtins__": None}, numeric_fields)
-                    if isinstance(result, (int, float)):
-                        result = round(result, 2)
-                    setattr(report, field, str(result))
-                except Exception as e:
-                    print(f"公式计算失败 [{field}]: {e}")
-                    setattr(report, field, "")
+    def calculate_report(self, report, fields=None):
+        """计算单条报表；fields 指定时只计算这些字段"""
+        self._mark_recalc_dirty([report])
+        try:
+            engine = self.formula_engine
+            # 只取公式用到的字段构造值向量，不再遍历 report.__dict__
+            values = engine.value_vector(report)
+
+            formula_name = None
+            if fields is None or "liquid_per_bucket" in fields:
+                formula_name = liquid_per_bucket_formula(report.time_sign)
+                report.liquid_per_bucket = ""
+                engine.assign(values, "liquid_per_bucket", "")
+
+            # 按拓扑顺序计算，中间字段的结果留在值向量中供下游复用
+            for field in self._target_fields(fields):
+                if not field.startswith("liquid_per_bucket"):
+                    setattr(report, field, engine.evaluate(field, values))
+                elif field == formula_name:
+                    # 液量/斗数的依赖为0时同样视为缺失
+                    liquid_per_bucket_value = engine.evaluate(field, values, zero_as_empty=True)
+                    report.liquid_per_bucket = liquid_per_bucket_value
+                    engine.assign(values, "liquid_per_bucket", liquid_per_bucket_value)
         except Exception as e:
             print(f"计算报表失败: {e}")
 
@@ -545,150 +895,162 @@ class OilStorageController:
 
     #主界面调用根据权限加载平台-井的模型列表
     def creat_model_list(self):
-        self.current_reports = []
+        self.report_store.clear()
         today = date.today()
+        self.report_day = today
         logger = logging.getLogger()
 
         try:
-            for area in list_root():
-                if area.area_name == self.area_name:
-                    area_id = area.area_id
-                    logger.debug(f"匹配到作业区: {area.area_name}, ID={area_id}")
-
-                    for team in list_children("area", area_id):
-                        if team.team_name == self.team_name:
-                            team_id = team.team_id
-                            logger.debug(f"匹配到班组: {team.team_name}, ID={team_id}")
-
-                            for room in list_children("team", team_id):
-                                if room.room_no == self.room_no:
-                                    room_id = room.id
-                                    logger.debug(f"匹配到计量间: {room.room_no}, ID={room_id}")
-
-                                    for bao in list_children("room", room_id):
-                                        logger.debug(
-                                            f"找到Bao: id={bao.id if hasattr(bao, 'bao_id') else getattr(bao, 'id', 'N/A')} 类型={getattr(bao, 'bao_typeid', '未知')}")
-                                        if getattr(bao, 'bao_typeid', '') == "油报":
-                                            for platform in list_children("bao", bao.id):
-                                                logger.debug(
-                                                    f"处理平台: id={platform.id} 编号={platform.platformer_id}")
-                                                for well in list_children("platform", platform.id):
-                                                    logger.debug(f"处理井: 井号={well.well_code} ID={well.id}")
-                                                    try:
-                                                        existing_report = find_by_sequence([
-                                                            area_id,
-                                                            team_id,
-                                                            room_id,
-                                                            bao.id,
-                                                            platform.id,
-                                                            well.id,
-                                                            today
-                                                        ])
-                                                        if existing_report is None:
-                                                            report = ReportData(platform.platformer_id, well.well_code)
-                                                            report.create_time = today
-                                                            report.id = f"{platform.platformer_id}_{well.well_code}_{today}"
-                                                            logger.debug(f"新建日报数据: {report.id}")
-                                                        else:
-                                                            report = existing_report
-                                                            logger.debug(f"已存在日报数据: {report.id}")
-                                                        self.current_reports.append(report)
-                                                    except Exception as e:
-                                                        logger.error(f"处理井数据时出错: {well.well_code} 错误: {e}",
-                                                                     exc_info=True)
+            # 一次加载本作业区的层级快照，不再逐层调用 list_children
+            hierarchy = load_hierarchy("area", self.area_name)
+            area = hierarchy.find("area", self.area_name)
+            team = hierarchy.find("team", self.team_name, area) if area else None
+            room = hierarchy.find("room", self.room_no, team) if team else None
+            if room is None:
+                logger.debug(f"未找到计量间: {self.area_name}/{self.team_name}/{self.room_no}")
+                return
+            logger.debug(f"匹配到计量间: {room.name}, ID={room.id}")
+
+            wells = []  # (平台, 井)
+            for bao in hierarchy.children(room, "bao"):
+                logger.debug(f"找到Bao: id={bao.id} 类型={bao.name}")
+                if bao.name != "油报":
+                    continue
+                for platform in hierarchy.children(bao, "platform"):
+                    logger.debug(f"处理平台: id={platform.id} 编号={platform.name}")
+                    for well in hierarchy.children(platform, "well"):
+                        wells.append((platform, well))
+
+            # 日报按 well_id 查询，先补全旧版上报未写 well_id 的日报
+            backfilled = backfill_oil_report_well_ids()
+            if backfilled:
+                logger.info(f"补全油报日报的 well_id: {backfilled} 条")
+
+            # 一次查询取回所有井的当天日报，再一次查询取回每口井之前最近一次填写的日报
+            well_ids = [well.id for _, well in wells]
+            existing_reports = find_oil_reports(well_ids, [today])[today]
+            profiles = find_well_profiles(well_ids, today)
+            for row in find_latest_oil_reports(well_ids, today).values():
+                self.remember_previous(row.to_dict())
+
+            self.room_wells = [(well.id, well.name, platform.name) for platform, well in wells]
+            self.well_ids = {(platform.name, well.name): well.id for platform, well in wells}
+            for platform, well in wells:
+                logger.debug(f"处理井: 井号={well.name} ID={well.id}")
+                existing_report = existing_reports.get(well.id)
+                if existing_report is None:
+                    report = new_day_report(platform.name, well.name, today, profiles.get(well.id))
+                    logger.debug(f"新建日报数据: {report.id}")
+                else:
+                    report = existing_report
+                    apply_profile(report, profiles.get(well.id, {}))
+                    logger.debug(f"已存在日报数据: {report.id}")
+                self.report_store.add(report)
         except Exception as e:
             logger.error(f"构建模型列表时出现错误: {e}", exc_info=True)
 
     #主界面调用构建油报表格
     def creat_table(self):
-        headers = [
-            "平台", "井号", "日期", "是否合量斗数", "合量斗数", "时间标记", "油压", "套压", "回压",
-            "憋压数据", "生产时间", "A2冲程", "A2冲次", "功图冲次",
-            "有效排液冲程", "充满系数", "化验含水", "上报含水",
-            "充满系数液量", "上次动管柱时间", "泵径", "区块", "变压器", "备注", "井次",
-            "每桶液量", "和", "液量1", "生产系数", "A2 24h液量", "液量2",
-            "油量", "波动范围", "停产时间", "理论差值", "理论排量", "K值",
-            "日产液", "日产油", "时间", "总产油"
-        ]
-
-        rows = []
-        for report in self.current_reports:
-            r = report.to_dict()
-            row = [r.get(k, "") for k in [
-                "platform", "well_code", "create_time", "total_bucket_sign", "total_bucket", "time_sign",
-                "oil_pressure", "casing_pressure", "back_pressure", "press_data", "prod_hours",
-                "a2_stroke", "a2_frequency", "work_stroke", "effective_stroke", "fill_coeff_test",
-                "lab_water_cut", "reported_water", "fill_coeff_liquid", "last_tubing_time",
-                "pump_diameter", "block", "transformer", "remark", "well_times", "liquid_per_bucket", "sum_value",
-                "liquid1", "production_coeff", "a2_24h_liquid", "liquid2", "oil_volume",
-                "fluctuation_range", "shutdown_time", "theory_diff", "theory_displacement",
-                "k_value", "daily_liquid", "daily_oil", "production_time", "total_oil"
-            ]]
-            row.append(r.get("id", ""))
-            rows.append(row)
-
-        model = SimpleTableModel(headers, rows, self)
+        model = SimpleTableModel(TABLE_HEADERS, self.report_store, self)
         self.view.ui.tableView.setModel(model)
+        self.platform_spans = {}
+
+        self.total_bucket_delegate = TotalBucketSignDelegate(self.view.ui.tableView)
+        self.total_bucket_delegate.state_changed.connect(self.on_radio_changed, Qt.QueuedConnection)
+        self.view.ui.tableView.setItemDelegateForColumn(3, self.total_bucket_delegate)
         self.view.ui.tableView.horizontalHeader().setDefaultSectionSize(150)
         self.view.ui.tableView.verticalHeader().setDefaultSectionSize(60)
 
+    #安排下一次零点跨日
+    def schedule_rollover(self):
+        now = datetime.now()
+        midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+        # 多等一秒，保证触发时 date.today() 已是新的一天
+        self.rollover_timer.start(int((midnight - now).total_seconds() * 1000) + 1000)
+
     #检查时间是否是新的一天
     def check_and_update_daily(self):
-        """检查是否需要每日更新"""
-        now = datetime.now()
-        if now.hour == 0 and now.minute < 3:
-            self.update_daily_data()
-    #每天凌晨清空日报
-    def update_daily_data(self):
-        """每日更新：更新日期并清空除井号和平台外的字段"""
+        """日期变化时执行跨日，并重新安排零点定时"""
         today = date.today()
-        for report in self.current_reports:
-            report.create_time = today  # 更新到最新日期
-            # 清空除井号和平台外的字段
-            report.total_bucket_sign = "是"
-            report.total_bucket = ""
-            report.time_sign = ""
-            report.oil_pressure = ""
-            report.casing_pressure = ""
-            report.back_pressure = ""
-            report.press_data = ""
-            report.prod_hours = ""
-            report.a2_stroke = ""
-            report.a2_frequency = ""
-            report.work_stroke = ""
-            report.effective_stroke = ""
-            report.fill_coeff_test = ""
-            report.lab_water_cut = ""
-            report.reported_water = ""
-            report.fill_coeff_liquid = ""
-            report.last_tubing_time = ""
-            report.pump_diameter = ""
-            report.block = ""
-            report.transformer = ""
-            report.remark = ""
-            report.liquid_per_bucket = ""
-            report.sum_value = ""
-            report.liquid1 = ""
-            report.production_coeff = ""
-            report.a2_24h_liquid = ""
-            report.liquid2 = ""
-            report.oil_volume = ""
-            report.fluctuation_range = ""
-            report.shutdown_time = ""
-            report.theory_diff = ""
-            report.theory_displacement = ""
-            report.k_value = ""
-            report.daily_liquid = ""
-            report.daily_oil = ""
-            report.well_times = ""
-            report.production_time = ""
-            report.total_oil = ""
+        if today != self.report_day:
+            self.rollover(today)
+        self.schedule_rollover()
+
+    #跨日：前一天数据整批补报，当天日报整批预置
+    def rollover(self, today):
+        """把前一天已填写的报表一次上报到历史报表，为每口井重建当天的空报表并在数据库中预置日报"""
+        self.archive_reports(list(self.report_store), self.report_day)
+        self.start_new_day(today)
+        if self.room_wells:
+            self.db_worker.submit(
+                seed_oil_reports, list(self.room_wells), today, priority=PRIORITY_WRITE,
+                key=f"oil_seed_{today}",
+                on_error=lambda e: print(f"预置当天日报失败: {e}"),
+            )
+
+    #把报表补报到历史报表（只上报有填写内容的报表）
+    def archive_reports(self, reports, day):
+        records = [values for values in (report.to_dict() for report in reports) if has_report_input(values)]
+        for values in records:
+            self.remember_previous(values)
+        if not records:
+            return
+        self.db_worker.submit(
+            self.db_manager.sync_to_backup, records, priority=PRIORITY_BULK, key=f"oil_archive_{day}",
+            on_result=lambda result: print(f"{day} 日报补报: {result[1]}"),
+            on_error=lambda e: print(f"{day} 日报补报失败: {e}"),
+        )
+
+    #记录井最近一次填写的日报，同一口井只保留日期最新的一条
+    def remember_previous(self, values):
+        key = (values.get("platform"), values.get("well_code"))
+        known = self.previous_reports.get(key)
+        if known is None or known["create_time"] <= values["create_time"]:
+            self.previous_reports[key] = values
+
+    #井静态资料写入 well_profile；没有变化的井在数据库线程中跳过，同一口井排队中的保存被合并
+    def save_profiles(self, reports):
+        for report in reports:
+            well_id = self.well_ids.get((report.platform, report.well_code))
+            if well_id is None:
+                continue
+            values = {name: getattr(report, name, "") for name in WELL_PROFILE_FIELDS}
+            self.db_worker.submit(
+                save_well_profiles, {well_id: values}, self.report_day, priority=PRIORITY_WRITE,
+                key=f"oil_profile_{well_id}",
+                on_error=lambda e: print(f"保存井静态资料失败: {e}"),
+            )
+
+    #按井重建指定日期的空报表
+    def start_new_day(self, today):
+        # 丢弃仍在进行的后台重算，结果属于旧的报表
+        if self.recalc_thread is not None:
+            self.recalc_thread.cancel()
+            self.recalc_thread = None
+        self.recalc_generation += 1
+        self.recalc_dirty.clear()
+
+        # 井静态资料沿用到新的一天，不需要重新录入
+        wells = [(report.platform, report.well_code,
+                  {name: getattr(report, name, "") for name in WELL_PROFILE_FIELDS})
+                 for report in self.report_store]
+        self.report_store.clear()
+        self.report_store.extend(new_day_report(platform, well_code, today, profile)
+                                 for platform, well_code, profile in wells)
+        self.report_day = today
+        self.current_record_id = None
 
         # 保存更新后的数据
-        self.data_persistence.save_data(self.current_reports, today)
+        self.data_persistence.save_data(self.report_store, today)
+        self.view.ui.label_9.setText(f"{today} 油报")
 
         # 重新加载数据显示
         self.load_history_data()
+
+    #手动每日更新
+    def update_daily_data(self):
+        """每日更新：更新日期并清空除井号和平台外的字段"""
+        self.start_new_day(date.today())
         QMessageBox.information(self.view, "每日更新", "已自动更新日期并清空数据")
 
     #设置表格和按钮
@@ -740,17 +1102,16 @@ class OilStorageController:
         if not well_code or not platform:
             return None
 
-        for r in self.current_reports:
-            if r.well_code == well_code and r.platform == platform:
-                return r
+        report = self.report_store.find(platform, well_code)
+        if report is not None:
+            return report
 
-            # 报表不存在，创建新报表
+        # 报表不存在，创建新报表
         new_report = ReportData(platform=platform, well_code=well_code)
         new_report.total_bucket_sign = "是"
         new_report.id = str(uuid.uuid4())  # 保证唯一性
 
-        self.current_reports.append(new_report)
-        self.report_id_map[new_report.id] = new_report
+        self.report_store.add(new_report)
         return new_report
 
     def _update_report_from_input(self, report: ReportData):
@@ -808,7 +1169,7 @@ class OilStorageController:
                 return
 
             # 使用映射快速查找报表
-            current_report = self.report_id_map.get(self.current_record_id)
+            current_report = self.report_store.get(self.current_record_id)
             if not current_report:
                 QMessageBox.warning(self.view, "警告", "未找到当前记录！")
                 return
@@ -817,19 +1178,23 @@ class OilStorageController:
             well_code = current_report.well_code
             current_date = current_report.create_time
 
-            previous_data = self.db_manager.fetch_previous_day_report(well_code, platform, current_date)
-            if not previous_data:
+            # 进入界面时已预取每口井之前最近一次填写的日报（缺报的日期向前取）
+            previous_data = self.previous_reports.get((platform, well_code))
+            if not previous_data or previous_data["create_time"] >= current_date:
                 QMessageBox.information(self.view, "提示",
-                                        f"未查询到 {platform}-{well_code} 在 {current_date - timedelta(days=1)} 的数据")
+                                        f"未查询到 {platform}-{well_code} 在 {current_date} 之前的数据")
                 return
 
+            # 井静态资料不在历史日报中，沿用当前报表的值
+            previous_data = dict(previous_data, **{name: getattr(current_report, name, "")
+                                                   for name in WELL_PROFILE_FIELDS})
             oil_well_model = OilWellModel.from_db_record(previous_data)
             oil_well_model.to_view(self.view)  # 同时更新tab1和tab2
             self.view.get_lineEdit_wellNum().setText(well_code)
             self.view.get_lineEdit_injectFuc().setText(platform)
 
             QMessageBox.information(self.view, "成功",
-                                    f"已加载 {current_date - timedelta(days=1)} 的历史数据")
+                                    f"已加载 {previous_data['create_time']} 的历史数据")
         except Exception as e:
             QMessageBox.warning(self.view, "错误", f"加载失败: {str(e)}")
     #将表格中的数据上报到数据库
@@ -841,9 +1206,13 @@ class OilStorageController:
         )
         if reply == QMessageBox.Yes:
             self.view.ui.pushButton.setEnabled(False)
-            self.db_thread = DbAsyncThread(self.db_manager, 'sync', self.current_reports)
-            self.db_thread.result_signal.connect(self.handle_sync_result)
-            self.db_thread.start()
+            # 在界面线程取数据快照，上报在数据库线程中执行
+            reports_dict = [report.to_dict() for report in self.report_store]
+            self.db_worker.submit(
+                self.db_manager.sync_to_backup, reports_dict, priority=PRIORITY_BULK, key="oil_sync",
+                on_result=lambda result: self.handle_sync_result(*result),
+                on_error=lambda e: self.handle_sync_result(False, f"操作失败: {str(e)}"),
+            )
     #上报结果处理器
     def handle_sync_result(self, success, msg):
         self.view.ui.pushButton.setEnabled(True)
@@ -862,7 +1231,7 @@ class OilStorageController:
         if reply == QMessageBox.Yes:
             # 清空除井号和平台外的所有字段
             today = date.today()
-            for report in self.current_reports:
+            for report in self.report_store:
                 report.create_time = today
                 report.total_bucket_sign = "是"
                 report.total_bucket = ""
@@ -887,7 +1256,7 @@ class OilStorageController:
                 report.remark = ""
 
             # 保存清空后的数据
-            self.data_persistence.save_data(self.current_reports, today)
+            self.data_persistence.save_data(self.report_store, today)
             self.load_history_data()
             QMessageBox.information(self.view, "成功", "当前报表数据已清空")
     #清空单条数据的处理反馈
@@ -967,7 +1336,7 @@ class OilStorageController:
                 QMessageBox.warning(self.view, "警告", "井组和平台为必填项！")
                 return
 
-            current_report = self.report_id_map.get(self.current_record_id)
+            current_report = self.report_store.get(self.current_record_id)
             if not current_report:
                 QMessageBox.warning(self.view, "警告", "未找到当前编辑的报表数据")
                 return
@@ -980,14 +1349,21 @@ class OilStorageController:
             if total_bucket_sign == "是":
                 platform = model.platform
                 target_bucket = model.total_bucket
-                for report in self.current_reports:
-                    if report.platform == platform and report.total_bucket_sign == "是":
-                        report.total_bucket = target_bucket
+                changed_reports = []
+                for report in self.report_store.shared_bucket_group(platform):
+                    if report is not current_report and report.total_bucket != target_bucket:
+                        changed_reports.append(report)
+                    report.total_bucket = target_bucket
+                # 同平台其他井的合量斗数随之变化，只重算依赖合量斗数的字段
+                fields = self.recalculate(changed_reports, {"total_bucket"})
+                self.data_persistence.save_changes(changed_reports, date.today(), fields | {"total_bucket"})
+            else:
+                changed_reports = []
 
-            self.data_persistence.save_data(self.current_reports, date.today())
+            self.data_persistence.save_changes([current_report], date.today())
+            self.save_profiles([current_report])
 
-            self.report_id_map = {report.id: report for report in self.current_reports}
-            self.load_history_data()
+            self.refresh_rows([current_report] + changed_reports)
             self.clear_fields()
 
             QMessageBox.information(self.view, "成功", "数据已更新！")
@@ -1022,115 +1398,23 @@ class OilStorageController:
         try:
             self.is_refreshing = True
             tableView = self.view.ui.tableView
-            tableView.clearSpans()
-
-            for widget in self.radio_widgets:
-                try:
-                    widget.state_changed.disconnect()
-                except:
-                    pass
-            self.radio_widgets.clear()
-
-            rows = [report.to_dict() for report in self.current_reports]
-            headers = [
-                "平台", "井号", "日期", "是否合量斗数", "合量斗数", "时间标记", "油压", "套压", "回压",
-                "憋压数据", "生产时间", "A2冲程", "A2冲次", "功图冲次",
-                "有效排液冲程", "充满系数", "化验含水", "上报含水",
-                "充满系数液量", "上次动管柱时间", "泵径", "区块", "变压器", "备注", "井次",
-                "液量/斗数", "和", "液量", "生产系数", "A2 24h液量", "液量（资料员）",
-                "油量", "波动范围", "停产时间", "理论排量-液量差值", "理论排量", "K值",
-                "日产液", "日产油", "时间", "产油"
-            ]
-
-            table_rows = []
-            grouped_data = {}
-            for row in rows:
-                platform = row.get("platform", "")
-                grouped_data.setdefault(platform, []).append(row)
-            sorted_platforms = sorted(grouped_data.keys())
-            current_row = 0
-            platform_row_ranges = {}
-            for platform in sorted_platforms:
-                group_rows = grouped_data[platform]
-                platform_row_count = len(group_rows)
-                platform_row_ranges[platform] = (current_row, platform_row_count)
-                for row in group_rows:
-                    display_row = [
-                        row.get("platform", ""),
-                        row.get("well_code", ""),
-                        str(row.get("create_time", "")),
-                        row.get("total_bucket_sign", "是"),
-                        row.get("total_bucket", ""),
-                        row.get("time_sign", ""),
-                        row.get("oil_pressure", ""),
-                        row.get("casing_pressure", ""),
-                        row.get("back_pressure", ""),
-                        row.get("press_data", ""),
-                        row.get("prod_hours", ""),
-                        row.get("a2_stroke", ""),
-                        row.get("a2_frequency", ""),
-                        row.get("work_stroke", ""),
-                        row.get("effective_stroke", ""),
-                        row.get("fill_coeff_test", ""),
-                        row.get("lab_water_cut", ""),
-                        row.get("reported_water", ""),
-                        row.get("fill_coeff_liquid", ""),
-                        row.get("last_tubing_time", ""),
-                        row.get("pump_diameter", ""),
-                        row.get("block", ""),
-                        row.get("transformer", ""),
-                        row.get("remark", ""),
-                        row.get("well_times",""),
-                        row.get("liquid_per_bucket", ""),
-                        row.get("sum_value", ""),
-                        row.get("liquid1", ""),
-                        row.get("production_coeff", ""),
-                        row.get("a2_24h_liquid", ""),
-                        row.get("liquid2", ""),
-                        row.get("oil_volume", ""),
-                        row.get("fluctuation_range", ""),
-                        row.get("shutdown_time", ""),
-                        row.get("theory_diff", ""),
-                        row.get("theory_displacement", ""),
-                        row.get("k_value", ""),
-                        row.get("daily_liquid", ""),
-                        row.get("daily_oil", ""),
-                        row.get("production_time", ""),
-                        row.get("total_oil", ""),
-                        row.get("id", "")
-                    ]
-                    table_rows.append(display_row)
-                    current_row += 1
-
-            # 更新模型
+
+            # 更新模型：行的组成不变时只通知数据变化，不重建模型
             current_model = tableView.model()
             if current_model and isinstance(current_model, SimpleTableModel):
-                current_model.update_data(table_rows)  # 调用强化后的更新方法
+                current_model.set_reports(self.report_store)
             else:
-                current_model = SimpleTableModel(headers, table_rows, self)
+                current_model = SimpleTableModel(TABLE_HEADERS, self.report_store, self)
                 tableView.setModel(current_model)
+                self.platform_spans = {}
 
-            tableView.viewport().update()
-            tableView.updateGeometry()
-
-            for platform, (start_row, row_count) in platform_row_ranges.items():
-                if row_count > 1:
-                    tableView.setSpan(start_row, 0, row_count, 1)
-
-            for row_idx in range(len(table_rows)):
-                row_data = table_rows[row_idx]
-                radio_widget = RadioButtonWidget(
-                    row_idx=row_idx,
-                    platform=row_data[0],
-                    well_code=row_data[1],
-                    initial_state=row_data[3]
-                )
-                radio_widget.state_changed.connect(self.on_radio_changed, Qt.QueuedConnection)
-                tableView.setIndexWidget(current_model.index(row_idx, 3), radio_widget)
-                self.radio_widgets.append(radio_widget)
-
-            # 再次强制刷新
-            tableView.viewport().repaint()
+            # 平台分组没有变化时保留原有合并单元格
+            if current_model.spans != self.platform_spans:
+                tableView.clearSpans()
+                for platform, (start_row, row_count) in current_model.spans.items():
+                    if row_count > 1:
+                        tableView.setSpan(start_row, 0, row_count, 1)
+                self.platform_spans = current_model.spans
 
         except Exception as e:
             print(f"刷新表格异常：{str(e)}")  # 捕获并打印异常
@@ -1149,34 +1433,33 @@ class OilStorageController:
             if not model or row_idx >= model.rowCount():
                 return
 
-            row_data = model.rows[row_idx]
-            record_id = row_data[-1]  # 最后一列是记录ID
-            if not record_id:
-                print("未找到记录ID，无法同步数据")
-                return
-
-            report = self.report_id_map.get(record_id)
+            report = model.report_at(row_idx)
             if not report:
-                print(f"未找到ID为{record_id}的报表数据")
-                return
-
-            headers = model.headers
-            if col_idx >= len(headers):
+                print(f"未找到第{row_idx}行的报表数据")
                 return
 
-            header_name = headers[col_idx]
-            field_name = self.header_to_field.get(header_name)
-            if not field_name:
-                print(f"未找到{header_name}对应的字段映射")
+            if col_idx >= len(TABLE_FIELDS):
                 return
+            field_name = TABLE_FIELDS[col_idx]
 
-            # 更新ReportData对象的字段值
+            # 模型已把新值写入ReportData对象
             if hasattr(report, field_name):
-                setattr(report, field_name, new_value)
                 print(f"更新字段 {field_name} 为 {new_value}")
 
-                self.data_persistence.save_data(self.current_reports, date.today())
-                self.load_history_data()
+                affected_reports = [report]
+                if field_name == "total_bucket" and report.total_bucket_sign == "是":
+                    # 合量斗数在同平台内共享
+                    for r in self.report_store.shared_bucket_group(report.platform):
+                        if r is not report:
+                            r.total_bucket = new_value
+                            affected_reports.append(r)
+
+                # 只重算依赖该字段的公式，只保存和刷新受影响的行
+                fields = self.recalculate(affected_reports, {field_name})
+                self.data_persistence.save_changes(affected_reports, date.today(), fields | {field_name})
+                if field_name in WELL_PROFILE_FIELDS:
+                    self.save_profiles([report])
+                self.refresh_rows(affected_reports, fields | {field_name})
             else:
                 print(f"ReportData没有字段 {field_name}")
 
@@ -1186,10 +1469,13 @@ class OilStorageController:
 
     #查找表格中记录行位置
     def find_row_by_id(self, model, record_id):
-        for row_idx in range(model.rowCount()):
-            if model.rows[row_idx][-1] == record_id:
-                return row_idx
-        return -1
+        return model.row_by_id.get(record_id, -1)
+
+    def refresh_rows(self, reports, fields=None):
+        """只刷新给定报表所在的行（fields 给出时只刷新这些列），找不到对应行时退回整表刷新"""
+        model = self.view.ui.tableView.model()
+        if not isinstance(model, SimpleTableModel) or not model.refresh_reports(reports, fields):
+            self.load_history_data()
     #设置合量斗数
     def on_radio_changed(self, row_idx, platform, well_code, is_yes):
         if self.is_refreshing:
@@ -1200,14 +1486,9 @@ class OilStorageController:
             if not model or row_idx >= model.rowCount():
                 return
 
-            record_id = model.rows[row_idx][-1]
-            if not record_id:
-                print("未找到记录ID")
-                return
-
             new_value = "是" if is_yes else "否"
 
-            report = self.report_id_map.get(record_id)
+            report = model.report_at(row_idx)
             if report:
                 old_value = report.total_bucket_sign
                 report.total_bucket_sign = new_value
@@ -1217,30 +1498,31 @@ class OilStorageController:
                 # 同步同平台合量斗数
                 elif new_value == "是":
                     same_platform_bucket = None
-                    for r in self.current_reports:
-                        if (r.platform == platform and r.total_bucket_sign == "是" and r.total_bucket):
+                    for r in self.report_store.shared_bucket_group(platform):
+                        if r.total_bucket:
                             same_platform_bucket = r.total_bucket
                             break
                     report.total_bucket = same_platform_bucket or ""
 
-                self.calculate_report(report)
+                fields = self.recalculate([report], {"total_bucket"})
 
-                self.data_persistence.save_data(self.current_reports, date.today())
-                self.report_id_map = {r.id: r for r in self.current_reports}
-                self.load_history_data()
+                fields |= {"total_bucket_sign", "total_bucket"}
+                self.data_persistence.save_changes([report], date.today(), fields)
+                self.refresh_rows([report], fields)
 
-                self.db_thread = DbUpdateThread(self.current_reports, row_idx)
-                self.db_thread.result_signal.connect(
-                    lambda success, err, p=platform: self.handle_radio_result(success, err, p)
+                # 连续切换时只保留一次落盘
+                self.db_worker.submit(
+                    self.data_persistence.flush, priority=PRIORITY_WRITE, key="oil_journal_flush",
+                    on_error=lambda e, p=platform: self.handle_radio_result(False, f"操作失败: {str(e)}", p),
                 )
-                self.db_thread.start()
         except Exception as e:
             QMessageBox.critical(self.view, "单选框错误", f"处理单选框变更失败: {str(e)}")
 
     #从指定行里面获取合量斗数
     def get_current_total_bucket(self, row_idx):
         model = self.view.ui.tableView.model()
-        return model.rows[row_idx][4] if row_idx < model.rowCount() else ""
+        report = model.report_at(row_idx)
+        return report.total_bucket if report else ""
 
     def handle_radio_result(self, success, err, platform):
         if not success:
@@ -1267,7 +1549,7 @@ class OilStorageController:
             if not table_model or not (0 <= row_index < table_model.rowCount()):
                 return
 
-            row_data = table_model.rows[row_index]
+            row_data = table_row(table_model.report_at(row_index))
             self.current_record_id = row_data[-1]
             self.current_report_date = row_data[2]
 
@@ -1318,7 +1600,7 @@ class OilStorageController:
             oil_well_model = OilWellModel.from_db_record(db_record)
             oil_well_model.to_view(self.view)
 
-            current_report = self.report_id_map.get(self.current_record_id)
+            current_report = self.report_store.get(self.current_record_id)
             if current_report:
                 self._display_report_to_result_page(current_report)
 
@@ -1339,6 +1621,11 @@ class OilStorageController:
     def __del__(self):
         if self.formula_check_thread and self.formula_check_thread.isRunning():
             self.formula_check_thread.stop()
+        for thread in list(getattr(self, "recalc_threads", ())):
+            thread.cancel()
+            thread.wait()
+        if getattr(self, "data_persistence", None):
+            self.data_persistence.flush()
 
 
 if __name__ == "__main__":
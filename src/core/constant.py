@@ -5,3 +5,6 @@ ROOT_DIR = Path(__file__).parent.parent.parent.resolve()
 
 #外部文件
 ACCOUNT_FILE = ROOT_DIR / "src" / "config" / "account.json"
+
+#公式更新通知文件，同机客户端据此立即检查公式版本
+FORMULA_NOTIFY_FILE = ROOT_DIR / "data" / "formula_revision"
@@ -0,0 +1,116 @@
+# db_worker.py
+"""
+数据库后台工作线程：所有数据库读写和本地日志落盘都排队在同一个线程中串行执行。
+
+- 任务按优先级执行：界面交互的读取优先于保存，保存优先于整批上报；
+- 同一 key 的任务尚未开始时，新提交的任务直接替换旧任务（合并重复保存）；
+- 结果和异常通过信号回到界面线程，再调用提交时给出的回调；
+- 程序退出时先执行完已排队的任务再结束线程，关闭窗口前的保存不会丢失。
+"""
+
+import itertools
+import queue
+import threading
+
+from PyQt5.QtCore import QThread, pyqtSignal, QCoreApplication
+
+PRIORITY_INTERACTIVE = 0  # 界面等待结果的读取
+PRIORITY_WRITE = 1  # 保存、落盘
+PRIORITY_BULK = 2  # 整批上报、导入等耗时任务
+_PRIORITY_STOP = 99  # 退出标记排在所有任务之后
+
+STOP_TIMEOUT = 60000  # 毫秒，退出时等待排队任务执行完的最长时间
+
+
+class DbJob:
+    """排队中的一个任务；cancel() 后尚未执行的任务会被跳过，已执行完的结果不再回调"""
+
+    def __init__(self, func, args, kwargs, priority, key, on_result, on_error):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.priority = priority
+        self.key = key
+        self.on_result = on_result
+        self.on_error = on_error
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class DbWorker(QThread):
+    job_finished = pyqtSignal(object, object, object)  # 任务, 结果, 异常
+
+    def __init__(self):
+        super().__init__()
+        self._queue = queue.PriorityQueue()
+        self._counter = itertools.count()  # 同优先级按提交顺序执行
+        self._pending = {}  # key -> 尚未开始的任务
+        self._lock = threading.Lock()
+        # 信号由工作线程发出，接收方在界面线程，回调因此在界面线程执行
+        self.job_finished.connect(self._dispatch)
+
+    def submit(self, func, *args, priority=PRIORITY_WRITE, key=None,
+               on_result=None, on_error=None, **kwargs) -> DbJob:
+        """提交任务；key 相同且尚未开始的任务会被新任务替换"""
+        job = DbJob(func, args, kwargs, priority, key, on_result, on_error)
+        with self._lock:
+            if key is not None:
+                old = self._pending.get(key)
+                if old is not None:
+                    old.cancel()
+                self._pending[key] = job
+            self._queue.put((priority, next(self._counter), job))
+        return job
+
+    def run(self):
+        while True:
+            _, _, job = self._queue.get()
+            if job is None:
+                break
+            with self._lock:
+                if job.key is not None and self._pending.get(job.key) is job:
+                    del self._pending[job.key]
+            if job.cancelled:
+                continue
+            try:
+                result = job.func(*job.args, **job.kwargs)
+            except Exception as e:
+                print(f"后台数据库任务失败: {e}")
+                self.job_finished.emit(job, None, e)
+            else:
+                self.job_finished.emit(job, result, None)
+
+    def _dispatch(self, job, result, error):
+        if job.cancelled:
+            return
+        callback = job.on_error if error is not None else job.on_result
+        if callback is not None:
+            callback(error if error is not None else result)
+
+    def stop(self, timeout: int = STOP_TIMEOUT) -> bool:
+        """
+        执行完已排队的全部任务（保存、落盘、上报）后退出，最多等待 timeout 毫秒。
+        退出时界面已不再处理事件，任务的回调不会再执行。返回是否按时结束。
+        """
+        self._queue.put((_PRIORITY_STOP, next(self._counter), None))
+        finished = self.wait(timeout)
+        if not finished:
+            print(f"数据库后台任务在 {timeout // 1000} 秒内未执行完，剩余任务未保存")
+        return finished
+
+
+_worker = None
+
+
+def get_db_worker() -> DbWorker:
+    """返回进程内唯一的数据库工作线程，首次调用时启动"""
+    global _worker
+    if _worker is None:
+        _worker = DbWorker()
+        _worker.start()
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(_worker.stop)
+    return _worker
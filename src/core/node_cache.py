@@ -0,0 +1,61 @@
+# node_cache.py
+"""
+管理页面节点数据的 LRU 缓存。
+
+- 键为 (层级, ID, ...)，如 ("bao", 3, "AdminPage")、("well", 7, "oil")；
+- 写入数据库的 DAO 在事务提交后按 (层级, ID) 失效对应节点的全部缓存；
+- 数据库写入在后台工作线程，界面读取在主线程，所有操作加锁。
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Hashable, Iterable, Optional, Tuple
+
+NODE_CACHE_SIZE = 128  # 最多缓存的条目数
+
+
+class NodeCache:
+    def __init__(self, maxsize: int = NODE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._items: "OrderedDict[Tuple, object]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key: Tuple, default=None):
+        """命中时把条目移到最近使用的位置"""
+        with self._lock:
+            if key not in self._items:
+                return default
+            self._items.move_to_end(key)
+            return self._items[key]
+
+    def put(self, key: Tuple, value) -> None:
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def invalidate(self, level: str, node_id: Optional[Hashable]) -> None:
+        """删除 (level, node_id) 开头的全部条目"""
+        with self._lock:
+            for key in [k for k in self._items if k[:2] == (level, node_id)]:
+                del self._items[key]
+
+    def invalidate_many(self, nodes: Iterable[Tuple[str, Optional[Hashable]]]) -> None:
+        nodes = set(nodes)
+        if not nodes:
+            return
+        with self._lock:
+            for key in [k for k in self._items if k[:2] in nodes]:
+                del self._items[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+
+# 进程内共用的缓存
+node_cache = NodeCache()
@@ -0,0 +1,104 @@
+# column_types.py
+"""
+油报测量值的列类型：数据库中按 DECIMAL 保存，程序中仍按字符串读写。
+
+- 写入时空字符串和 None 保存为 NULL；无法解析或超出范围的文本抛出 InvalidNumber，不会静默丢失；
+- 读取时 NULL 返回空字符串，数值去掉多余的 0 后返回字符串；
+- 迁移完成前列仍是 VARCHAR：写入规范化后的数值文本（"1.5" 而不是 "1.5000"），
+  读到的数值文本同样规范化，无法换算的旧文本原样返回，新旧表结构都能使用。
+"""
+
+import re
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Optional
+
+from sqlalchemy import Numeric
+from sqlalchemy.types import TypeDecorator
+
+# 油报中按数值保存的测量/计算字段
+OIL_NUMERIC_COLUMNS = (
+    "oil_pressure", "casing_pressure", "back_pressure", "prod_hours", "a2_stroke", "a2_frequency",
+    "work_stroke", "effective_stroke", "fill_coeff_test", "lab_water_cut", "reported_water",
+    "fill_coeff_liquid", "total_bucket", "press_data", "pump_diameter", "well_times",
+    "liquid_per_bucket", "sum_value", "liquid1", "production_coeff", "a2_24h_liquid", "liquid2",
+    "oil_volume", "fluctuation_range", "shutdown_time", "theory_diff", "theory_displacement",
+    "k_value", "daily_liquid", "daily_oil", "production_time", "total_oil",
+)
+
+NUMERIC_PRECISION = 14  # 总位数
+NUMERIC_SCALE = 4  # 小数位数
+
+# 可保存的数值文本：可带正负号的整数或小数，不含千分位和科学计数法。
+# 迁移脚本在 MySQL 中换算旧数据时使用同一个表达式。
+NUMBER_PATTERN = "^[-+]?([0-9]+[.]?[0-9]*|[.][0-9]+)$"
+_NUMBER_RE = re.compile(NUMBER_PATTERN)
+_QUANTUM = Decimal(1).scaleb(-NUMERIC_SCALE)
+_LIMIT = Decimal(10) ** (NUMERIC_PRECISION - NUMERIC_SCALE)
+
+
+class InvalidNumber(ValueError):
+    """文本不是数字或超出 DECIMAL 列的范围"""
+
+
+def to_decimal(value) -> Optional[Decimal]:
+    """
+    把界面上的文本转换为 Decimal 并按列的小数位数四舍五入，空值返回 None；
+    不是数字或超出范围时抛出 InvalidNumber。
+    """
+    if value is None:
+        return None
+    if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+        number = Decimal(str(value))
+        if not number.is_finite():
+            raise InvalidNumber(f"“{value}”不是有效数字")
+    else:
+        text = str(value).strip()
+        if not text:
+            return None
+        if not _NUMBER_RE.match(text):
+            raise InvalidNumber(f"“{text}”不是有效数字")
+        number = Decimal(text)
+    # 先比较范围再舍入，过大的数舍入时会超出 Decimal 的精度
+    if abs(number) >= _LIMIT or abs(number.quantize(_QUANTUM, rounding=ROUND_HALF_UP)) >= _LIMIT:
+        raise InvalidNumber(f"“{value}”超出范围（整数部分最多 {NUMERIC_PRECISION - NUMERIC_SCALE} 位）")
+    return number.quantize(_QUANTUM, rounding=ROUND_HALF_UP)
+
+
+def check_number(value) -> Optional[str]:
+    """输入校验：可以保存时返回 None，否则返回错误说明"""
+    try:
+        to_decimal(value)
+    except InvalidNumber as e:
+        return str(e)
+    return None
+
+
+def decimal_text(value) -> str:
+    """把数据库中的值转换为界面使用的文本"""
+    if value is None:
+        return ""
+    if not isinstance(value, Decimal):
+        return str(value)
+    text = format(value, "f")
+    if "." in text:
+        text = text.rstrip("0").rstrip(".")
+    return text
+
+
+class NumericText(TypeDecorator):
+    """DECIMAL 列，Python 一侧为字符串"""
+
+    impl = Numeric(NUMERIC_PRECISION, NUMERIC_SCALE)
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        # 无法换算时抛出异常让写入失败，而不是把输入保存为 NULL；
+        # 按文本绑定，DECIMAL 列由数据库换算，VARCHAR 列保存的与界面显示的一致
+        number = to_decimal(value)
+        return None if number is None else decimal_text(number)
+
+    def process_result_value(self, value, dialect):
+        if isinstance(value, str) and check_number(value) is None:
+            # 迁移前的文本列
+            return decimal_text(to_decimal(value))
+        return decimal_text(value)
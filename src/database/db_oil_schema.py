@@ -1,6 +1,8 @@
-from sqlalchemy import Column, Integer, String, Date, Text, UniqueConstraint
+from sqlalchemy import BigInteger, Column, Integer, String, Date, DateTime, Text, UniqueConstraint, Index
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.ext.declarative import declared_attr
+
+from src.database.column_types import NumericText
 # Configuration imports removed – this module defines only ORM models
 # and does not require database initialisation at import time.
 
@@ -31,53 +33,63 @@ class OilWellBase:
         return (
             UniqueConstraint('platform', 'well_code', 'create_time',
                              name=f'uq_{cls.__tablename__}_unique'),
+            Index(f'ix_{cls.__tablename__}_create_time', 'create_time'),
         )
 
     # 其他字段
     total_bucket_sign = Column(String(50))  # 是否合量斗数
-    total_bucket = Column(String(50))  # 合量斗数
+    total_bucket = Column(NumericText)  # 合量斗数
     time_sign = Column(String(50))  # 时间标记
-    oil_pressure = Column(String(50))  # 油压
-    casing_pressure = Column(String(50))  # 套压
-    back_pressure = Column(String(50))  # 回压
-    press_data = Column(String(50))  # 憋压数据
-    prod_hours = Column(String(50))  # 生产时间
-    a2_stroke = Column(String(50))  # A2冲程
-    a2_frequency = Column(String(50))  # A2冲次
-    work_stroke = Column(String(50))  # 功图冲次
-    effective_stroke = Column(String(50))  # 有效排液冲程
-    fill_coeff_test = Column(String(50))  # 充满系数
-    lab_water_cut = Column(String(50))  # 化验含水
-    reported_water = Column(String(50))  # 上报含水
-    fill_coeff_liquid = Column(String(50))  # 充满系数液量
+    oil_pressure = Column(NumericText)  # 油压
+    casing_pressure = Column(NumericText)  # 套压
+    back_pressure = Column(NumericText)  # 回压
+    press_data = Column(NumericText)  # 憋压数据
+    prod_hours = Column(NumericText)  # 生产时间
+    a2_stroke = Column(NumericText)  # A2冲程
+    a2_frequency = Column(NumericText)  # A2冲次
+    work_stroke = Column(NumericText)  # 功图冲次
+    effective_stroke = Column(NumericText)  # 有效排液冲程
+    fill_coeff_test = Column(NumericText)  # 充满系数
+    lab_water_cut = Column(NumericText)  # 化验含水
+    reported_water = Column(NumericText)  # 上报含水
+    fill_coeff_liquid = Column(NumericText)  # 充满系数液量
     last_tubing_time = Column(String(50))  # 上次动管柱时间
-    pump_diameter = Column(String(50))  # 泵径
+    pump_diameter = Column(NumericText)  # 泵径
     block = Column(String(50))  # 区块
     transformer = Column(String(50))  # 变压器
     remark = Column(Text)  # 备注
-    liquid_per_bucket = Column(String(50))  # 每桶液量
-    sum_value = Column(String(50))  # 合计值
-    liquid1 = Column(String(50))  # 液量1
-    production_coeff = Column(String(50))  # 生产系数
-    a2_24h_liquid = Column(String(50))  # A2 24h液量
-    liquid2 = Column(String(50))  # 液量2
-    oil_volume = Column(String(50))  # 油量
-    fluctuation_range = Column(String(50))  # 波动范围
-    shutdown_time = Column(String(50))  # 停产时间
-    theory_diff = Column(String(50))  # 理论差值
-    theory_displacement = Column(String(50))  # 理论排量
-    k_value = Column(String(50))  # K值
-    daily_liquid = Column(String(50))  # 日产液
-    daily_oil = Column(String(50))  # 日产油
-    well_times = Column(String(50))  # 井次数
-    production_time = Column(String(50))  # 时间
-    total_oil = Column(String(50))  # 总产油
+    liquid_per_bucket = Column(NumericText)  # 每桶液量
+    sum_value = Column(NumericText)  # 合计值
+    liquid1 = Column(NumericText)  # 液量1
+    production_coeff = Column(NumericText)  # 生产系数
+    a2_24h_liquid = Column(NumericText)  # A2 24h液量
+    liquid2 = Column(NumericText)  # 液量2
+    oil_volume = Column(NumericText)  # 油量
+    fluctuation_range = Column(NumericText)  # 波动范围
+    shutdown_time = Column(NumericText)  # 停产时间
+    theory_diff = Column(NumericText)  # 理论差值
+    theory_displacement = Column(NumericText)  # 理论排量
+    k_value = Column(NumericText)  # K值
+    daily_liquid = Column(NumericText)  # 日产液
+    daily_oil = Column(NumericText)  # 日产油
+    well_times = Column(NumericText)  # 井次数
+    production_time = Column(NumericText)  # 时间
+    total_oil = Column(NumericText)  # 总产油
 
 class OilWellReports(Base, OilWellBase):
     """油井数据备份表模型（历史报表）"""
     __tablename__ = "oil_well_reports"
 
+    well_id = Column(BigInteger)  # 井ID，上报时按平台和井号解析
+
 class FormulaData(Base):
     __tablename__ = 'formula_datas'
     id = Column(Integer, primary_key=True)
-    formula = Column(String(255), nullable=False)
\ No newline at end of file
+    formula = Column(String(255), nullable=False)
+
+class FormulaRevision(Base):
+    """公式版本号（单行），公式表每次变更时递增，客户端据此判断是否需要重新拉取公式"""
+    __tablename__ = 'formula_revision'
+    id = Column(Integer, primary_key=True)
+    revision = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime)
@@ -1,13 +1,14 @@
 # db_schema.py
 from sqlalchemy import (
     Column, String, Integer, BigInteger, Date, DECIMAL, ForeignKey,
-    UniqueConstraint, TIMESTAMP, func
+    UniqueConstraint, Index, TIMESTAMP, func
 )
 from sqlalchemy.orm import declarative_base, relationship
 
 # Absolute imports allow this module to be imported without relying on package
 # relative imports.
 from src.config.db_config import SessionLocal
+from src.database.column_types import NumericText
 
 __all__ = ["SessionLocal"]
 Base = declarative_base()
@@ -106,6 +107,7 @@ class Well(Base):
     platform = relationship("Platformer", back_populates="wells")
     reports = relationship("DailyReport", back_populates="well")
     oil_well_reports = relationship("OilWellDatas", back_populates="well")
+    profiles = relationship("WellProfile", back_populates="well")
     __table_args__ = (
         UniqueConstraint("room_id", "well_code", name="uk_room_wellCode"),
     )
@@ -119,46 +121,72 @@ class OilWellDatas(Base):
     create_time = Column(Date)
     well_code = Column(String(50))
     platform = Column(String(50))
-    oil_pressure = Column(String(50))
-    casing_pressure = Column(String(50))
-    back_pressure = Column(String(50))
+    oil_pressure = Column(NumericText)
+    casing_pressure = Column(NumericText)
+    back_pressure = Column(NumericText)
     time_sign = Column(String(50))
     total_bucket_sign = Column(String(10))
-    total_bucket = Column(String(50))
-    press_data = Column(String(50))
-    prod_hours = Column(String(50))
-    a2_stroke = Column(String(50))
-    a2_frequency = Column(String(50))
-    work_stroke = Column(String(50))
-    effective_stroke = Column(String(50))
-    fill_coeff_test = Column(String(50))
-    lab_water_cut = Column(String(50))
-    reported_water = Column(String(50))
-    fill_coeff_liquid = Column(String(50))
+    total_bucket = Column(NumericText)
+    press_data = Column(NumericText)
+    prod_hours = Column(NumericText)
+    a2_stroke = Column(NumericText)
+    a2_frequency = Column(NumericText)
+    work_stroke = Column(NumericText)
+    effective_stroke = Column(NumericText)
+    fill_coeff_test = Column(NumericText)
+    lab_water_cut = Column(NumericText)
+    reported_water = Column(NumericText)
+    fill_coeff_liquid = Column(NumericText)
     last_tubing_time = Column(String(50))
-    pump_diameter = Column(String(50))
+    pump_diameter = Column(NumericText)
     block = Column(String(50))
     transformer = Column(String(50))
     remark = Column(String)
-    liquid_per_bucket = Column(String(50))
-    sum_value = Column(String(50))
-    liquid1 = Column(String(50))
-    production_coeff = Column(String(50))
-    a2_24h_liquid = Column(String(50))
-    liquid2 = Column(String(50))
-    oil_volume = Column(String(50))
-    fluctuation_range = Column(String(50))
-    shutdown_time = Column(String(50))
-    theory_diff = Column(String(50))
-    theory_displacement = Column(String(50))
-    k_value = Column(String(50))
-    daily_liquid = Column(String(50))
-    daily_oil = Column(String(50))
-    well_times = Column(String(50))
-    production_time = Column(String(50))
-    total_oil = Column(String(50))
+    liquid_per_bucket = Column(NumericText)
+    sum_value = Column(NumericText)
+    liquid1 = Column(NumericText)
+    production_coeff = Column(NumericText)
+    a2_24h_liquid = Column(NumericText)
+    liquid2 = Column(NumericText)
+    oil_volume = Column(NumericText)
+    fluctuation_range = Column(NumericText)
+    shutdown_time = Column(NumericText)
+    theory_diff = Column(NumericText)
+    theory_displacement = Column(NumericText)
+    k_value = Column(NumericText)
+    daily_liquid = Column(NumericText)
+    daily_oil = Column(NumericText)
+    well_times = Column(NumericText)
+    production_time = Column(NumericText)
+    total_oil = Column(NumericText)
     well = relationship("Well", back_populates="oil_well_reports")
-    __table_args__ = (UniqueConstraint("well_id", "create_time", name="uk_well_date"),)
+    __table_args__ = (
+        UniqueConstraint("well_id", "create_time", name="uk_well_date"),
+        Index("ix_oil_well_reports_create_time", "create_time"),  # 按日期汇总
+    )
+
+    def to_dict(self):
+        return {c.name: getattr(self, c.name) for c in self.__table__.columns}
+
+# ---------- 9. 井静态资料 ----------
+# 按井保存、不随日报每天重复的字段
+WELL_PROFILE_FIELDS = ("pump_diameter", "block", "transformer", "last_tubing_time")
+
+
+class WellProfile(Base):
+    """井的静态资料，每次变化新增一条记录，自 effective_date 起生效"""
+    __tablename__ = "well_profile"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    well_id = Column(BigInteger, ForeignKey("well.id"), nullable=False)
+    effective_date = Column(Date, nullable=False)  # 生效日期
+    pump_diameter = Column(NumericText)  # 泵径
+    block = Column(String(50))  # 区块
+    transformer = Column(String(50))  # 变压器
+    last_tubing_time = Column(String(50))  # 上次动管柱时间
+
+    well = relationship("Well", back_populates="profiles")
+    __table_args__ = (UniqueConstraint("well_id", "effective_date", name="uk_well_profile_date"),)
 
     def to_dict(self):
         return {c.name: getattr(self, c.name) for c in self.__table__.columns}
@@ -4,9 +4,39 @@ from typing import Iterable
 import pymysql
 
 from src.config.db_config import DB_URI
+from src.core.constant import FORMULA_NOTIFY_FILE
 from src.model.formula_model import Formula
 
 
+def _ensure_revision_table(cursor) -> None:
+    """公式版本号表不存在时创建（单行记录，id 固定为 1）"""
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS formula_revision ("
+        "id INT PRIMARY KEY, "
+        "revision INT NOT NULL DEFAULT 0, "
+        "updated_at DATETIME)"
+    )
+
+
+def _bump_revision(cursor) -> int:
+    """递增公式版本号并返回新版本号"""
+    cursor.execute(
+        "INSERT INTO formula_revision (id, revision, updated_at) VALUES (1, 1, NOW()) "
+        "ON DUPLICATE KEY UPDATE revision = revision + 1, updated_at = NOW()"
+    )
+    cursor.execute("SELECT revision FROM formula_revision WHERE id = 1")
+    return cursor.fetchone()[0]
+
+
+def _notify_local(revision: int) -> None:
+    """写入本机通知文件，同机客户端无需等待下一次轮询"""
+    try:
+        FORMULA_NOTIFY_FILE.parent.mkdir(parents=True, exist_ok=True)
+        FORMULA_NOTIFY_FILE.write_text(str(revision), encoding="utf-8")
+    except OSError as e:
+        print(f"写入公式更新通知失败: {e}")
+
+
 def upsert_formulas(formulas: Iterable[Formula]) -> int:
     """将公式数据写入数据库（存在则更新，不存在则插入）"""
     match = re.match(
@@ -26,6 +56,8 @@ def upsert_formulas(formulas: Iterable[Formula]) -> int:
         charset=charset,
     )
     cursor = conn.cursor()
+    # 建表语句会隐式提交，放在公式写入之前执行
+    _ensure_revision_table(cursor)
 
     cursor.execute("SELECT id, formula FROM formula_datas")
     existing = {}
@@ -51,7 +83,14 @@ def upsert_formulas(formulas: Iterable[Formula]) -> int:
         cursor.executemany("INSERT INTO formula_datas (formula) VALUES (%s)", to_insert)
 
     total = len(to_update) + len(to_insert)
+    revision = None
+    if total:
+        # 与公式写入在同一事务中递增版本号
+        revision = _bump_revision(cursor)
     conn.commit()
     cursor.close()
     conn.close()
+
+    if revision is not None:
+        _notify_local(revision)
     return total
@@ -1,8 +1,19 @@
+from sqlalchemy import tuple_
 from sqlalchemy.orm import Session
 from src.database.db_oil_schema import OilWellReports
+from src.database.db_schema import WELL_PROFILE_FIELDS, Platformer, Well
 from src.config.db_config import engine
+from src.core.node_cache import node_cache
+from src.database.column_types import OIL_NUMERIC_COLUMNS, check_number, to_decimal
 from datetime import date, timedelta
 
+# 上报时同步的字段（不含自增ID；井静态资料保存在 well_profile 中）
+_SYNC_COLUMNS = tuple(c.name for c in OilWellReports.__table__.columns
+                      if c.name != "id" and c.name not in WELL_PROFILE_FIELDS)
+# 复合键 IN 查询每批的键数量
+_SYNC_BATCH_SIZE = 500
+_SYNC_NUMERIC_COLUMNS = tuple(name for name in _SYNC_COLUMNS if name in OIL_NUMERIC_COLUMNS)
+
 
 class MySQLManager:
     def __init__(self):
@@ -28,65 +39,110 @@ class MySQLManager:
                 return None
 
     def sync_to_backup(self, reports_data):
-        """将内存中的报表数据同步到历史报表"""
+        """将内存中的报表数据同步到历史报表（只查询本批次涉及的记录）"""
         with Session(engine) as session:
             try:
                 if not reports_data:
                     return True, "当前表无数据可同步"
 
-                new_count = 0
-                update_count = 0
-                skip_count = 0
+                # 只保留历史表中存在的字段；同一唯一键重复出现时以最后一条为准
+                records = {}
+                for data_record in reports_data:
+                    record = {k: v for k, v in data_record.items() if k in _SYNC_COLUMNS}
+                    key = (record.get("platform"), record.get("well_code"), record.get("create_time"))
+                    records[key] = record
 
-                # 构建历史报表索引：(platform, well_code, create_time) → report_record
-                reports_index = {
-                    (report.platform, report.well_code, report.create_time): report
-                    for report in session.query(OilWellReports).all()
-                }
+                # 数值列无法保存时整批不写入，提示出错的井和字段
+                errors = self._invalid_numbers(records.values())
+                if errors:
+                    return False, "同步失败，以下数值无法保存：\n" + "\n".join(errors)
 
-                for data_record in reports_data:
-                    # 构建唯一标识元组
-                    key = (data_record["platform"], data_record["well_code"], data_record["create_time"])
-
-                    # 检查是否存在匹配的历史记录
-                    if key not in reports_index:
-                        # 新增记录
-                        new_report = OilWellReports(**{
-                            k: v for k, v in data_record.items() if k != 'id'
-                        })
-                        session.add(new_report)
-                        new_count += 1
+                # 按日报的 well_id 查找和汇总，上报时按平台、井号解析后一并写入
+                well_ids = self._well_id_map(session, list(records))
+                for (platform, well_code, _), record in records.items():
+                    record["well_id"] = well_ids.get((platform, well_code))
+
+                existing = self._fetch_existing(session, list(records))
+
+                to_insert = []
+                to_update = []
+                skip_count = 0
+                for key, record in records.items():
+                    row = existing.get(key)
+                    if row is None:
+                        to_insert.append(record)
+                    elif self._has_any_differences(record, row):
+                        to_update.append(dict(record, id=row["id"]))
                     else:
-                        # 检查是否需要更新
-                        report_record = reports_index[key]
-                        if self._has_any_differences(data_record, report_record):
-                            # 有差异，更新记录
-                            for k, v in data_record.items():
-                                if k != 'id':
-                                    setattr(report_record, k, v)
-                            update_count += 1
-                        else:
-                            # 无差异，跳过
-                            skip_count += 1
+                        # 无差异，跳过
+                        skip_count += 1
+
+                if to_insert:
+                    session.bulk_insert_mappings(OilWellReports, to_insert)
+                if to_update:
+                    session.bulk_update_mappings(OilWellReports, to_update)
 
                 session.commit()
+                # 管理页面中这些井的日报缓存失效
+                node_cache.invalidate_many(("well", r["well_id"]) for r in to_insert + to_update
+                                           if r["well_id"] is not None)
                 return True, (f"同步完成：\n"
-                              f"新增 {new_count} 条，更新 {update_count} 条，\n"
+                              f"新增 {len(to_insert)} 条，更新 {len(to_update)} 条，\n"
                               f"跳过 {skip_count} 条（内容完全相同）")
 
             except Exception as e:
                 session.rollback()
                 return False, f"同步失败：{str(e)}"
 
+    def _invalid_numbers(self, records):
+        """列出数值列中不是数字或超出范围的值"""
+        errors = []
+        for record in records:
+            for name in _SYNC_NUMERIC_COLUMNS:
+                message = check_number(record.get(name))
+                if message:
+                    errors.append(f"{record.get('platform')} {record.get('well_code')} "
+                                  f"{record.get('create_time')} {name}：{message}")
+        return errors
+
+    def _fetch_existing(self, session, keys):
+        """按 (platform, well_code, create_time) 复合键分批查询已有记录，返回 键 → 字段字典"""
+        columns = [getattr(OilWellReports, name) for name in ("id",) + _SYNC_COLUMNS]
+        key_columns = tuple_(OilWellReports.platform, OilWellReports.well_code, OilWellReports.create_time)
+
+        existing = {}
+        for start in range(0, len(keys), _SYNC_BATCH_SIZE):
+            batch = keys[start:start + _SYNC_BATCH_SIZE]
+            for row in session.query(*columns).filter(key_columns.in_(batch)):
+                row = dict(row._mapping)
+                existing[(row["platform"], row["well_code"], row["create_time"])] = row
+        return existing
+
+    def _well_id_map(self, session, keys):
+        """按 (平台, 井号) 查出记录对应的 well_id，返回 (平台, 井号) → well_id"""
+        pairs = list({(platform, well_code) for platform, well_code, _ in keys})
+        well_ids = {}
+        for start in range(0, len(pairs), _SYNC_BATCH_SIZE):
+            batch = pairs[start:start + _SYNC_BATCH_SIZE]
+            rows = (session.query(Platformer.platformer_id, Well.well_code, Well.id)
+                    .join(Platformer, Well.platform_id == Platformer.id)
+                    .filter(tuple_(Platformer.platformer_id, Well.well_code).in_(batch)))
+            well_ids.update(((platform, well_code), well_id) for platform, well_code, well_id in rows)
+        return well_ids
+
     def _has_any_differences(self, data_record, report_record):
         """检查两条记录的所有字段是否有任何不同（排除ID）"""
         for key, value in data_record.items():
             if key == 'id':
                 continue
-            if key=='well_id':
-                continue
 
-            report_val = getattr(report_record, key)
+            report_val = report_record.get(key) if isinstance(report_record, dict) else getattr(report_record, key)
+
+            # 数值列按数值比较（"1.5" 与 "1.50"、空串与 NULL 相同）
+            if key in _SYNC_NUMERIC_COLUMNS:
+                if self._number(value) != self._number(report_val):
+                    return True
+                continue
 
             # 特殊处理日期类型比较
             if isinstance(value, date) and isinstance(report_val, date):
@@ -106,6 +162,13 @@ class MySQLManager:
 
         return False
 
+    @staticmethod
+    def _number(value):
+        """数值列的比较值；无法换算的旧文本按原文本比较"""
+        if check_number(value) is None:
+            return to_decimal(value)
+        return str(value).strip()
+
     def _to_dict(self, obj):
         """ORM对象转字典"""
         if not obj:
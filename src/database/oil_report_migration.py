@@ -0,0 +1,232 @@
+# oil_report_migration.py
+"""
+把 oil_well_reports 的测量值列从 VARCHAR 迁移为 DECIMAL，迁移过程中表可以正常读写。
+
+步骤（先部署使用 NumericText 的新版程序，新旧表结构它都能读写）：
+1. prepare  —— 为每个数值列增加影子列 <列名>__num，并建触发器让新写入的行同步换算；
+2. backfill —— 按主键分批换算已有数据，进度记录在 schema_migration 表中，中断后重跑即可续上；
+3. check    —— 列出无法换算为数值的非空文本（换算后会变为 NULL）；
+4. cutover  —— 锁表后删除触发器，原列改名为 <列名>__text、影子列改名为原列名，并增加日期索引；
+5. cleanup  —— 确认无误后删除 <列名>__text 旧列。
+
+用法: python -m src.database.oil_report_migration {status|prepare|backfill|check|cutover|cleanup}
+"""
+
+import argparse
+import time
+from typing import Callable, Dict, List, Optional
+
+from src.config.db_config import engine as default_engine
+from src.database.column_types import OIL_NUMERIC_COLUMNS, NUMERIC_PRECISION, NUMERIC_SCALE, NUMBER_PATTERN
+
+TABLE = "oil_well_reports"
+MIGRATION_NAME = "oil_well_reports_numeric"
+SHADOW_SUFFIX = "__num"  # 迁移期间的 DECIMAL 影子列
+OLD_SUFFIX = "__text"  # 切换后保留的原文本列
+DATE_INDEX = "ix_oil_well_reports_create_time"
+_TRIGGERS = ("trg_oil_well_reports_num_ins", "trg_oil_well_reports_num_upd")
+_DECIMAL = f"DECIMAL({NUMERIC_PRECISION},{NUMERIC_SCALE})"
+
+
+def _convert_sql(expr: str) -> str:
+    """文本转 DECIMAL 的 SQL 表达式，空串和无法换算的文本为 NULL；可换算的写法与程序写入时的校验一致"""
+    return (f"CASE WHEN TRIM({expr}) REGEXP '{NUMBER_PATTERN}' "
+            f"THEN CAST(TRIM({expr}) AS {_DECIMAL}) ELSE NULL END")
+
+
+def _assignments(prefix: str = "") -> str:
+    """所有影子列的赋值列表，prefix 为触发器中的 NEW."""
+    return ", ".join(f"{prefix}`{c}{SHADOW_SUFFIX}` = {_convert_sql(f'{prefix}`{c}`')}"
+                     for c in OIL_NUMERIC_COLUMNS)
+
+
+def _columns(conn) -> Dict[str, str]:
+    """oil_well_reports 当前的 {列名: 数据类型}"""
+    rows = conn.exec_driver_sql(
+        "SELECT column_name, data_type FROM information_schema.columns "
+        f"WHERE table_schema = DATABASE() AND table_name = '{TABLE}'"
+    )
+    return {name: data_type.lower() for name, data_type in rows}
+
+
+def _ensure_progress_table(conn) -> None:
+    conn.exec_driver_sql(
+        "CREATE TABLE IF NOT EXISTS schema_migration ("
+        "name VARCHAR(64) PRIMARY KEY, "
+        "last_id BIGINT NOT NULL DEFAULT 0, "
+        "finished TINYINT NOT NULL DEFAULT 0, "
+        "updated_at DATETIME)"
+    )
+
+
+def _progress(conn):
+    """返回 (已换算到的主键, 是否完成)；未开始时为 None"""
+    row = conn.exec_driver_sql(
+        f"SELECT last_id, finished FROM schema_migration WHERE name = '{MIGRATION_NAME}'"
+    ).first()
+    return (row[0], bool(row[1])) if row else None
+
+
+def status(engine=default_engine) -> str:
+    """当前所处的迁移阶段"""
+    with engine.connect() as conn:
+        columns = _columns(conn)
+        if all(columns.get(c) == "decimal" for c in OIL_NUMERIC_COLUMNS):
+            if any(f"{c}{OLD_SUFFIX}" in columns for c in OIL_NUMERIC_COLUMNS):
+                return "已切换，旧文本列待删除（cleanup）"
+            return "已完成"
+        if not any(f"{c}{SHADOW_SUFFIX}" in columns for c in OIL_NUMERIC_COLUMNS):
+            return "未开始（prepare）"
+        _ensure_progress_table(conn)
+        progress = _progress(conn)
+        if progress is None or not progress[1]:
+            last_id = progress[0] if progress else 0
+            max_id = conn.exec_driver_sql(f"SELECT MAX(id) FROM `{TABLE}`").scalar() or 0
+            return f"换算中：已到 id={last_id} / {max_id}（backfill）"
+        return "已换算，待切换（check / cutover）"
+
+
+def prepare(engine=default_engine) -> None:
+    """增加影子列和同步触发器；重复执行时跳过已完成的部分"""
+    with engine.begin() as conn:
+        _ensure_progress_table(conn)
+        columns = _columns(conn)
+        missing = [c for c in OIL_NUMERIC_COLUMNS if f"{c}{SHADOW_SUFFIX}" not in columns]
+        if missing:
+            # 增加可空列不需要复制表，读写不受影响
+            adds = ", ".join(f"ADD COLUMN `{c}{SHADOW_SUFFIX}` {_DECIMAL} NULL" for c in missing)
+            conn.exec_driver_sql(f"ALTER TABLE `{TABLE}` {adds}, ALGORITHM=INPLACE, LOCK=NONE")
+
+        # 迁移期间新写入或修改的行由触发器换算，backfill 只需处理已有的行
+        insert_trigger, update_trigger = _TRIGGERS
+        for name in _TRIGGERS:
+            conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS `{name}`")
+        conn.exec_driver_sql(f"CREATE TRIGGER `{insert_trigger}` BEFORE INSERT ON `{TABLE}` "
+                             f"FOR EACH ROW SET {_assignments('NEW.')}")
+        conn.exec_driver_sql(f"CREATE TRIGGER `{update_trigger}` BEFORE UPDATE ON `{TABLE}` "
+                             f"FOR EACH ROW SET {_assignments('NEW.')}")
+        conn.exec_driver_sql(f"INSERT IGNORE INTO schema_migration (name, updated_at) "
+                             f"VALUES ('{MIGRATION_NAME}', NOW())")
+
+
+def backfill(engine=default_engine, batch_size: int = 2000, pause: float = 0.1,
+             progress: Optional[Callable[[int, int], None]] = None) -> None:
+    """
+    按主键顺序分批换算已有的行。每批和进度记录在同一个事务中提交，
+    中断后再次执行从上次提交的位置继续；pause 为批次间隔（秒），给在线业务让出资源。
+    """
+    while True:
+        with engine.begin() as conn:
+            state = _progress(conn)
+            if state is None:
+                raise RuntimeError("请先执行 prepare")
+            last_id, finished = state
+            if finished:
+                return
+            upper = conn.exec_driver_sql(
+                f"SELECT MAX(id) FROM (SELECT id FROM `{TABLE}` WHERE id > {int(last_id)} "
+                f"ORDER BY id LIMIT {int(batch_size)}) AS batch"
+            ).scalar()
+            if upper is None:
+                conn.exec_driver_sql(f"UPDATE schema_migration SET finished = 1, updated_at = NOW() "
+                                     f"WHERE name = '{MIGRATION_NAME}'")
+                return
+            conn.exec_driver_sql(f"UPDATE `{TABLE}` SET {_assignments()} "
+                                 f"WHERE id > {int(last_id)} AND id <= {int(upper)}")
+            conn.exec_driver_sql(f"UPDATE schema_migration SET last_id = {int(upper)}, updated_at = NOW() "
+                                 f"WHERE name = '{MIGRATION_NAME}'")
+            max_id = conn.exec_driver_sql(f"SELECT MAX(id) FROM `{TABLE}`").scalar() or upper
+        if progress is not None:
+            progress(upper, max_id)
+        time.sleep(pause)
+
+
+def unconvertible(engine=default_engine, limit: int = 20) -> Dict[str, List[str]]:
+    """换算后会丢失的非空文本：{列名: 示例值}，只在 backfill 完成后有意义"""
+    result = {}
+    with engine.connect() as conn:
+        for c in OIL_NUMERIC_COLUMNS:
+            rows = conn.exec_driver_sql(
+                f"SELECT DISTINCT `{c}` FROM `{TABLE}` WHERE TRIM(`{c}`) <> '' "
+                f"AND `{c}{SHADOW_SUFFIX}` IS NULL LIMIT {int(limit)}"
+            ).fetchall()
+            if rows:
+                result[c] = [row[0] for row in rows]
+    return result
+
+
+def cutover(engine=default_engine, force: bool = False) -> None:
+    """
+    切换到 DECIMAL 列。改列名只修改元数据，锁表时间很短；原文本保留在 <列名>__text 中。
+    有无法换算的文本时拒绝执行，除非 force=True。
+    """
+    with engine.connect() as conn:
+        _ensure_progress_table(conn)
+        state = _progress(conn)
+    if state is None or not state[1]:
+        raise RuntimeError("数据尚未换算完成，请先执行 backfill")
+    bad = unconvertible(engine, limit=1)
+    if bad and not force:
+        raise RuntimeError(f"以下列存在无法换算的文本，确认后使用 --force：{', '.join(bad)}")
+
+    with engine.connect() as conn:
+        # 锁表期间没有写入，删除触发器后影子列不会再落后
+        conn.exec_driver_sql(f"LOCK TABLES `{TABLE}` WRITE")
+        try:
+            for name in _TRIGGERS:
+                conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS `{name}`")
+            renames = ", ".join(
+                f"RENAME COLUMN `{c}` TO `{c}{OLD_SUFFIX}`, RENAME COLUMN `{c}{SHADOW_SUFFIX}` TO `{c}`"
+                for c in OIL_NUMERIC_COLUMNS)
+            conn.exec_driver_sql(f"ALTER TABLE `{TABLE}` {renames}")
+        finally:
+            conn.exec_driver_sql("UNLOCK TABLES")
+        indexes = {row[2] for row in conn.exec_driver_sql(f"SHOW INDEX FROM `{TABLE}`")}
+        if DATE_INDEX not in indexes:
+            conn.exec_driver_sql(f"ALTER TABLE `{TABLE}` ADD INDEX `{DATE_INDEX}` (create_time), "
+                                 f"ALGORITHM=INPLACE, LOCK=NONE")
+
+
+def cleanup(engine=default_engine) -> None:
+    """删除切换后保留的旧文本列"""
+    with engine.begin() as conn:
+        columns = _columns(conn)
+        old = [f"{c}{OLD_SUFFIX}" for c in OIL_NUMERIC_COLUMNS if f"{c}{OLD_SUFFIX}" in columns]
+        if old:
+            drops = ", ".join(f"DROP COLUMN `{name}`" for name in old)
+            conn.exec_driver_sql(f"ALTER TABLE `{TABLE}` {drops}, ALGORITHM=INPLACE, LOCK=NONE")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="oil_well_reports 数值列在线迁移")
+    parser.add_argument("step", choices=["status", "prepare", "backfill", "check", "cutover", "cleanup"])
+    parser.add_argument("--batch-size", type=int, default=2000)
+    parser.add_argument("--pause", type=float, default=0.1)
+    parser.add_argument("--force", action="store_true", help="cutover 时忽略无法换算的文本")
+    args = parser.parse_args(argv)
+
+    if args.step == "status":
+        print(status())
+    elif args.step == "prepare":
+        prepare()
+        print("影子列和触发器已就绪")
+    elif args.step == "backfill":
+        backfill(batch_size=args.batch_size, pause=args.pause,
+                 progress=lambda done, total: print(f"已换算到 id={done} / {total}"))
+        print("换算完成")
+    elif args.step == "check":
+        bad = unconvertible()
+        if not bad:
+            print("所有非空文本均可换算")
+        for column, values in bad.items():
+            print(f"{column}: {values}")
+    elif args.step == "cutover":
+        cutover(force=args.force)
+        print("已切换到 DECIMAL 列")
+    elif args.step == "cleanup":
+        cleanup()
+        print("旧文本列已删除")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+# report_journal.py
+"""
+本地报表日志：追加写的 JSON Lines 文件，只记录每条报表变化的字段。
+
+- 每次修改追加一行并立即写入系统缓冲区，fsync 按固定间隔合并执行；
+- 启动时按顺序重放日志恢复数据，末尾因断电写了一半的行会被截掉；
+- 日志过长或整体保存时压缩为全量快照，先写临时文件再原子替换。
+"""
+
+import json
+import os
+import threading
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return {"$datetime": value.isoformat()}
+    if isinstance(value, date):
+        return {"$date": value.isoformat()}
+    return str(value)
+
+
+def _decode(obj):
+    if "$date" in obj and len(obj) == 1:
+        return date.fromisoformat(obj["$date"])
+    if "$datetime" in obj and len(obj) == 1:
+        return datetime.fromisoformat(obj["$datetime"])
+    return obj
+
+
+class ReportJournal:
+    """按记录ID保存字段字典的追加写日志"""
+
+    COMPACT_THRESHOLD = 2000  # 追加超过这么多行后压缩
+    FSYNC_DELAY = 0.5  # 秒，合并这段时间内的写入后统一 fsync
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.RLock()
+        self._file = None
+        self._state: Dict[str, dict] = {}
+        self._date: Optional[date] = None
+        self._appended = 0
+        self._fsync_timer: Optional[threading.Timer] = None
+
+    # ---------- 读取 ----------
+    def load(self) -> Tuple[Optional[date], Dict[str, dict]]:
+        """重放日志，返回 (日期, {记录ID: 字段字典})"""
+        with self._lock:
+            self._state = {}
+            self._date = None
+            self._appended = 0
+            if not self.path.exists():
+                return None, {}
+
+            with open(self.path, "rb") as f:
+                data = f.read()
+            # 只重放以换行结尾的完整行；断电时最后一行可能只写了一半
+            complete = data.rfind(b"\n") + 1
+            for raw in data[:complete].split(b"\n"):
+                try:
+                    entry = json.loads(raw.decode("utf-8"), object_hook=_decode)
+                except ValueError:
+                    continue
+                self._apply(entry)
+                self._appended += 1
+            if complete < len(data):
+                # 截掉写了一半的行，之后追加的内容才不会接在它后面
+                with open(self.path, "r+b") as f:
+                    f.truncate(complete)
+                    f.flush()
+                    os.fsync(f.fileno())
+            return self._date, {key: dict(fields) for key, fields in self._state.items()}
+
+    def _apply(self, entry: dict) -> None:
+        op = entry.get("op")
+        if op == "date":
+            self._date = entry["date"]
+        elif op == "put":
+            self._state[entry["id"]] = dict(entry["fields"])
+        elif op == "set":
+            self._state.setdefault(entry["id"], {}).update(entry["fields"])
+        elif op == "del":
+            self._state.pop(entry["id"], None)
+
+    # ---------- 写入 ----------
+    def reset(self, current_date: date, records: Dict[str, dict]) -> None:
+        """整体替换为新的全量数据（压缩）"""
+        with self._lock:
+            self._date = current_date
+            self._state = {key: dict(fields) for key, fields in records.items()}
+            self._compact()
+
+    def set_date(self, current_date: date) -> None:
+        with self._lock:
+            if self._date != current_date:
+                self._append({"op": "date", "date": current_date})
+
+    def update(self, record_id: str, fields: dict) -> None:
+        """追加记录的变化字段"""
+        if not fields:
+            return
+        with self._lock:
+            self._append({"op": "set", "id": record_id, "fields": fields})
+
+    def remove(self, record_id: str) -> None:
+        with self._lock:
+            self._append({"op": "del", "id": record_id})
+
+    def _append(self, entry: dict) -> None:
+        self._apply(entry)
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+            if not self._ends_with_newline():
+                self._file.write("\n")  # 不接在写了一半的行后面
+        self._file.write(json.dumps(entry, ensure_ascii=False, default=_encode) + "\n")
+        self._file.flush()  # 进程崩溃时数据已在系统缓冲区中
+        self._appended += 1
+
+        if self._appended > self.COMPACT_THRESHOLD + len(self._state):
+            self._compact()
+        elif self._fsync_timer is None:
+            self._fsync_timer = threading.Timer(self.FSYNC_DELAY, self.flush)
+            self._fsync_timer.daemon = True
+            self._fsync_timer.start()
+
+    def _ends_with_newline(self) -> bool:
+        """日志文件为空或以换行结尾"""
+        size = self.path.stat().st_size
+        if size == 0:
+            return True
+        with open(self.path, "rb") as f:
+            f.seek(size - 1)
+            return f.read(1) == b"\n"
+
+    def flush(self) -> None:
+        """立即把已写入的内容落盘"""
+        with self._lock:
+            if self._fsync_timer is not None:
+                self._fsync_timer.cancel()
+                self._fsync_timer = None
+            if self._file is not None:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+
+    def _compact(self) -> None:
+        """写出全量快照到临时文件，fsync 后原子替换原日志"""
+        self._close_file()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            if self._date is not None:
+                f.write(json.dumps({"op": "date", "date": self._date}, default=_encode) + "\n")
+            for key, fields in self._state.items():
+                f.write(json.dumps({"op": "put", "id": key, "fields": fields},
+                                   ensure_ascii=False, default=_encode) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._fsync_dir()
+        self._appended = len(self._state) + 1
+
+    def _fsync_dir(self) -> None:
+        # 目录项也需要落盘，替换才算持久；Windows 不支持对目录 fsync
+        if os.name != "posix":
+            return
+        fd = os.open(self.path.parent, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _close_file(self) -> None:
+        if self._fsync_timer is not None:
+            self._fsync_timer.cancel()
+            self._fsync_timer = None
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_file()
+
+    def delete(self) -> None:
+        """删除日志文件并清空内存状态"""
+        with self._lock:
+            self._close_file()
+            self._state = {}
+            self._date = None
+            self._appended = 0
+            if self.path.exists():
+                os.remove(self.path)
@@ -1,14 +1,19 @@
 # water_report_dao.py
 
 
-from datetime import date
-from typing import Optional, Dict, List, Union
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Optional, Dict, Iterable, List, Tuple, Union
 
 from src.database.db_schema import Base
 
 from src.database.db_schema import (
-    SessionLocal, WorkArea, ProdTeam, MeterRoom, Well, DailyReport, Platformer, Bao, OilWellDatas
+    SessionLocal, WorkArea, ProdTeam, MeterRoom, Well, DailyReport, Platformer, Bao, OilWellDatas,
+    WellProfile, WELL_PROFILE_FIELDS
 )
+from src.database.column_types import NumericText, check_number, decimal_text, to_decimal
+from src.core.node_cache import node_cache
+from sqlalchemy import Float, and_, delete, func, insert, or_, select, type_coerce, update
 from sqlalchemy.orm import Session
 
 HierarchyObj = Union[WorkArea, ProdTeam, MeterRoom, Bao, Platformer, Well, DailyReport]
@@ -25,8 +30,15 @@ class DBSession:
             self.db.rollback()
         else:
             self.db.commit()
+            # 提交后才失效缓存，避免界面在提交前重新缓存旧数据
+            node_cache.invalidate_many(self.db.info.get("touched", ()))
         self.db.close()
 
+
+def _touch(db: Session, level: str, node_id) -> None:
+    """记录本事务修改了哪个节点的下级数据，提交后失效该节点的管理页面缓存"""
+    db.info.setdefault("touched", set()).add((level, node_id))
+
 # ---------- 1. 返回全部作业区 ----------
 def list_root() -> List[WorkArea]:
     """返回全部作业区"""
@@ -42,6 +54,7 @@ def upsert_work_area(area_name: str) -> int:
             obj = WorkArea(area_name=area_name)
             db.add(obj)
             db.flush()
+            _touch(db, "root", None)
         return obj.area_id
 
 
@@ -55,6 +68,7 @@ def upsert_prod_team(area_id: int, team_no: int, team_name: str) -> int:
             db.flush()
         else:
             obj.team_name = team_name
+        _touch(db, "area", area_id)
         return obj.team_id
 
 
@@ -70,6 +84,7 @@ def upsert_meter_room(team_id: int, room_no: str, is_injection: bool = False) ->
             db.flush()
         else:
             obj.is_injection_room = int(is_injection)
+        _touch(db, "team", team_id)
         return obj.id
 
 # ---------- 5. 报接口（修正字段名） ----------
@@ -83,6 +98,7 @@ def upsert_bao(room_id: int, bao_type: str) -> int:
             obj = Bao(room_id=room_id, bao_typeid=bao_type)
             db.add(obj)
             db.flush()
+            _touch(db, "room", room_id)
         return obj.id
 
 # ---------- 5. 平台接口 ----------
@@ -95,57 +111,33 @@ def upsert_platformer(bao_id: int, platform_name: str) -> int:
             obj = Platformer(bao_id=bao_id, platformer_id=platform_name)
             db.add(obj)
             db.flush()
+            _touch(db, "bao", bao_id)
         return obj.id
 
+# 油报空日报中置空的字段（井静态资料保存在 well_profile 中，日报中不再写入）
+_OIL_REPORT_EMPTY_FIELDS = (
+    "oil_pressure", "casing_pressure", "back_pressure", "time_sign", "total_bucket_sign",
+    "total_bucket", "press_data", "prod_hours", "a2_stroke", "a2_frequency", "work_stroke",
+    "effective_stroke", "fill_coeff_test", "lab_water_cut", "reported_water", "fill_coeff_liquid",
+    "remark", "liquid_per_bucket",
+    "sum_value", "liquid1", "production_coeff", "a2_24h_liquid", "liquid2", "oil_volume",
+    "fluctuation_range", "shutdown_time", "theory_diff", "theory_displacement", "k_value",
+    "daily_liquid", "daily_oil", "well_times", "production_time", "total_oil",
+)
+
+
+def _default_oil_report_row(well_id, well_code: str, platform: str, day: date) -> Dict:
+    """空日报的字段字典（仅含well_id、井号、平台、日期，其他字段为空）"""
+    row = dict.fromkeys(_OIL_REPORT_EMPTY_FIELDS, "")
+    row.update(well_id=well_id, well_code=well_code, platform=platform, create_time=day)
+    return row
+
+
 def create_default_oil_report(db, well_id: str, well_code: str, platform: str) -> OilWellDatas:
     """
     创建一个空日报数据对象（仅含well_id、井号、平台、日期，其他字段为空）
     """
-    default_report = OilWellDatas(
-        well_id=well_id,
-        well_code=well_code,
-        platform=platform,
-        create_time=date.today(),
-
-        oil_pressure="",
-        casing_pressure="",
-        back_pressure="",
-        time_sign="",
-        total_bucket_sign="",
-        total_bucket="",
-        press_data="",
-        prod_hours="",
-        a2_stroke="",
-        a2_frequency="",
-        work_stroke="",
-        effective_stroke="",
-        fill_coeff_test="",
-        lab_water_cut="",
-        reported_water="",
-        fill_coeff_liquid="",
-        last_tubing_time="",
-        pump_diameter="",
-        block="",
-        transformer="",
-        remark="",
-        liquid_per_bucket="",
-        sum_value="",
-        liquid1="",
-        production_coeff="",
-        a2_24h_liquid="",
-        liquid2="",
-        oil_volume="",
-        fluctuation_range="",
-        shutdown_time="",
-        theory_diff="",
-        theory_displacement="",
-        k_value="",
-        daily_liquid="",
-        daily_oil="",
-        well_times="",
-        production_time="",
-        total_oil=""
-    )
+    default_report = OilWellDatas(**_default_oil_report_row(well_id, well_code, platform, date.today()))
     db.add(default_report)
 
 # ---------- 6. 油井接口 ----------
@@ -172,6 +164,7 @@ def upsert_well(well_code: str, bao_type: str,
             obj = Well(room_id=room_id, bao_id=bao_id, platform_id=None, well_code=well_code)
             db.add(obj)
             db.flush()
+            _touch(db, "bao", bao_id)
             return obj.id
 
         elif bao_type == "油报":
@@ -188,6 +181,7 @@ def upsert_well(well_code: str, bao_type: str,
             db.add(obj)
             db.flush()
             create_default_oil_report(db, obj.id, well_code, platform.platformer_id)
+            _touch(db, "platform", platform_id)
             return obj.id
 
         else:
@@ -213,6 +207,7 @@ def upsert_water_well(bao_id: int, well_code: str) -> int:
             obj = Well(room_id=room_id, bao_id=bao_id, platform_id=None, well_code=well_code)
             db.add(obj)
             db.flush()
+            _touch(db, "bao", bao_id)
         return obj.id
 
 # ---------- 8. 水报数据接口 ----------
@@ -232,8 +227,112 @@ def upsert_daily_report(well_id: int, rpt_dict: Dict) -> int:
                 if k not in ("report_id", "well_id"):
                     setattr(obj, k, v)
         db.flush()
+        _touch(db, "well", well_id)
         return obj.report_id
 
+# ---------- 8b. 水报批量写入：一个事务内解析层级并批量 upsert ----------
+def save_daily_reports(area_name: str, team_name: str, room_no: str,
+                       reports: List[Tuple[str, Dict]]) -> List[Tuple[str, str]]:
+    """
+    在一个事务内写入一个计量间的全部水报日报。
+    reports 为 [(井号, 日报字典)]，日报字典需包含 report_date。
+    层级只解析一次，缺失的作业区/计量间/水井会被创建；
+    日报按 uk_well_date 唯一键批量 upsert。
+    返回每行的处理结果 [(井号, "新增" / "更新" / "跳过：原因")]。
+    """
+    outcomes: List[Tuple[str, str]] = []
+    pending: List[Tuple[str, Dict]] = []
+    for well_code, rpt in reports:
+        if not well_code:
+            outcomes.append((well_code, "跳过：井号为空"))
+        elif not rpt.get("report_date"):
+            outcomes.append((well_code, "跳过：缺少日期"))
+        else:
+            pending.append((well_code, rpt))
+    if not pending:
+        return outcomes
+
+    with DBSession() as db:
+        # 1. 层级只解析一次
+        area = db.query(WorkArea).filter_by(area_name=area_name).first()
+        if not area:
+            area = WorkArea(area_name=area_name)
+            db.add(area)
+            db.flush()
+            _touch(db, "root", None)
+
+        team = db.query(ProdTeam).filter_by(area_id=area.area_id, team_name=team_name).first()
+        if not team:
+            raise ValueError(f"找不到班组：{area_name}/{team_name}")
+
+        room = db.query(MeterRoom).filter_by(team_id=team.team_id, room_no=room_no).first()
+        if not room:
+            room = MeterRoom(team_id=team.team_id, room_no=room_no, is_injection_room=0)
+            db.add(room)
+            db.flush()
+            _touch(db, "team", team.team_id)
+
+        bao = db.query(Bao).filter_by(room_id=room.id, bao_typeid="水报").first()
+        if not bao:
+            raise ValueError(f"找不到对应的水报bao，room_id={room.id}")
+
+        # 2. 一次查出计量间下的井，缺失的井批量创建
+        codes = list({code for code, _ in pending})
+        well_ids = dict(db.query(Well.well_code, Well.id)
+                          .filter(Well.room_id == room.id, Well.well_code.in_(codes))
+                          .all())
+        new_wells = [Well(room_id=room.id, bao_id=bao.id, platform_id=None, well_code=code)
+                     for code in codes if code not in well_ids]
+        if new_wells:
+            db.add_all(new_wells)
+            db.flush()
+            _touch(db, "bao", bao.id)
+            well_ids.update((w.well_code, w.id) for w in new_wells)
+
+        rows = [dict(rpt, well_id=well_ids[code]) for code, rpt in pending]
+
+        # 3. 先查出已有日报用于区分新增/更新，再一次性 upsert
+        existing = set(db.query(DailyReport.well_id, DailyReport.report_date)
+                         .filter(DailyReport.well_id.in_({r["well_id"] for r in rows}),
+                                 DailyReport.report_date.in_({r["report_date"] for r in rows}))
+                         .all())
+        _upsert_daily_report_rows(db, rows)
+
+    for (code, _), row in zip(pending, rows):
+        outcomes.append((code, "更新" if (row["well_id"], row["report_date"]) in existing else "新增"))
+    return outcomes
+
+
+def _upsert_daily_report_rows(db: Session, rows: List[Dict]) -> None:
+    """按 uk_well_date 批量 upsert；MySQL 使用单条多行 INSERT ... ON DUPLICATE KEY UPDATE"""
+    for row in rows:
+        _touch(db, "well", row["well_id"])
+    if db.bind.dialect.name == "mysql":
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+        # 多行 VALUES 要求每行字段一致
+        columns = sorted({k for row in rows for k in row})
+        rows = [{c: row.get(c) for c in columns} for row in rows]
+        stmt = mysql_insert(DailyReport).values(rows)
+        stmt = stmt.on_duplicate_key_update({
+            c: stmt.inserted[c] for c in columns if c not in ("report_id", "well_id", "report_date")
+        })
+        db.execute(stmt)
+        return
+
+    # 其他数据库：同一事务内逐行合并
+    for row in rows:
+        obj = (db.query(DailyReport)
+                 .filter_by(well_id=row["well_id"], report_date=row["report_date"])
+                 .first())
+        if not obj:
+            db.add(DailyReport(**row))
+        else:
+            for k, v in row.items():
+                if k not in ("report_id", "well_id"):
+                    setattr(obj, k, v)
+    db.flush()
+
 # ---------- 9. 油报数据接口 ----------
 def upsert_oil_report(well_id: int, rpt_dict: dict) -> int:
     """
@@ -252,46 +351,151 @@ def upsert_oil_report(well_id: int, rpt_dict: dict) -> int:
                 if k not in ("id", "well_id"):
                     setattr(obj, k, v)
         db.flush()
+        _touch(db, "well", well_id)
         return obj.id
 
-def _recursive_delete(obj, db):
-    """深度优先删除：先删所有子级，再删自己"""
-    if isinstance(obj, WorkArea):
-        for team in list(obj.teams):
-            _recursive_delete(team, db)
+def seed_oil_reports(wells: Iterable[Tuple[int, str, str]], day: date) -> int:
+    """
+    为一批井 (well_id, 井号, 平台) 一次性插入指定日期的空日报，已有当天日报的井跳过。
+    MySQL 使用单条多行 INSERT IGNORE（依赖 uk_well_date）。返回新插入的条数。
+    """
+    rows = [_default_oil_report_row(well_id, well_code, platform, day)
+            for well_id, well_code, platform in wells]
+    if not rows:
+        return 0
+    with DBSession() as db:
+        for row in rows:
+            _touch(db, "well", row["well_id"])
+        if db.bind.dialect.name == "mysql":
+            result = db.execute(insert(OilWellDatas).prefix_with("IGNORE").values(rows))
+            return result.rowcount
+
+        # 其他数据库：先查出已有日报的井，再一次插入其余的井
+        existing = {
+            well_id for (well_id,) in db.query(OilWellDatas.well_id)
+            .filter(OilWellDatas.well_id.in_([row["well_id"] for row in rows]),
+                    OilWellDatas.create_time == day)
+        }
+        rows = [row for row in rows if row["well_id"] not in existing]
+        if rows:
+            db.execute(insert(OilWellDatas), rows)
+        return len(rows)
 
-    elif isinstance(obj, ProdTeam):
-        for room in list(obj.rooms):
-            _recursive_delete(room, db)
+def _parent_key(obj) -> Tuple[str, object]:
+    """对象的上级节点 (层级, ID)，管理页面中列出该对象的表格属于这个节点"""
+    if isinstance(obj, WorkArea):
+        return "root", None
+    if isinstance(obj, ProdTeam):
+        return "area", obj.area_id
+    if isinstance(obj, MeterRoom):
+        return "team", obj.team_id
+    if isinstance(obj, Bao):
+        return "room", obj.room_id
+    if isinstance(obj, Platformer):
+        return "bao", obj.bao_id
+    if isinstance(obj, Well):
+        return ("platform", obj.platform_id) if obj.platform_id is not None else ("bao", obj.bao_id)
+    return "well", obj.well_id
+
+
+# ---------- 级联删除：按层级整批删除 ----------
+# (层级, 模型, 主键, 指向上级的外键)，自上而下
+_DELETE_LEVELS = (
+    ("area", WorkArea, WorkArea.area_id, None),
+    ("team", ProdTeam, ProdTeam.team_id, ProdTeam.area_id),
+    ("room", MeterRoom, MeterRoom.id, MeterRoom.team_id),
+    ("bao", Bao, Bao.id, Bao.room_id),
+    ("platform", Platformer, Platformer.id, Platformer.bao_id),
+)
+# 挂在井下的数据表
+_WELL_DATA_MODELS = (DailyReport, OilWellDatas, WellProfile)
 
-    elif isinstance(obj, MeterRoom):
-        # 注意关系名改成单数bao
-        for bao in list(obj.bao):
-            _recursive_delete(bao, db)
 
-    elif isinstance(obj, Bao):
-        if obj.bao_typeid == "水报":
-            for well in list(obj.wells):
-                _recursive_delete(well, db)
-        elif obj.bao_typeid == "油报":
-            for platform in list(obj.platforms):
-                _recursive_delete(platform, db)
+def _subtree_conditions(level: str, node_id: int) -> Dict[str, object]:
+    """
+    子树中各层记录的筛选条件 {层级: 条件}，包含节点本身。
+    下层条件用上层的 ID 子查询表示，不把 ID 取回程序；油报井同时挂在平台和报下，按 bao_id 都能选中。
+    """
+    levels = [name for name, *_ in _DELETE_LEVELS]
+    conditions = {}
+    if level in levels:
+        parent_ids = None
+        for name, model, pk, fk in _DELETE_LEVELS[levels.index(level):]:
+            conditions[name] = pk == node_id if parent_ids is None else fk.in_(parent_ids)
+            parent_ids = select(pk).where(conditions[name])
+
+    if level == "well":
+        conditions["well"] = Well.id == node_id
+    elif level == "platform":
+        conditions["well"] = Well.platform_id == node_id
+    elif "bao" in conditions:
+        conditions["well"] = Well.bao_id.in_(select(Bao.id).where(conditions["bao"]))
+    else:
+        raise ValueError(f"未知实体类型：{level}")
+    return conditions
+
+
+def count_subtree(level: str, node_id: int) -> Dict[str, int]:
+    """
+    级联删除前的影响预览：子树中各层（不含节点本身）和日报的行数，
+    返回 {"team"/"room"/"bao"/"platform"/"well"/"daily_report"/"oil_report": 行数}。
+    全部 COUNT 合并为一条 SELECT。
+    """
+    conditions = _subtree_conditions(level, node_id)
+    well_ids = select(Well.id).where(conditions["well"])
+    counts = {name: select(func.count()).select_from(model).where(conditions[name])
+              for name, model, *_ in _DELETE_LEVELS if name in conditions and name != level}
+    if level != "well":
+        counts["well"] = select(func.count()).select_from(Well).where(conditions["well"])
+    counts["daily_report"] = select(func.count()).select_from(DailyReport).where(DailyReport.well_id.in_(well_ids))
+    counts["oil_report"] = select(func.count()).select_from(OilWellDatas).where(OilWellDatas.well_id.in_(well_ids))
 
-    elif isinstance(obj, Platformer):
-        for well in list(obj.wells):
-            _recursive_delete(well, db)
+    with DBSession() as db:
+        row = db.execute(select(*(query.scalar_subquery().label(name) for name, query in counts.items()))).one()
+    return dict(row._mapping)
 
-    elif isinstance(obj, Well):
-        # 删除水报
-        db.query(DailyReport).filter_by(well_id=obj.id).delete(synchronize_session=False)
-        # 删除油报
-        db.query(OilWellDatas).filter_by(well_id=obj.id).delete(synchronize_session=False)
-    db.delete(obj)
 
-def delete_entity(entity_type: str, entity_id: int) -> bool:
+def _delete_subtree(db: Session, level: str, node_id: int, chunk_size: Optional[int] = None) -> None:
     """
-    entity_type ∈ {'area', 'team', 'room', 'bao', 'platform', 'well', 'report'}
+    在当前事务内自下而上删除子树：井下数据 → 井 → 平台 → 报 → 计量间 → 班组 → 作业区，
+    每层一条 DELETE ... WHERE ... IN (子查询)。chunk_size 给出时井和井下数据按每批 chunk_size 口井删除。
     """
+    conditions = _subtree_conditions(level, node_id)
+
+    # 子树中的层级节点只取主键，提交后失效它们的管理页面缓存
+    for name, model, pk, _ in _DELETE_LEVELS:
+        if name in conditions:
+            for (obj_id,) in db.execute(select(pk).where(conditions[name])):
+                _touch(db, name, obj_id)
+    well_ids = db.execute(select(Well.id).where(conditions["well"])).scalars().all()
+    for well_id in well_ids:
+        _touch(db, "well", well_id)
+
+    def run(stmt):
+        db.execute(stmt.execution_options(synchronize_session=False))
+
+    if chunk_size:
+        for start in range(0, len(well_ids), chunk_size):
+            batch = well_ids[start:start + chunk_size]
+            for model in _WELL_DATA_MODELS:
+                run(delete(model).where(model.well_id.in_(batch)))
+            run(delete(Well).where(Well.id.in_(batch)))
+    else:
+        for model in _WELL_DATA_MODELS:
+            run(delete(model).where(model.well_id.in_(select(Well.id).where(conditions["well"]))))
+        run(delete(Well).where(conditions["well"]))
+
+    for name, model, _, _ in reversed(_DELETE_LEVELS):
+        if name in conditions:
+            run(delete(model).where(conditions[name]))
+
+
+def delete_entity(entity_type: str, entity_id: int, chunk_size: Optional[int] = None) -> bool:
+    """
+    entity_type ∈ {'area', 'team', 'room', 'bao', 'platform', 'well', 'report', 'oil_report'}
+    层级节点连同全部下级在一个事务内整批删除，chunk_size 见 _delete_subtree。
+    """
+    ensure_well_profile_table()  # 删除井时一并删除静态资料
     with DBSession() as db:
         mapper = {
             'area': (WorkArea, 'area_id'),
@@ -300,7 +504,8 @@ def delete_entity(entity_type: str, entity_id: int) -> bool:
             'bao': (Bao, 'id'),
             'platform': (Platformer, 'id'),
             'well': (Well, 'id'),                # 修改这里
-            'report': (DailyReport, 'report_id')
+            'report': (DailyReport, 'report_id'),
+            'oil_report': (OilWellDatas, 'id'),
         }
         if entity_type not in mapper:
             raise ValueError("未知实体类型")
@@ -310,11 +515,12 @@ def delete_entity(entity_type: str, entity_id: int) -> bool:
         if not obj:
             return False
 
-        if entity_type == 'report':
+        _touch(db, *_parent_key(obj))
+        if entity_type in ('report', 'oil_report'):
             db.delete(obj)              # 报表无子级，直接删除
         else:
-            _recursive_delete(obj, db)   # 递归级联删除
-        db.commit()
+            db.expunge(obj)
+            _delete_subtree(db, entity_type, entity_id, chunk_size)
     return True
 
 def _resolve_root(db: Session,
@@ -413,6 +619,673 @@ def list_children(level: str, key: Union[int, str]) -> List[Base]:
 
         return []
 
+# ---------- 层级快照：每层一条查询，替代逐节点 list_children ----------
+@dataclass(frozen=True)
+class HierarchyNode:
+    """层级快照中的只读节点"""
+    level: str                                # area / team / room / bao / platform / well
+    id: int
+    name: str                                 # 作业区名 / 班组名 / 间号 / 报类型 / 平台名 / 井号
+    parent: Optional[Tuple[str, int]] = None  # 父节点 (level, id)
+
+    @property
+    def key(self) -> Tuple[str, int]:
+        return self.level, self.id
+
+
+class HierarchySnapshot:
+    """层级结构快照：节点按 (level, id) 索引，并按父节点建立子节点索引"""
+
+    def __init__(self, nodes: List[HierarchyNode]):
+        self._nodes: Dict[Tuple[str, int], HierarchyNode] = {}
+        self._children: Dict[Tuple[str, int], List[HierarchyNode]] = {}
+        for node in nodes:
+            self._nodes[node.key] = node
+            if node.parent is not None:
+                self._children.setdefault(node.parent, []).append(node)
+
+    def get(self, level: str, node_id: int) -> Optional[HierarchyNode]:
+        return self._nodes.get((level, node_id))
+
+    def roots(self) -> List[HierarchyNode]:
+        """快照中的最上层节点（整棵树时为全部作业区）"""
+        return [n for n in self._nodes.values() if n.parent is None or n.parent not in self._nodes]
+
+    def children(self, node: HierarchyNode, level: Optional[str] = None) -> List[HierarchyNode]:
+        """子节点；指定 level 时只返回该层级的子节点"""
+        children = self._children.get(node.key, [])
+        if level is None:
+            return list(children)
+        return [c for c in children if c.level == level]
+
+    def parent(self, node: HierarchyNode) -> Optional[HierarchyNode]:
+        return self._nodes.get(node.parent) if node.parent else None
+
+    def find(self, level: str, name: str, parent: Optional[HierarchyNode] = None) -> Optional[HierarchyNode]:
+        """按名称查找节点，可限定父节点"""
+        candidates = self.children(parent, level) if parent else self._nodes.values()
+        return next((n for n in candidates if n.level == level and n.name == name), None)
+
+    def descendants(self, node: HierarchyNode, level: str) -> List[HierarchyNode]:
+        """节点下指定层级的全部后代"""
+        result = []
+        pending = [node]
+        while pending:
+            for child in self.children(pending.pop(0)):
+                if child.level == level:
+                    result.append(child)
+                else:
+                    pending.append(child)
+        return result
+
+
+_HIERARCHY_LEVELS = ("area", "team", "room", "bao", "platform", "well")
+
+# 层级 -> (id列, 名称列, 父id列, 排序列)；井的父节点可能是平台或报，单独处理
+_HIERARCHY_COLUMNS = {
+    "area": (WorkArea.area_id, WorkArea.area_name, None, WorkArea.area_name),
+    "team": (ProdTeam.team_id, ProdTeam.team_name, ProdTeam.area_id, ProdTeam.team_id),
+    "room": (MeterRoom.id, MeterRoom.room_no, MeterRoom.team_id, MeterRoom.id),
+    "bao": (Bao.id, Bao.bao_typeid, Bao.room_id, Bao.id),
+    "platform": (Platformer.id, Platformer.platformer_id, Platformer.bao_id, Platformer.id),
+}
+
+
+def load_hierarchy(level: Optional[str] = None, key: Union[int, str, None] = None) -> HierarchySnapshot:
+    """
+    一次性加载层级结构快照，每个层级只查询一次。
+    level/key 为空时加载整棵树；否则只加载该节点及其子树（key 可为 id 或名称）。
+    """
+    if level is not None and level not in _HIERARCHY_LEVELS:
+        raise ValueError("level 必须是 area/team/room/bao/platform/well")
+
+    with DBSession() as db:
+        if isinstance(key, str):
+            root = _resolve_root(db, level, key)
+            if not root:
+                return HierarchySnapshot([])
+            key = {"area": "area_id", "team": "team_id"}.get(level, "id")
+            key = getattr(root, key)
+        return HierarchySnapshot(_hierarchy_nodes(db, level, key))
+
+
+def _hierarchy_nodes(db: Session, level: Optional[str] = None, key: Optional[int] = None) -> List[HierarchyNode]:
+    """在给定会话中按层级查询快照节点，level 为空时查询整棵树"""
+    columns = _HIERARCHY_COLUMNS
+    nodes: List[HierarchyNode] = []
+    ids: Dict[str, List[int]] = {}
+    start = _HIERARCHY_LEVELS.index(level) if level else 0
+    for depth in range(start, len(_HIERARCHY_LEVELS) - 1):
+        lvl = _HIERARCHY_LEVELS[depth]
+        parent_level = _HIERARCHY_LEVELS[depth - 1] if depth else None
+        id_col, name_col, parent_col, order_col = columns[lvl]
+
+        query = db.query(id_col, name_col, parent_col) if parent_col is not None else db.query(id_col, name_col)
+        if lvl == level:
+            query = query.filter(id_col == key)
+        elif level is not None:
+            if not ids.get(parent_level):
+                break
+            query = query.filter(parent_col.in_(ids[parent_level]))
+
+        rows = query.order_by(order_col).all()
+        ids[lvl] = [row[0] for row in rows]
+        for row in rows:
+            parent = (parent_level, row[2]) if parent_col is not None else None
+            nodes.append(HierarchyNode(lvl, row[0], row[1], parent))
+
+    # 井：油井挂在平台下，水井挂在报下（油井的 bao_id 同样指向所属油报）
+    query = db.query(Well.id, Well.well_code, Well.bao_id, Well.platform_id)
+    if level == "well":
+        query = query.filter(Well.id == key)
+    elif level == "platform":
+        query = query.filter(Well.platform_id == key)
+    elif level is not None:
+        query = query.filter(Well.bao_id.in_(ids["bao"])) if ids.get("bao") else None
+
+    if query is not None:
+        for well_id, well_code, bao_id, platform_id in query.order_by(Well.id).all():
+            parent = ("platform", platform_id) if platform_id is not None else ("bao", bao_id)
+            nodes.append(HierarchyNode("well", well_id, well_code, parent))
+
+    return nodes
+
+
+# 各层级节点的子节点所在的父id列，用于判断节点是否还有下级
+_CHILD_PARENT_COLUMNS = {
+    "area": (ProdTeam.area_id,),
+    "team": (MeterRoom.team_id,),
+    "room": (Bao.room_id,),
+    "bao": (Platformer.bao_id, Well.bao_id),
+    "platform": (Well.platform_id,),
+    "well": (),
+}
+
+
+def list_child_nodes(level: Optional[str], node_id: Optional[int]) -> List[Tuple[HierarchyNode, bool]]:
+    """
+    节点的直接子节点，返回 [(子节点, 是否还有下级)]；level 为 None 时返回全部作业区。
+    只查询这一层和下一层是否存在，供树形视图展开时按需加载。
+    """
+    if level is not None and level not in _HIERARCHY_LEVELS:
+        raise ValueError("level 必须是 area/team/room/bao/platform/well")
+    if level == "well":
+        return []
+
+    with DBSession() as db:
+        queries = []  # (子层级, 查询)
+        if level is None:
+            id_col, name_col, _, order_col = _HIERARCHY_COLUMNS["area"]
+            queries.append(("area", db.query(id_col, name_col).order_by(order_col)))
+        elif level != "platform":
+            child_level = _HIERARCHY_LEVELS[_HIERARCHY_LEVELS.index(level) + 1]
+            id_col, name_col, parent_col, order_col = _HIERARCHY_COLUMNS[child_level]
+            queries.append((child_level, db.query(id_col, name_col).filter(parent_col == node_id)
+                            .order_by(order_col)))
+        # 油井挂在平台下，水井直接挂在报下
+        if level == "platform":
+            queries.append(("well", db.query(Well.id, Well.well_code)
+                            .filter(Well.platform_id == node_id).order_by(Well.id)))
+        elif level == "bao":
+            queries.append(("well", db.query(Well.id, Well.well_code)
+                            .filter(Well.bao_id == node_id, Well.platform_id.is_(None)).order_by(Well.id)))
+
+        result = []
+        for child_level, query in queries:
+            rows = query.all()
+            ids = [row[0] for row in rows]
+            with_children = set()
+            if ids:
+                for parent_col in _CHILD_PARENT_COLUMNS[child_level]:
+                    with_children.update(value for (value,) in
+                                         db.query(parent_col).filter(parent_col.in_(ids)).distinct())
+            parent = (level, node_id) if level is not None else None
+            result.extend((HierarchyNode(child_level, row[0], row[1], parent), row[0] in with_children)
+                          for row in rows)
+    return result
+
+
+# ---------- 层级批量导入：与现有层级比较后，一个事务内整批新增 ----------
+@dataclass
+class HierarchyImportResult:
+    """
+    批量导入层级的结果：created 为 {层级: [新增节点路径]}，existing 为 {层级: 已存在的节点数}，
+    errors 为 [(行号, 原因)]。有错误时不写入任何数据。
+    """
+    applied: bool = False
+    created: Dict[str, List[str]] = field(default_factory=lambda: {lvl: [] for lvl in _HIERARCHY_LEVELS})
+    existing: Dict[str, int] = field(default_factory=lambda: dict.fromkeys(_HIERARCHY_LEVELS, 0))
+    errors: List[Tuple[int, str]] = field(default_factory=list)
+
+
+# 导入时各层级新增记录的固定字段
+_IMPORT_DEFAULTS = {"room": {"is_injection_room": 0}}
+
+
+def _existing_paths(nodes: List[HierarchyNode]):
+    """
+    把层级快照转为按名称路径的索引：
+    返回 ({(层级, 路径): id}, {(作业区, 班组, 计量间, 井号): (井id, 父节点(层级, 路径))})
+    """
+    by_key = {node.key: node for node in nodes}
+    paths: Dict[Tuple[str, int], Tuple[str, ...]] = {}
+
+    def path_of(node):
+        if node.key not in paths:
+            parent = by_key.get(node.parent) if node.parent else None
+            paths[node.key] = (path_of(parent) if parent else ()) + (node.name,)
+        return paths[node.key]
+
+    index, wells = {}, {}
+    for node in nodes:
+        if node.level == "well":
+            parent = by_key.get(node.parent)
+            if parent is None:
+                continue
+            parent_path = path_of(parent)
+            wells[parent_path[:3] + (node.name,)] = (node.id, (parent.level, parent_path))
+        else:
+            index[(node.level, path_of(node))] = node.id
+    return index, wells
+
+
+def import_hierarchy(rows: Iterable[Dict], dry_run: bool = True) -> HierarchyImportResult:
+    """
+    批量导入 作业区 / 班组 / 计量间 / 报 / 平台 / 井。
+    rows 每行为 {"line", "area", "team", "room", "bao_type", "platform", "well_code", "team_no"}，
+    报类型、平台、井号、班组编号可为空（只建到上一级）；班组编号为空时按作业区内最大编号顺延。
+    现有层级一次读入内存比较，dry_run 时只返回将要新增的内容；
+    否则在一个事务内按层级整批插入，每层一条 INSERT，新油井同时预置当天的空日报。
+    """
+    result = HierarchyImportResult()
+    with DBSession() as db:
+        index, wells = _existing_paths(_hierarchy_nodes(db))
+        team_nos: Dict[Tuple[str, ...], set] = {}
+        for area_name, team_no in (db.query(WorkArea.area_name, ProdTeam.team_no)
+                                     .join(ProdTeam, ProdTeam.area_id == WorkArea.area_id)):
+            team_nos.setdefault((area_name,), set()).add(team_no)
+
+        new: Dict[str, Dict[Tuple[str, ...], Dict]] = {lvl: {} for lvl in _HIERARCHY_LEVELS}
+        seen = {lvl: set() for lvl in _HIERARCHY_LEVELS}
+        for number, row in enumerate(rows, start=1):
+            line = row.get("line", number)
+            area, team, room, bao_type, platform, well_code = (
+                str(row.get(k) or "").strip()
+                for k in ("area", "team", "room", "bao_type", "platform", "well_code"))
+            team_no = str(row.get("team_no") or "").strip()
+
+            if not (area and team and room):
+                result.errors.append((line, "作业区、班组、计量间不能为空"))
+                continue
+            if bao_type and bao_type not in ("水报", "油报"):
+                result.errors.append((line, f"报类型只能是水报或油报：{bao_type}"))
+                continue
+            if platform and bao_type != "油报":
+                result.errors.append((line, "只有油报下有平台"))
+                continue
+            if well_code and not bao_type:
+                result.errors.append((line, "井需要填写报类型"))
+                continue
+            if well_code and bao_type == "油报" and not platform:
+                result.errors.append((line, "油报井需要填写平台"))
+                continue
+            if team_no and not team_no.isdigit():
+                result.errors.append((line, f"班组编号不是整数：{team_no}"))
+                continue
+
+            steps = [("area", (area,)), ("team", (area, team)), ("room", (area, team, room))]
+            if bao_type:
+                steps.append(("bao", (area, team, room, bao_type)))
+            if platform:
+                steps.append(("platform", (area, team, room, bao_type, platform)))
+
+            well_key = well_parent = None
+            if well_code:
+                # 同一计量间内井号唯一（uk_room_wellCode）
+                well_key = (area, team, room, well_code)
+                well_parent = steps[-1]
+                old = wells.get(well_key)
+                if old is not None and old[1] != well_parent:
+                    result.errors.append((line, f"井号 {well_code} 已在该计量间的其他报或平台下"))
+                    continue
+                planned = new["well"].get(well_key)
+                if planned is not None and planned["parent"] != well_parent:
+                    result.errors.append((line, f"井号 {well_code} 在表格中重复且归属不同"))
+                    continue
+
+            team_path = (area, team)
+            if team_no and ("team", team_path) not in index and team_path not in new["team"]:
+                if int(team_no) in team_nos.get((area,), set()):
+                    result.errors.append((line, f"作业区 {area} 已有编号为 {team_no} 的班组"))
+                    continue
+                team_nos.setdefault((area,), set()).add(int(team_no))
+                new["team"][team_path] = {"team_no": int(team_no)}
+
+            for lvl, path in steps:
+                if (lvl, path) in index:
+                    seen[lvl].add(path)
+                else:
+                    new[lvl].setdefault(path, {})
+            if well_key is not None:
+                if well_key in wells:
+                    seen["well"].add(well_key)
+                else:
+                    new["well"].setdefault(well_key, {"parent": well_parent})
+
+        # 未指定编号的新班组按作业区内最大编号顺延
+        for path, values in new["team"].items():
+            if "team_no" not in values:
+                used = team_nos.setdefault(path[:1], set())
+                values["team_no"] = max(used, default=0) + 1
+                used.add(values["team_no"])
+
+        for lvl in _HIERARCHY_LEVELS:
+            result.existing[lvl] = len(seen[lvl])
+            if lvl == "well":
+                result.created[lvl] = [" / ".join(v["parent"][1] + (k[-1],)) for k, v in new[lvl].items()]
+            else:
+                result.created[lvl] = [" / ".join(path) for path in new[lvl]]
+        if dry_run or result.errors:
+            db.rollback()
+            return result
+
+        # 自上而下逐层插入，每层插入后按 (父id, 名称) 查回新记录的 id
+        for depth, lvl in enumerate(_HIERARCHY_LEVELS[:-1]):
+            if not new[lvl]:
+                continue
+            id_col, name_col, parent_col, _ = _HIERARCHY_COLUMNS[lvl]
+            parent_level = _HIERARCHY_LEVELS[depth - 1] if depth else None
+            values = []
+            for path, extra in new[lvl].items():
+                value = dict(_IMPORT_DEFAULTS.get(lvl, {}), **extra)
+                value[name_col.key] = path[-1]
+                if parent_col is not None:
+                    parent_id = index[(parent_level, path[:-1])]
+                    value[parent_col.key] = parent_id
+                    _touch(db, parent_level, parent_id)
+                else:
+                    _touch(db, "root", None)
+                values.append(value)
+            db.execute(insert(id_col.class_), values)
+
+            if parent_col is None:
+                query = db.query(id_col, name_col).filter(name_col.in_([p[-1] for p in new[lvl]]))
+                for node_id, name in query:
+                    index[(lvl, (name,))] = node_id
+            else:
+                parents = {index[(parent_level, p[:-1])]: p[:-1] for p in new[lvl]}
+                query = db.query(id_col, name_col, parent_col).filter(parent_col.in_(list(parents)))
+                for node_id, name, parent_id in query:
+                    path = parents[parent_id] + (name,)
+                    if path in new[lvl]:
+                        index[(lvl, path)] = node_id
+
+        if new["well"]:
+            values = []
+            for key, info in new["well"].items():
+                parent_level, parent_path = info["parent"]
+                parent_id = index[(parent_level, parent_path)]
+                bao_path = parent_path if parent_level == "bao" else parent_path[:-1]
+                values.append({
+                    "room_id": index[("room", key[:3])],
+                    "bao_id": index[("bao", bao_path)],
+                    "platform_id": parent_id if parent_level == "platform" else None,
+                    "well_code": key[-1],
+                })
+                _touch(db, parent_level, parent_id)
+            db.execute(insert(Well), values)
+
+            # 新油井预置当天的空日报（与 upsert_well 一致）
+            rooms = {value["room_id"]: key[:3] for key, value in zip(new["well"], values)}
+            platforms = {key: info["parent"][1][-1] for key, info in new["well"].items()
+                         if info["parent"][0] == "platform"}
+            reports = []
+            for well_id, room_id, well_code in (db.query(Well.id, Well.room_id, Well.well_code)
+                                                  .filter(Well.room_id.in_(list(rooms)),
+                                                          Well.well_code.in_([k[-1] for k in new["well"]]))):
+                key = rooms[room_id] + (well_code,)
+                if key in platforms:
+                    reports.append(_default_oil_report_row(well_id, well_code, platforms[key], date.today()))
+            if reports:
+                db.execute(insert(OilWellDatas), reports)
+
+    result.applied = True
+    return result
+
+
+# ---------- 日报批量查询：一条 IN 查询取多口井、多个日期 ----------
+def find_daily_reports(well_ids: Iterable[int],
+                       report_dates: Iterable[date]) -> Dict[date, Dict[int, DailyReport]]:
+    """
+    批量查询水报日报，返回 {日期: {well_id: DailyReport}}。
+    每个请求的日期都有对应的字典（没有记录时为空）。
+    """
+    well_ids = list(set(well_ids))
+    report_dates = list(set(report_dates))
+    result: Dict[date, Dict[int, DailyReport]] = {d: {} for d in report_dates}
+    if not well_ids or not report_dates:
+        return result
+
+    with DBSession() as db:
+        rows = (db.query(DailyReport)
+                  .filter(DailyReport.well_id.in_(well_ids),
+                          DailyReport.report_date.in_(report_dates))
+                  .all())
+    for row in rows:
+        result[row.report_date][row.well_id] = row
+    return result
+
+
+def find_oil_reports(well_ids: Iterable[int],
+                     create_dates: Iterable[date]) -> Dict[date, Dict[int, OilWellDatas]]:
+    """
+    批量查询油报日报，返回 {日期: {well_id: OilWellDatas}}。
+    每个请求的日期都有对应的字典（没有记录时为空）。
+    """
+    well_ids = list(set(well_ids))
+    create_dates = list(set(create_dates))
+    result: Dict[date, Dict[int, OilWellDatas]] = {d: {} for d in create_dates}
+    if not well_ids or not create_dates:
+        return result
+
+    with DBSession() as db:
+        rows = (db.query(OilWellDatas)
+                  .filter(OilWellDatas.well_id.in_(well_ids),
+                          OilWellDatas.create_time.in_(create_dates))
+                  .all())
+    for row in rows:
+        result[row.create_time][row.well_id] = row
+    return result
+
+
+def sum_oil_by_team(day: date, team_ids: Optional[Iterable[int]] = None) -> Dict[int, Dict[str, float]]:
+    """
+    在数据库中按班组汇总指定日期的油报，返回 {team_id: {"daily_liquid": 日产液, "daily_oil": 日产油, "wells": 井数}}。
+    按日期索引筛选，经 well_id 连接到班组（旧版上报的日报由 backfill_oil_report_well_ids 补全 well_id），
+    只统计填写了产量的日报；team_ids 为 None 时汇总全部班组。
+    """
+    query = (select(MeterRoom.team_id,
+                    # SUM 的结果不经过 NumericText 转换为文本，直接按浮点数读取
+                    type_coerce(func.sum(OilWellDatas.daily_liquid), Float),
+                    type_coerce(func.sum(OilWellDatas.daily_oil), Float),
+                    func.count(OilWellDatas.id))
+             .join(Well, Well.id == OilWellDatas.well_id)
+             .join(MeterRoom, MeterRoom.id == Well.room_id)
+             .where(OilWellDatas.create_time == day,
+                    or_(_is_filled(OilWellDatas.daily_liquid), _is_filled(OilWellDatas.daily_oil)))
+             .group_by(MeterRoom.team_id))
+    if team_ids is not None:
+        query = query.where(MeterRoom.team_id.in_(list(team_ids)))
+    with DBSession() as db:
+        rows = db.execute(query).all()
+    return {team_id: {"daily_liquid": float(liquid or 0), "daily_oil": float(oil or 0), "wells": wells}
+            for team_id, liquid, oil, wells in rows}
+
+
+# ---------- 单井历史日报分页 ----------
+REPORT_PAGE_SIZE = 200  # 管理页面每次加载的日报条数
+
+
+def page_well_reports(well_id: int, oil: bool, sort_key: Optional[str] = None, descending: bool = True,
+                      offset: int = 0, after: Optional[date] = None,
+                      limit: int = REPORT_PAGE_SIZE) -> List[Union[OilWellDatas, DailyReport]]:
+    """
+    分页查询一口井的油报或水报日报，排序在数据库中完成。
+    - 按日期排序（sort_key 为空或为日期字段）时使用 (well_id, 日期) 唯一索引，
+      after 为上一页最后一行的日期，从它之后续查，不受历史长度影响；
+    - 按其他字段排序时用 offset 翻页，同值按主键排序保证翻页稳定。
+    """
+    if oil:
+        model, date_column, pk = OilWellDatas, OilWellDatas.create_time, OilWellDatas.id
+    else:
+        model, date_column, pk = DailyReport, DailyReport.report_date, DailyReport.report_id
+    if sort_key is not None and sort_key not in model.__table__.columns:
+        raise ValueError(f"不支持的排序字段: {sort_key}")
+
+    with DBSession() as db:
+        query = db.query(model).filter(model.well_id == well_id)
+        if sort_key is None or sort_key == date_column.key:
+            if after is not None:
+                query = query.filter(date_column < after if descending else date_column > after)
+            query = query.order_by(date_column.desc() if descending else date_column.asc())
+        else:
+            column = getattr(model, sort_key)
+            if descending:
+                query = query.order_by(column.desc(), pk.desc())
+            else:
+                query = query.order_by(column.asc(), pk.asc())
+            query = query.offset(offset)
+        return query.limit(limit).all()
+
+
+def _find_latest_before(model, date_column, well_ids, before: date, *conditions) -> Dict:
+    """
+    每口井在 before 之前（不含）最近一天的日报，返回 {well_id: 日报}。
+    先按 (well_id, 日期) 索引分组求最大日期，再连接取回整行，整个查询只执行一次。
+    """
+    well_ids = list(set(well_ids))
+    if not well_ids:
+        return {}
+
+    with DBSession() as db:
+        latest = (db.query(model.well_id.label("well_id"), func.max(date_column).label("latest"))
+                    .filter(model.well_id.in_(well_ids), date_column < before, *conditions)
+                    .group_by(model.well_id)
+                    .subquery())
+        rows = (db.query(model)
+                  .join(latest, and_(model.well_id == latest.c.well_id, date_column == latest.c.latest))
+                  .all())
+    return {row.well_id: row for row in rows}
+
+
+def find_latest_daily_reports(well_ids: Iterable[int], before: date) -> Dict[int, DailyReport]:
+    """批量查询每口井 before 之前最近一次的水报日报，返回 {well_id: DailyReport}"""
+    return _find_latest_before(DailyReport, DailyReport.report_date, well_ids, before)
+
+
+def _is_filled(column):
+    """
+    列有填写内容的条件。数值列迁移完成前仍是 VARCHAR，旧数据中有空串；
+    迁移后是 DECIMAL，不能与空串比较（0 会被当作空串）。按 TRIM 后的长度判断，两种列都适用。
+    """
+    if isinstance(column.type, NumericText):
+        return func.length(func.trim(column)) > 0
+    return and_(column.isnot(None), column != "")
+
+
+def find_latest_oil_reports(well_ids: Iterable[int], before: date) -> Dict[int, OilWellDatas]:
+    """
+    批量查询每口井 before 之前最近一次填写过的油报日报，返回 {well_id: OilWellDatas}。
+    跨日预置的空日报不算填写过，跳过后取更早的数据。
+    """
+    filled = or_(*(_is_filled(getattr(OilWellDatas, name))
+                   for name in _OIL_REPORT_EMPTY_FIELDS if name != "total_bucket_sign"))
+    return _find_latest_before(OilWellDatas, OilWellDatas.create_time, well_ids, before, filled)
+
+def backfill_oil_report_well_ids() -> int:
+    """
+    旧版上报写入的油报日报没有 well_id，按平台编号和井号补全，返回补全的条数。
+    只处理 well_id 为空且能匹配到井的行，全部补全后再调用不会更新任何行。
+    """
+    well_id = (select(Well.id)
+               .join(Platformer, Well.platform_id == Platformer.id)
+               .where(Platformer.platformer_id == OilWellDatas.platform,
+                      Well.well_code == OilWellDatas.well_code)
+               .limit(1)
+               .scalar_subquery())
+    with DBSession() as db:
+        result = db.execute(update(OilWellDatas)
+                            .where(OilWellDatas.well_id.is_(None), well_id.isnot(None))
+                            .values(well_id=well_id)
+                            .execution_options(synchronize_session=False))
+        count = result.rowcount
+    if count:
+        # 补全的日报属于哪些井未知，整体清空管理页面缓存
+        node_cache.clear()
+    return count
+
+def _profile_values(values: Dict) -> Dict[str, str]:
+    """静态资料字段字典，泵径按数值列的写法规范化，便于比较是否变化"""
+    result = {}
+    for name in WELL_PROFILE_FIELDS:
+        value = values.get(name)
+        value = "" if value is None else str(value).strip()
+        # 无法换算的旧数据原样保留，保存时由 NumericText 报错
+        if name == "pump_diameter" and check_number(value) is None:
+            value = decimal_text(to_decimal(value))
+        result[name] = value
+    return result
+
+
+# ---------- 井静态资料表 ----------
+_well_profile_ready = False  # 本进程已确认 well_profile 表存在
+
+
+def ensure_well_profile_table() -> int:
+    """
+    well_profile 表不存在时建表；表为空时用每口井最近一次填写了静态资料的油报日报生成初始记录，
+    否则首次加载时各井的泵径、区块等会变为空白。每个进程只检查一次，返回初始化的井数。
+    """
+    global _well_profile_ready
+    if _well_profile_ready:
+        return 0
+    # 初始记录按 well_id 取旧日报，先补全旧版上报未写 well_id 的日报
+    backfill_oil_report_well_ids()
+    with DBSession() as db:
+        # 建表语句会隐式提交，放在写入之前执行
+        WellProfile.__table__.create(db.connection(), checkfirst=True)
+        seeded = 0
+        if db.query(WellProfile.id).first() is None:
+            seeded = _seed_well_profiles(db)
+    _well_profile_ready = True
+    return seeded
+
+
+def _seed_well_profiles(db: Session) -> int:
+    """每口井取最近一条填写过静态资料的油报日报，自该日报日期起生效"""
+    filled = or_(*(_is_filled(getattr(OilWellDatas, name)) for name in WELL_PROFILE_FIELDS))
+    latest = (db.query(OilWellDatas.well_id.label("well_id"),
+                       func.max(OilWellDatas.create_time).label("latest"))
+                .filter(OilWellDatas.well_id.isnot(None), filled)
+                .group_by(OilWellDatas.well_id)
+                .subquery())
+    rows = (db.query(OilWellDatas.well_id, OilWellDatas.create_time,
+                     *(getattr(OilWellDatas, name) for name in WELL_PROFILE_FIELDS))
+              .join(latest, and_(OilWellDatas.well_id == latest.c.well_id,
+                                 OilWellDatas.create_time == latest.c.latest))
+              .all())
+    values = []
+    for row in rows:
+        profile = _profile_values(row._mapping)
+        # 旧文本列中无法换算的泵径迁移后也会变为空值，这里直接置空，避免整批写入失败
+        if check_number(profile["pump_diameter"]):
+            profile["pump_diameter"] = ""
+        values.append(dict(profile, well_id=row.well_id, effective_date=row.create_time))
+    if not values:
+        return 0
+    # 多个客户端同时初始化时，已有的记录跳过（依赖 uk_well_profile_date）
+    stmt = insert(WellProfile)
+    if db.bind.dialect.name == "mysql":
+        stmt = stmt.prefix_with("IGNORE")
+    db.execute(stmt, values)
+    return len(values)
+
+
+def find_well_profiles(well_ids: Iterable[int], day: date) -> Dict[int, Dict[str, str]]:
+    """批量查询每口井在 day 当天生效的静态资料，返回 {well_id: {字段: 值}}"""
+    ensure_well_profile_table()
+    rows = _find_latest_before(WellProfile, WellProfile.effective_date, well_ids, day + timedelta(days=1))
+    return {well_id: _profile_values(row.to_dict()) for well_id, row in rows.items()}
+
+
+def save_well_profiles(profiles: Dict[int, Dict], day: date) -> int:
+    """
+    保存井静态资料 {well_id: {字段: 值}}。与当前生效的资料相同时不写入；
+    不同时新增一条自 day 起生效的记录，同一天内再次修改则覆盖当天的记录。返回写入的井数。
+    """
+    current = find_well_profiles(profiles, day)  # 同时确保 well_profile 表存在
+    empty = dict.fromkeys(WELL_PROFILE_FIELDS, "")
+    changed = {}
+    for well_id, values in profiles.items():
+        merged = dict(current.get(well_id, empty))
+        merged.update(_profile_values(dict(merged, **values)))
+        if merged != current.get(well_id, empty):
+            changed[well_id] = merged
+    if not changed:
+        return 0
+
+    with DBSession() as db:
+        today_rows = {row.well_id: row for row in db.query(WellProfile)
+                      .filter(WellProfile.well_id.in_(list(changed)), WellProfile.effective_date == day)}
+        for well_id, values in changed.items():
+            row = today_rows.get(well_id)
+            if row is None:
+                db.add(WellProfile(well_id=well_id, effective_date=day, **values))
+            else:
+                for name, value in values.items():
+                    setattr(row, name, value)
+    return len(changed)
+
 def find_by_sequence(seq: List[Union[int, str, date]]) -> Optional[HierarchyObj]:
     """
     通过一个序列查找层级对象或日报记录，支持新结构：
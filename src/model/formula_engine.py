@@ -0,0 +1,281 @@
+import ast
+import hashlib
+import math
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class FormulaError(ValueError):
+    """公式无法解析或包含不允许的语法"""
+
+
+# 公式中允许出现的语法节点：数字、变量、括号和四则运算
+_ALLOWED_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.Constant, ast.Name, ast.Load,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow,
+    ast.UAdd, ast.USub,
+)
+
+
+class CompiledFormula:
+    """编译后的单条公式：变量按出现顺序作为参数传入 func"""
+    __slots__ = ("source", "names", "func")
+
+    def __init__(self, source: str, names: Tuple[str, ...], func):
+        self.source = source
+        self.names = names
+        self.func = func
+
+
+# 公式哈希 -> 编译结果，同一表达式在整个进程内只编译一次
+_compiled_cache: Dict[str, CompiledFormula] = {}
+
+
+def compile_formula(source: str) -> CompiledFormula:
+    """解析、校验并编译公式表达式，失败时抛出 FormulaError"""
+    key = hashlib.md5(source.encode("utf-8")).hexdigest()
+    cached = _compiled_cache.get(key)
+    if cached is not None:
+        return cached
+
+    try:
+        tree = ast.parse(source.strip(), mode="eval")
+    except SyntaxError as e:
+        raise FormulaError(f"公式语法错误: {source} ({e.msg})") from None
+
+    names: List[str] = []
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise FormulaError(f"公式包含不支持的语法 {type(node).__name__}: {source}")
+        if isinstance(node, ast.Constant) and not isinstance(node.value, (int, float)):
+            raise FormulaError(f"公式只允许数字常量: {source}")
+        if isinstance(node, ast.Name) and node.id not in names:
+            names.append(node.id)
+
+    # 编译成以变量为参数的 lambda，求值时不再经过 eval
+    code = compile(f"lambda {', '.join(names)}: ({source.strip()})", f"<formula {key[:8]}>", "eval")
+    formula = CompiledFormula(source, tuple(names), eval(code, {"__builtins__": {}}))
+    _compiled_cache[key] = formula
+    return formula
+
+
+def to_number(value):
+    """把报表字段转换为公式输入：空值 -> None，数字 -> float，其他保持原样"""
+    if value is None:
+        return None
+    text = str(value).strip()
+    if not text:
+        return None
+    try:
+        return float(text)
+    except ValueError:
+        return value
+
+
+def to_float(value) -> float:
+    """批量计算用：空值或非数字 -> NaN"""
+    if value is None:
+        return np.nan
+    text = str(value).strip()
+    if not text:
+        return np.nan
+    try:
+        return float(text)
+    except ValueError:
+        return np.nan
+
+
+def report_number(report, name) -> float:
+    """读取报表字段的数值；报表缓存了解析结果（ReportData.number）时直接使用"""
+    number = getattr(report, "number", None)
+    if number is not None:
+        return number(name)
+    return to_float(getattr(report, name, None))
+
+
+def format_result(result) -> str:
+    """与原先一致：数值保留两位小数后转字符串；无穷大和 NaN 与向量化计算一样返回空串"""
+    if isinstance(result, (int, float)):
+        return str(round(result, 2)) if math.isfinite(result) else ""
+    return str(result)
+
+
+class FormulaEngine:
+    """
+    公式引擎：加载时把每条公式编译一次，计算时按紧凑的值向量求值。
+    值向量只包含公式用到的字段，每个字段在向量中有固定下标。
+    公式按拓扑顺序计算，中间字段算出后写回向量，下游公式直接复用。
+    """
+
+    def __init__(self):
+        self.slot_index: Dict[str, int] = {}  # 字段名 -> 值向量下标
+        self.targets: List[str] = []  # 全部公式目标字段（含编译失败的），按计算顺序排列
+        self.errors: Dict[str, str] = {}  # 编译失败的字段 -> 错误信息
+        # 目标字段 -> (编译结果, 参数下标, 依赖下标)
+        self._bound: Dict[str, Tuple[CompiledFormula, Tuple[int, ...], Tuple[int, ...]]] = {}
+        # 反向依赖：字段 -> 直接引用该字段的公式目标
+        self._dependents: Dict[str, List[str]] = {}
+
+    def load(self, field_formula_map: Dict[str, str], field_deps_map: Dict[str, Iterable[str]],
+             order: Optional[Sequence[str]] = None):
+        """编译全部公式；语法错误在此处集中暴露，而不是每行计算时报错"""
+        self.slot_index.clear()
+        self.targets = list(order) if order is not None else list(field_formula_map)
+        self.errors.clear()
+        self._bound.clear()
+        self._dependents.clear()
+
+        for target, expr in field_formula_map.items():
+            try:
+                formula = compile_formula(expr)
+            except FormulaError as e:
+                self.errors[target] = str(e)
+                continue
+            slots = tuple(self._slot(name) for name in formula.names)
+            dep_slots = tuple(self._slot(dep) for dep in field_deps_map.get(target, ()))
+            self._bound[target] = (formula, slots, dep_slots)
+            for name in set(formula.names).union(field_deps_map.get(target, ())):
+                self._dependents.setdefault(name, []).append(target)
+
+    def _slot(self, name: str) -> int:
+        if name not in self.slot_index:
+            self.slot_index[name] = len(self.slot_index)
+        return self.slot_index[name]
+
+    def dependents_of(self, fields: Iterable[str]) -> List[str]:
+        """返回直接或间接依赖这些字段的公式目标，按计算顺序排列"""
+        pending = list(fields)
+        affected = set()
+        while pending:
+            for target in self._dependents.get(pending.pop(), ()):
+                if target not in affected:
+                    affected.add(target)
+                    pending.append(target)
+        return [target for target in self.targets if target in affected]
+
+    def with_upstream(self, targets: Iterable[str]) -> List[str]:
+        """返回这些公式及其引用的上游公式，按计算顺序排列"""
+        needed = set()
+        pending = list(targets)
+        while pending:
+            target = pending.pop()
+            if target in needed or not self.has(target):
+                continue
+            needed.add(target)
+            bound = self._bound.get(target)
+            if bound is not None:
+                pending.extend(bound[0].names)
+        return [target for target in self.targets if target in needed]
+
+    def has(self, target: str) -> bool:
+        return target in self._bound or target in self.errors
+
+    def value_vector(self, report) -> list:
+        """从报表对象中只取公式用到的字段，构造值向量"""
+        values = []
+        for name in self.slot_index:
+            value = report_number(report, name)
+            if value != value:
+                # 空值或非数字文本，按原规则区分 None 和原始文本
+                value = to_number(getattr(report, name, None))
+            values.append(value)
+        return values
+
+    def assign(self, values: list, name: str, value) -> None:
+        """把已算出的结果写回值向量，供后续公式引用"""
+        slot = self.slot_index.get(name)
+        if slot is not None:
+            values[slot] = to_number(value)
+
+    def evaluate(self, target: str, values: list, zero_as_empty: bool = False) -> str:
+        """计算单个字段；依赖为空、公式无效或计算出错时返回空字符串"""
+        result = self._compute(target, values, zero_as_empty)
+        slot = self.slot_index.get(target)
+        if slot is not None:
+            values[slot] = result  # 保留未取整的结果，供下游公式引用
+        return "" if result is None else format_result(result)
+
+    def _compute(self, target: str, values: list, zero_as_empty: bool):
+        bound = self._bound.get(target)
+        if bound is None:
+            return None
+        formula, slots, dep_slots = bound
+        if zero_as_empty:
+            if any(not values[i] for i in dep_slots):
+                return None
+        elif any(values[i] is None for i in dep_slots):
+            return None
+        try:
+            return formula.func(*[values[i] for i in slots])
+        except Exception as e:
+            print(f"公式计算失败 [{target}]: {e}")
+            return None
+
+    # ---------- 批量（列式）计算 ----------
+    def value_columns(self, reports: Sequence) -> List[np.ndarray]:
+        """按字段把所有报表的值组织成列，空值记为 NaN"""
+        return [
+            np.array([report_number(r, name) for r in reports], dtype=float)
+            for name in self.slot_index
+        ]
+
+    def assign_column(self, columns: List[np.ndarray], name: str, values: Sequence[str]) -> None:
+        """把一列已算出的结果写回，供后续公式引用"""
+        slot = self.slot_index.get(name)
+        if slot is not None:
+            columns[slot] = np.array([to_float(v) for v in values], dtype=float)
+
+    def evaluate_columns(self, target: str, columns: List[np.ndarray],
+                         rows: Optional[np.ndarray] = None, zero_as_empty: bool = False) -> List[str]:
+        """
+        对整列求值，返回每行的结果字符串。
+        与 evaluate 规则一致：依赖为空（或 zero_as_empty 时为0）、计算出错的行结果为空。
+        """
+        size = len(columns[0]) if columns else 0
+        if rows is not None:
+            size = len(rows)
+        bound = self._bound.get(target)
+        if bound is None:
+            self._store_column(target, columns, rows, np.full(size, np.nan))
+            return [""] * size
+        formula, slots, dep_slots = bound
+
+        def column(i):
+            return columns[i] if rows is None else columns[i][rows]
+
+        empty = np.zeros(size, dtype=bool)
+        for i in dep_slots:
+            dep = column(i)
+            empty |= np.isnan(dep)
+            if zero_as_empty:
+                empty |= dep == 0
+
+        try:
+            with np.errstate(all="ignore"):
+                result = formula.func(*[column(i) for i in slots])
+        except Exception as e:
+            print(f"公式计算失败 [{target}]: {e}")
+            self._store_column(target, columns, rows, np.full(size, np.nan))
+            return [""] * size
+
+        if not isinstance(result, np.ndarray):
+            # 公式不含变量时结果为标量，直接按单值格式化
+            self._store_column(target, columns, rows, np.where(empty, np.nan, to_float(result)))
+            text = format_result(result)
+            return ["" if empty[i] else text for i in range(size)]
+
+        invalid = empty | ~np.isfinite(result)
+        self._store_column(target, columns, rows, np.where(invalid, np.nan, result))
+        return ["" if invalid[i] else str(round(float(result[i]), 2)) for i in range(size)]
+
+    def _store_column(self, target: str, columns: List[np.ndarray],
+                      rows: Optional[np.ndarray], result: np.ndarray) -> None:
+        """把未取整的结果写回对应列，供下游公式引用"""
+        slot = self.slot_index.get(target)
+        if slot is None:
+            return
+        if rows is None:
+            columns[slot] = result
+        else:
+            columns[slot][rows] = result
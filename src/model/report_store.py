@@ -0,0 +1,98 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class ReportStore:
+    """
+    当天报表集合：按加入顺序保存报表，并维护按ID、按平台、按(平台, 井号)的索引。
+    表格的行顺序（按平台分组排序）和合并单元格布局在报表增删后才重新计算。
+    """
+
+    def __init__(self, reports: Iterable = ()):
+        self._reports: List = []
+        self._by_id: Dict[str, object] = {}
+        self._by_platform: Dict[str, List] = {}
+        self._by_well: Dict[Tuple[str, str], object] = {}
+        self._layout = None  # (行顺序, {平台: (起始行, 行数)}, {报表ID: 行号})
+        self.extend(reports)
+
+    def __iter__(self):
+        return iter(self._reports)
+
+    def __len__(self):
+        return len(self._reports)
+
+    def __contains__(self, report):
+        return getattr(report, "id", None) in self._by_id
+
+    # ---------- 修改 ----------
+    def add(self, report) -> None:
+        """加入报表；ID已存在时替换原报表"""
+        old = self._by_id.get(report.id)
+        if old is not None:
+            self.remove(old)
+        platform = self._platform(report)
+        self._reports.append(report)
+        self._by_id[report.id] = report
+        self._by_platform.setdefault(platform, []).append(report)
+        self._by_well[(platform, report.well_code)] = report
+        self._layout = None
+
+    def extend(self, reports: Iterable) -> None:
+        for report in reports:
+            self.add(report)
+
+    def remove(self, report) -> None:
+        report = self._by_id.pop(report.id, None)
+        if report is None:
+            return
+        platform = self._platform(report)
+        self._reports.remove(report)
+        group = self._by_platform[platform]
+        group.remove(report)
+        if not group:
+            del self._by_platform[platform]
+        if self._by_well.get((platform, report.well_code)) is report:
+            del self._by_well[(platform, report.well_code)]
+        self._layout = None
+
+    def clear(self) -> None:
+        self._reports = []
+        self._by_id = {}
+        self._by_platform = {}
+        self._by_well = {}
+        self._layout = None
+
+    # ---------- 查询 ----------
+    def get(self, report_id) -> Optional[object]:
+        return self._by_id.get(report_id)
+
+    def find(self, platform, well_code) -> Optional[object]:
+        return self._by_well.get((platform or "", well_code))
+
+    def by_platform(self, platform) -> List:
+        """同平台的全部报表（按加入顺序）"""
+        return list(self._by_platform.get(platform or "", ()))
+
+    def shared_bucket_group(self, platform) -> List:
+        """同平台中参与合量斗数（是否合量斗数为“是”）的报表"""
+        return [r for r in self._by_platform.get(platform or "", ()) if r.total_bucket_sign == "是"]
+
+    def layout(self):
+        """返回 (表格行顺序的报表列表, {平台: (起始行, 行数)}, {报表ID: 行号})"""
+        if self._layout is None:
+            rows = []
+            spans = {}
+            for platform in sorted(self._by_platform):
+                group = self._by_platform[platform]
+                spans[platform] = (len(rows), len(group))
+                rows.extend(group)
+            self._layout = (rows, spans, {report.id: row for row, report in enumerate(rows)})
+        return self._layout
+
+    def row_of(self, report_id) -> int:
+        """报表在表格中的行号，不存在时返回 -1"""
+        return self.layout()[2].get(report_id, -1)
+
+    @staticmethod
+    def _platform(report) -> str:
+        return getattr(report, "platform", "") or ""
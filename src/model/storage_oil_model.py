@@ -1,6 +1,8 @@
 import uuid
+from array import array
 from dataclasses import dataclass
 from datetime import date
+from math import nan
 from typing import Dict
 
 
@@ -282,8 +284,87 @@ class OilWellModel:
         )
 
 
+# 以文本保存、同时缓存解析后数值的字段（公式可能用到的数值输入和全部计算结果）
+NUMERIC_FIELDS = (
+    # 输入数据（与OilWellModel对应）
+    "oil_pressure",  # 油压
+    "casing_pressure",  # 套压
+    "back_pressure",  # 回压
+    "prod_hours",  # 生产时间
+    "a2_stroke",  # A2冲程
+    "a2_frequency",  # A2冲次
+    "work_stroke",  # 功图冲次
+    "effective_stroke",  # 有效排液冲程
+    "fill_coeff_test",  # 充满系数
+    "lab_water_cut",  # 化验含水
+    "reported_water",  # 上报含水
+    "fill_coeff_liquid",  # 充满系数液量
+    "total_bucket",  # 合量斗数
+    "press_data",  # 憋压数据
+    "pump_diameter",  # 泵径
+    "well_times",  # 井次
+
+    # 公式计算结果（与OilWellModel对应）
+    "liquid_per_bucket",  # 液量/斗数
+    "sum_value",  # 合计值
+    "liquid1",  # 液量
+    "production_coeff",  # 生产系数
+    "a2_24h_liquid",  # A2 24h液量
+    "liquid2",  # 液量（资料员）
+    "oil_volume",  # 油量
+    "fluctuation_range",  # 波动范围
+    "shutdown_time",  # 停产时间
+    "theory_diff",  # 理论排量-液量差值
+    "theory_displacement",  # 理论排量
+    "k_value",  # K值
+    "daily_liquid",  # 日产液
+    "daily_oil",  # 日产油
+    "production_time",  # 时间
+    "total_oil",  # 产油
+)
+_NUMERIC_INDEX = {name: i for i, name in enumerate(NUMERIC_FIELDS)}
+
+# 只保存文本的字段
+TEXT_FIELDS = (
+    "id", "create_time", "platform", "well_code", "total_bucket_sign", "time_sign",
+    "last_tubing_time", "block", "transformer", "remark",
+)
+
+
+def parse_number(value) -> float:
+    """文本转浮点数：空值或非数字 -> NaN"""
+    if value is None:
+        return nan
+    try:
+        return float(str(value).strip() or "nan")
+    except ValueError:
+        return nan
+
+
+class _NumericText:
+    """数值字段描述符：读写原始文本，写入时同时把解析出的数值存入 _numbers"""
+    __slots__ = ("index",)
+
+    def __init__(self, index):
+        self.index = index
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        return obj._texts[self.index]
+
+    def __set__(self, obj, value):
+        obj._texts[self.index] = value
+        obj._numbers[self.index] = parse_number(value)
+
+
 class ReportData:
-    """完整报表数据结构（与模型字段一一对应）"""
+    """
+    完整报表数据结构（与模型字段一一对应）。
+    数值字段保留原始文本用于显示和保存，同时缓存解析后的浮点数，公式计算时不再逐次解析。
+    """
+    # __dict__ 仅在写入未声明的属性（如目标字段不在报表中的公式结果）时才会创建
+    __slots__ = TEXT_FIELDS + ("_texts", "_numbers", "__dict__")
 
     def __init__(self, platform, well_code):
         # 基础信息
@@ -294,91 +375,49 @@ class ReportData:
         self.well_code = well_code  # 井号
 
         self.total_bucket_sign = "是"  # 是否合量斗数，默认为"是"
-
-        # 输入数据（与OilWellModel对应）
-        self.oil_pressure = ""  # 油压
-        self.casing_pressure = ""  # 套压
-        self.back_pressure = ""  # 回压
         self.time_sign = ""  # 时间标记
-        self.prod_hours = ""  # 生产时间
-        self.a2_stroke = ""  # A2冲程
-        self.a2_frequency = ""  # A2冲次
-        self.work_stroke = ""  # 功图冲次
-        self.effective_stroke = ""  # 有效排液冲程
-        self.fill_coeff_test = ""  # 充满系数
-        self.lab_water_cut = ""  # 化验含水
-        self.reported_water = ""  # 上报含水
-        self.fill_coeff_liquid = ""  # 充满系数液量
         self.last_tubing_time = ""  # 上次动管柱时间
-        self.total_bucket = ""  # 合量斗数
-        self.press_data = ""  # 憋压数据
-        self.pump_diameter = ""  # 泵径
         self.block = ""  # 区块
         self.transformer = ""  # 变压器
         self.remark = ""  # 备注
-        self.well_times = ""  # 井次
-
-        # 公式计算结果（与OilWellModel对应）
-        self.liquid_per_bucket = ""  # 液量/斗数
-        self.sum_value = ""  # 合计值
-        self.liquid1 = ""  # 液量
-        self.production_coeff = ""  # 生产系数
-        self.a2_24h_liquid = ""  # A2 24h液量
-        self.liquid2 = ""  # 液量（资料员）
-        self.oil_volume = ""  # 油量
-        self.fluctuation_range = ""  # 波动范围
-        self.shutdown_time = ""  # 停产时间
-        self.theory_diff = ""  # 理论排量-液量差值
-        self.theory_displacement = ""  # 理论排量
-        self.k_value = ""  # K值
-        self.daily_liquid = ""  # 日产液
-        self.daily_oil = ""  # 日产油
-        self.production_time = ""  # 时间
-        self.total_oil = ""  # 产油
+
+        # 数值字段（输入数据和公式计算结果）统一初始化为空
+        self._texts = [""] * len(NUMERIC_FIELDS)
+        self._numbers = array("d", [nan]) * len(NUMERIC_FIELDS)
+
+    def number(self, name) -> float:
+        """返回字段的数值，空值或非数字为 NaN"""
+        index = _NUMERIC_INDEX.get(name)
+        if index is None:
+            return parse_number(getattr(self, name, None))
+        return self._numbers[index]
 
     def to_dict(self):
         """转换为字典用于表格展示和存储"""
-        return {
-            "id": self.id,
-            "create_time": self.create_time,
-            "platform": self.platform,
-            "well_code": self.well_code,
-            "oil_pressure": self.oil_pressure,
-            "casing_pressure": self.casing_pressure,
-            "back_pressure": self.back_pressure,
-            "time_sign": self.time_sign,
-            "prod_hours": self.prod_hours,
-            "a2_stroke": self.a2_stroke,
-            "a2_frequency": self.a2_frequency,
-            "work_stroke": self.work_stroke,
-            "effective_stroke": self.effective_stroke,
-            "fill_coeff_test": self.fill_coeff_test,
-            "lab_water_cut": self.lab_water_cut,
-            "reported_water": self.reported_water,
-            "fill_coeff_liquid": self.fill_coeff_liquid,
-            "last_tubing_time": self.last_tubing_time,
-            "total_bucket_sign": self.total_bucket_sign,
-            "total_bucket": self.total_bucket,
-            "press_data": self.press_data,
-            "pump_diameter": self.pump_diameter,
-            "block": self.block,
-            "transformer": self.transformer,
-            "remark": self.remark,
-            "well_times": self.well_times,
-            "liquid_per_bucket": self.liquid_per_bucket,
-            "sum_value": self.sum_value,
-            "liquid1": self.liquid1,
-            "production_coeff": self.production_coeff,
-            "a2_24h_liquid": self.a2_24h_liquid,
-            "liquid2": self.liquid2,
-            "oil_volume": self.oil_volume,
-            "fluctuation_range": self.fluctuation_range,
-            "shutdown_time": self.shutdown_time,
-            "theory_diff": self.theory_diff,
-            "theory_displacement": self.theory_displacement,
-            "k_value": self.k_value,
-            "daily_liquid": self.daily_liquid,
-            "daily_oil": self.daily_oil,
-            "production_time": self.production_time,
-            "total_oil": self.total_oil,
-        }
\ No newline at end of file
+        result = {name: getattr(self, name) for name in TEXT_FIELDS}
+        result.update(zip(NUMERIC_FIELDS, self._texts))
+        return result
+
+    @classmethod
+    def from_dict(cls, fields):
+        """由 to_dict 的结果（或旧版对象的属性字典）还原报表，忽略未知字段"""
+        report = cls(fields.get("platform", ""), fields.get("well_code", ""))
+        for name, value in fields.items():
+            if name in _NUMERIC_INDEX or name in TEXT_FIELDS:
+                setattr(report, name, value)
+        return report
+
+    def __getstate__(self):
+        return self.to_dict()
+
+    def __setstate__(self, state):
+        # 兼容旧版基于 __dict__ 的 pickle 数据
+        self.__init__(state.get("platform", ""), state.get("well_code", ""))
+        for name, value in state.items():
+            if name in _NUMERIC_INDEX or name in TEXT_FIELDS:
+                setattr(self, name, value)
+
+
+for _index, _name in enumerate(NUMERIC_FIELDS):
+    setattr(ReportData, _name, _NumericText(_index))
+del _index, _name
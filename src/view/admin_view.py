@@ -1,5 +1,7 @@
 import sys, warnings, pathlib,traceback
 
+from functools import partial
+
 from decimal import Decimal
 from datetime import date, datetime
 
@@ -11,7 +13,7 @@ from PyQt5.QtWidgets import (
     QTreeWidgetItem, QFileDialog, QHBoxLayout,QLabel, QListWidget, QPushButton
 )
 
-from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QDate, QMimeData
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QPersistentModelIndex, QDate, QMimeData
 from PyQt5.QtGui import QStandardItemModel, QStandardItem
 from src.view.formula_view import FormulaImportDialog
 # 屏蔽 sip 警告
@@ -19,9 +21,16 @@ warnings.filterwarnings("ignore", category=DeprecationWarning)
 # 保证项目目录在导入路径
 sys.path.append(str(pathlib.Path(__file__).resolve().parent))
 from src.database.water_report_dao import (
-    list_root, list_children, delete_entity, upsert_daily_report, DBSession
+    list_root, list_children, delete_entity, upsert_daily_report, DBSession, load_hierarchy,
+    find_well_profiles, page_well_reports, count_subtree, import_hierarchy, sum_oil_by_team,
+    upsert_work_area, upsert_prod_team, upsert_meter_room, upsert_bao, upsert_platformer,
+    upsert_well, upsert_oil_report
 )
 from src.database.db_schema import DailyReport, SessionLocal, OilWellDatas, Well, Bao, Platformer
+from src.view.hierarchy_tree_model import HierarchyTreeModel, NODE_ROLE
+from src.view.report_page_model import ReportPageModel, OIL_REPORT_COLUMNS, WATER_REPORT_COLUMNS
+from src.core.node_cache import node_cache
+from src.core.db_worker import get_db_worker, PRIORITY_INTERACTIVE, PRIORITY_WRITE, PRIORITY_BULK
 import pandas as pd
 
 def fmt(value):
@@ -38,6 +47,254 @@ def fmt(value):
         return f"{value:.2f}"
     return str(value)
 
+
+# 级联删除影响预览中的名称
+_IMPACT_LABELS = (
+    ("team", "班组"), ("room", "计量间"), ("bao", "报"), ("platform", "平台"), ("well", "井"),
+    ("daily_report", "水报日报"), ("oil_report", "油报日报"),
+)
+
+
+def run_in_db(parent, func, *args, on_result=None, on_error=None, priority=PRIORITY_INTERACTIVE,
+              key=None, error_text="操作失败", **kwargs):
+    """
+    在数据库线程中执行 func，结果在界面线程交给 on_result；
+    未给出 on_error 时，LookupError 作为提示显示，其余异常显示为 error_text。
+    """
+    if on_error is None:
+        def on_error(e):
+            if isinstance(e, LookupError):
+                QMessageBox.warning(parent, "提示", str(e.args[0]) if e.args else str(e))
+            else:
+                QMessageBox.critical(parent, "错误", f"{error_text}: {str(e)}")
+    return get_db_worker().submit(func, *args, priority=priority, key=key,
+                                  on_result=on_result, on_error=on_error, **kwargs)
+
+
+def confirm_cascade_delete(parent, level, node_id, on_confirmed) -> None:
+    """先在数据库线程统计子树中将被删除的记录数，显示后再确认，确认后调用 on_confirmed()"""
+    def ask(impact):
+        lines = [f"{label}：{impact[key]}" for key, label in _IMPACT_LABELS if impact.get(key)]
+        text = "级联删除当前节点及其所有下级？"
+        if lines:
+            text += "\n\n将同时删除：\n" + "\n".join(lines)
+        if QMessageBox.question(parent, "确认", text, QMessageBox.Yes | QMessageBox.No) == QMessageBox.Yes:
+            on_confirmed()
+
+    def failed(e):
+        if isinstance(e, ValueError):
+            QMessageBox.warning(parent, "提示", "当前节点不能删除")
+        else:
+            QMessageBox.critical(parent, "错误", f"删除失败: {str(e)}")
+
+    run_in_db(parent, count_subtree, level, node_id, on_result=ask, on_error=failed)
+
+
+# 层级导入表格的表头 -> 字段；报类型、平台、井号、班组编号可为空
+_IMPORT_HEADERS = {
+    "作业区": "area", "班组": "team", "计量间": "room", "报类型": "bao_type",
+    "平台": "platform", "井号": "well_code", "班组编号": "team_no",
+}
+_LEVEL_NAMES = (
+    ("area", "作业区"), ("team", "班组"), ("room", "计量间"), ("bao", "报"), ("platform", "平台"), ("well", "井"),
+)
+
+
+def read_hierarchy_rows(path):
+    """读取层级导入表格（CSV / XLSX），返回 import_hierarchy 使用的行字典"""
+    if path.lower().endswith(".csv"):
+        df = pd.read_csv(path, dtype=str, keep_default_na=False, encoding="utf-8-sig")
+    else:
+        df = pd.read_excel(path, dtype=str, keep_default_na=False)
+    df.columns = [str(c).strip() for c in df.columns]
+    missing = [h for h in ("作业区", "班组", "计量间") if h not in df.columns]
+    if missing:
+        raise ValueError(f"表格缺少列：{'、'.join(missing)}")
+    columns = {h: k for h, k in _IMPORT_HEADERS.items() if h in df.columns}
+    rows = []
+    for number, record in enumerate(df[list(columns)].to_dict("records"), start=2):  # 第1行为表头
+        row = {key: record[header] for header, key in columns.items()}
+        row["line"] = number
+        rows.append(row)
+    return rows
+
+
+def import_summary(result, limit=20) -> str:
+    """层级导入预览 / 结果的文字说明"""
+    lines = []
+    for level, label in _LEVEL_NAMES:
+        created, existing = len(result.created[level]), result.existing[level]
+        if created or existing:
+            lines.append(f"{label}：新增 {created}，已存在 {existing}")
+    if result.errors:
+        lines.append(f"\n有 {len(result.errors)} 行无法导入：")
+        lines.extend(f"第 {line} 行：{reason}" for line, reason in result.errors[:limit])
+        if len(result.errors) > limit:
+            lines.append("……")
+    return "\n".join(lines).strip() or "表格中没有数据"
+
+
+def cached_report_page(well_id, oil, *page):
+    """分页查询单井日报；同一页已缓存时直接返回，日报写入后由 DAO 失效"""
+    key = ("well", well_id, "page", oil) + page
+    rows = node_cache.get(key)
+    if rows is None:
+        rows = page_well_reports(well_id, oil, *page)
+        node_cache.put(key, rows)
+    return rows
+
+
+# ---------- 以下函数在数据库线程中执行（run_in_db），只返回普通数据 ----------
+def is_oil_well(well_id: int) -> bool:
+    """井所属的报是否为油报"""
+    cached = node_cache.get(("well", well_id, "oil"))
+    if cached is not None:
+        return cached
+    with DBSession() as db:
+        well = db.get(Well, well_id)
+        if not well:
+            return False  # 默认按水井处理，防止 None 报错
+
+        if well.platform and well.platform.bao:
+            bao_typeid = getattr(well.platform.bao, "bao_typeid", "")
+        elif well.bao:
+            bao_typeid = getattr(well.bao, "bao_typeid", "")
+        else:
+            bao_typeid = ""
+
+    is_oil = "油报" in bao_typeid
+    node_cache.put(("well", well_id, "oil"), is_oil)
+    return is_oil
+
+
+def bao_type(bao_id: int) -> str:
+    with DBSession() as db:
+        bao = db.get(Bao, bao_id)
+        if not bao:
+            raise LookupError("找不到当前报信息")
+        return bao.bao_typeid or ""
+
+
+def well_info(well_id: int):
+    """返回 (报类型, 平台编号, 井号)，新增日报时据此选择对话框"""
+    with DBSession() as db:
+        well = db.get(Well, well_id)
+        if not well:
+            raise LookupError("找不到当前井信息")
+        bao = db.get(Bao, well.bao_id)
+        if not bao:
+            raise LookupError("找不到所属报信息")
+        platform_name = well.platform.platformer_id if well.platform else ""
+        return bao.bao_typeid or "", platform_name, well.well_code
+
+
+def node_table(level, obj_id, owner):
+    """
+    节点下一层的表格内容 (表头, 行)，按 (level, id, 页面类名) 缓存，写入后由 DAO 失效。
+    """
+    cache_key = (level, obj_id, owner)
+    cached = node_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    if level == "root":
+        headers = ["ID", "作业区名称"]
+        rows = [(c.area_id, c.area_name) for c in list_root()]
+    elif level == "bao":
+        # 判断是水报还是油报
+        typeid = bao_type(obj_id)
+        if "水报" in typeid:
+            headers = ["井ID", "井编号"]
+            rows = [(w.id, w.well_code) for w in list_children("bao", obj_id)]
+        elif "油报" in typeid:
+            headers = ["平台ID", "平台编号"]
+            rows = [(p.id, p.platformer_id) for p in list_children("bao", obj_id)]
+        else:
+            raise LookupError(f"未知类型的报：{typeid}")
+    elif level == "platform":
+        headers = ["井ID", "井编号"]
+        rows = [(w.id, w.well_code) for w in list_children("platform", obj_id)]
+    else:
+        # 其他节点类型（作业区、班组、房间）显示下一级子节点
+        map_func = {
+            "area": lambda x: (x.team_id, x.team_name),
+            "team": lambda x: (x.id, x.room_no),
+            "room": lambda x: (x.id, x.bao_typeid),
+        }
+        headers = ["ID", "名称/编号"]
+        rows = [map_func[level](c) for c in list_children(level, obj_id)]
+
+    node_cache.put(cache_key, (headers, rows))
+    return headers, rows
+
+
+def add_water_well(bao_id: int, well_code: str) -> int:
+    """水报下新建井，并写入当天的空日报"""
+    well_id = upsert_well(well_code=well_code, bao_type="水报", bao_id=bao_id)
+    rpt_dict = {
+        "report_date": date.today(),
+        "injection_mode": "",  # 可设默认值
+        "prod_hours": None,
+        "trunk_pressure": None,
+        "oil_pressure": None,
+        "casing_pressure": None,
+        "wellhead_pressure": None,
+        "plan_inject": None,
+        "actual_inject": None,
+        "remark": "",
+        "meter_stage1": None,
+        "meter_stage2": None,
+        "meter_stage3": None,
+    }
+    upsert_daily_report(well_id, rpt_dict)
+    return well_id
+
+
+def add_platform(bao_id: int, platform_no: str):
+    """油报下新建平台，返回 (平台ID, 平台编号)"""
+    platform_id = upsert_platformer(bao_id=bao_id, platform_name=platform_no)
+    # 查询平台名称，确保有值
+    with DBSession() as db:
+        platform = db.get(Platformer, platform_id)
+        platform_name = platform.platformer_id if platform else platform_no  # 兜底，防止查不到
+    return platform_id, platform_name
+
+
+def add_oil_well(platform_id: int, well_code: str) -> int:
+    """平台下新建油井，并写入当天的空日报"""
+    with DBSession() as db:
+        platform = db.get(Platformer, platform_id)
+        platform_name = platform.platformer_id if platform else ""
+    well_id = upsert_well(well_code=well_code, bao_type="油报", platform_id=platform_id)
+    rpt_dict = {
+        "create_time": date.today(),
+        "platform": platform_name,
+        "well_code": well_code,
+        "prod_hours": None,
+        "a2_stroke": None,
+        "a2_frequency": None,
+        "casing_pressure": None,
+        "oil_pressure": None,
+        "back_pressure": None,
+        "remark": "",
+    }
+    upsert_oil_report(well_id, rpt_dict)
+    return well_id
+
+
+def find_team_node(area_name, team_name):
+    """账号所在作业区、班组，返回 (作业区ID, 班组ID, 树的顶层节点)"""
+    area_id = team_id = None
+    top_nodes = []
+    for area in list_root():
+        if area.area_name == area_name:
+            area_id = area.area_id
+            for team in list_children("area", area_id):
+                if team.team_name == team_name:
+                    team_id = team.team_id
+                    top_nodes = [("team", team.team_id, team.team_name)]
+    return area_id, team_id, top_nodes
+
 #导出拖拽
 class DraggableTreeWidget(QTreeWidget):
     def __init__(self, *args, **kwargs):
@@ -200,57 +457,49 @@ class ExportDialog(QDialog):
         team_id = self.team_combo.currentData()
 
         try:
-            with DBSession() as db:  # 保持会话打开直到所有数据处理完成
-                # 加载房间
-                rooms = list_children("team", team_id)
-
-                for room in rooms:
-                    room_item = QTreeWidgetItem([room.room_no])
-                    room_item.setFlags(room_item.flags() | Qt.ItemIsDragEnabled | Qt.ItemIsDropEnabled)
-                    room_item.setData(0, Qt.UserRole, ("room", room.id))
-                    self.tree.addTopLevelItem(room_item)
-
-                    # 加载报
-                    baos = list_children("room", room.id)
-
-                    for bao in baos:
-                        # 强制加载类型字段，防止懒加载异常
-                        bao_typeid = bao.bao_typeid
-
-                        bao_item = QTreeWidgetItem([bao_typeid])
-                        bao_item.setFlags(bao_item.flags() | Qt.ItemIsDragEnabled | Qt.ItemIsDropEnabled)
-                        bao_item.setData(0, Qt.UserRole, ("bao", bao.id))
-                        bao_item.setCheckState(0, Qt.Unchecked)
-                        room_item.addChild(bao_item)
-
-                        # 获取包下的子节点（井或平台）
-                        children = list_children("bao", bao.id)
-
-                        if "水报" in bao_typeid:
-                            for well in children:
-                                # debug 打印
-                                well_item = QTreeWidgetItem([well.well_code])
+            if team_id is None:
+                return
+            # 一次加载该班组的层级快照
+            hierarchy = load_hierarchy("team", team_id)
+            team = hierarchy.get("team", team_id)
+            rooms = hierarchy.children(team, "room") if team else []
+
+            for room in rooms:
+                room_item = QTreeWidgetItem([room.name])
+                room_item.setFlags(room_item.flags() | Qt.ItemIsDragEnabled | Qt.ItemIsDropEnabled)
+                room_item.setData(0, Qt.UserRole, ("room", room.id))
+                self.tree.addTopLevelItem(room_item)
+
+                # 加载报
+                for bao in hierarchy.children(room, "bao"):
+                    bao_typeid = bao.name
+
+                    bao_item = QTreeWidgetItem([bao_typeid])
+                    bao_item.setFlags(bao_item.flags() | Qt.ItemIsDragEnabled | Qt.ItemIsDropEnabled)
+                    bao_item.setData(0, Qt.UserRole, ("bao", bao.id))
+                    bao_item.setCheckState(0, Qt.Unchecked)
+                    room_item.addChild(bao_item)
+
+                    if "水报" in bao_typeid:
+                        for well in hierarchy.children(bao, "well"):
+                            well_item = QTreeWidgetItem([well.name])
+                            well_item.setFlags(well_item.flags() | Qt.ItemIsDragEnabled)
+                            well_item.setData(0, Qt.UserRole, ("well", well.id))
+                            bao_item.addChild(well_item)
+
+                    elif "油报" in bao_typeid:
+                        for platform in hierarchy.children(bao, "platform"):
+                            platform_item = QTreeWidgetItem([platform.name])
+                            platform_item.setFlags(
+                                platform_item.flags() | Qt.ItemIsDragEnabled | Qt.ItemIsDropEnabled)
+                            platform_item.setData(0, Qt.UserRole, ("platformer", platform.id))
+                            bao_item.addChild(platform_item)
+
+                            for well in hierarchy.children(platform, "well"):
+                                well_item = QTreeWidgetItem([well.name])
                                 well_item.setFlags(well_item.flags() | Qt.ItemIsDragEnabled)
                                 well_item.setData(0, Qt.UserRole, ("well", well.id))
-                                bao_item.addChild(well_item)
-
-                        elif "油报" in bao_typeid:
-                            for platform in children:
-
-                                platform_item = QTreeWidgetItem([platform.platformer_id])
-                                platform_item.setFlags(
-                                    platform_item.flags() | Qt.ItemIsDragEnabled | Qt.ItemIsDropEnabled)
-                                platform_item.setData(0, Qt.UserRole, ("platformer", platform.id))
-                                bao_item.addChild(platform_item)
-
-                                # 这里尝试获取平台下的井
-                                platform_wells = list_children("platform", platform.id)
-
-                                for well in platform_wells:
-                                    well_item = QTreeWidgetItem([well.well_code])
-                                    well_item.setFlags(well_item.flags() | Qt.ItemIsDragEnabled)
-                                    well_item.setData(0, Qt.UserRole, ("well", well.id))
-                                    platform_item.addChild(well_item)
+                                platform_item.addChild(well_item)
 
             self.tree.expandAll()
 
@@ -405,6 +654,12 @@ class ExportDialog(QDialog):
                 QMessageBox.warning(self, "选择错误", "请勿同时勾选水报和油报，请先取消其中一种的勾选。")
                 return
 
+            # 井静态资料按报表日期一次查出；旧日报中仍保存着这些字段，没有资料时沿用日报中的值
+            profiles = {}
+            if has_oil:
+                profiles = find_well_profiles(
+                    [well_id for _, _, baos in order for _, _, wells in baos for _, well_id in wells], rpt_date)
+
             with SessionLocal() as db:
                 rooms = list_children("team", team_id)
 
@@ -454,6 +709,7 @@ class ExportDialog(QDialog):
                                 continue
 
                             if "油报" in bao_type:
+                                profile = profiles.get(well_obj.id, {})
                                 row = {
                                     "间": fmt(room_obj.room_no),
 
@@ -488,10 +744,10 @@ class ExportDialog(QDialog):
                                     "理论排量": fmt(rpt.theory_displacement),
                                     "k值": fmt(rpt.k_value),
                                     "充满系数": fmt(rpt.fill_coeff_test),
-                                    "上次动管柱时间": fmt(rpt.last_tubing_time),
-                                    "泵径": fmt(rpt.pump_diameter),
-                                    "区块": fmt(rpt.block),
-                                    "变压器": fmt(rpt.transformer),
+                                    "上次动管柱时间": fmt(profile.get("last_tubing_time") or rpt.last_tubing_time),
+                                    "泵径": fmt(profile.get("pump_diameter") or rpt.pump_diameter),
+                                    "区块": fmt(profile.get("block") or rpt.block),
+                                    "变压器": fmt(profile.get("transformer") or rpt.transformer),
                                     "日产液": fmt(rpt.daily_liquid),
                                     "日产油": fmt(rpt.daily_oil),
                                     "井次": fmt(rpt.well_times),
@@ -539,6 +795,14 @@ class ExportDialog(QDialog):
                     "井口压(MPa)", "计划注水(m³)", "实际注水(m³)", "备注", "计量阶段1", "计量阶段2", "计量阶段3"
                 ]
 
+            # 油报标题中附上全班当天的产量合计，由数据库按班组汇总
+            title = f"{team_txt}{rpt_date}"
+            if has_oil:
+                total = sum_oil_by_team(rpt_date, [team_id]).get(team_id)
+                if total:
+                    title += (f"  全班日产液 {total['daily_liquid']:.2f}  "
+                              f"日产油 {total['daily_oil']:.2f}（{total['wells']} 口井）")
+
             default_filename = f"{team_txt}_{rpt_date}_{'油报' if has_oil else '水报'}.xlsx"
             fname, _ = QFileDialog.getSaveFileName(
                 self, "保存为 Excel", default_filename, "Excel 文件 (*.xlsx)"
@@ -564,8 +828,7 @@ class ExportDialog(QDialog):
                     'align': 'center', 'valign': 'vcenter', 'bold': True,
                     'font_name': '宋体', 'font_size': 22,
                 })
-                worksheet.merge_range(0, 0, 0, len(EXPORT_COLUMNS) - 1,
-                                      f"{team_txt}{rpt_date}", title_fmt)
+                worksheet.merge_range(0, 0, 0, len(EXPORT_COLUMNS) - 1, title, title_fmt)
 
                 header_fmt = workbook.add_format({
                     'bold': True, 'align': 'center', 'valign': 'vcenter',
@@ -908,6 +1171,11 @@ class AdminPage(QWidget):
         self.toolbar.addAction(self.act_import_formula)
         self.act_import_formula.triggered.connect(self._on_import_formula)
 
+        # —— 批量导入层级 ——
+        self.act_import_hierarchy = QAction("导入层级", self)
+        self.toolbar.addAction(self.act_import_hierarchy)
+        self.act_import_hierarchy.triggered.connect(self._on_import_hierarchy)
+
         # 左树 + 右表
         self.tree = QTreeView()
         self.tree.setHeaderHidden(True)
@@ -930,7 +1198,6 @@ class AdminPage(QWidget):
 
         self._current_level = None
         self._current_id = None
-        self._daily_reports = []
 
         self._build_tree()
 
@@ -951,512 +1218,262 @@ class AdminPage(QWidget):
         dlg = ExportDialog(self)
         dlg.exec_()
 
+    # ---- 批量导入层级：先预览，确认后一次写入 ----
+    def _on_import_hierarchy(self):
+        fname, _ = QFileDialog.getOpenFileName(
+            self, "选择层级表格", "", "表格文件 (*.xlsx *.xls *.csv)"
+        )
+        if not fname:
+            return
+        try:
+            rows = read_hierarchy_rows(fname)
+        except Exception as e:
+            QMessageBox.critical(self, "错误", f"读取失败: {str(e)}")
+            return
+        run_in_db(self, import_hierarchy, rows, dry_run=True,
+                  on_result=partial(self._on_import_preview, rows), error_text="读取失败")
+
+    def _on_import_preview(self, rows, preview):
+        summary = import_summary(preview)
+        if preview.errors:
+            QMessageBox.warning(self, "无法导入", f"{summary}\n\n请修改表格后重新导入")
+            return
+        if not any(preview.created.values()):
+            QMessageBox.information(self, "提示", f"{summary}\n\n没有需要新增的记录")
+            return
+        if QMessageBox.question(
+                self, "确认导入", f"{summary}\n\n确认导入？", QMessageBox.Yes | QMessageBox.No
+        ) == QMessageBox.No:
+            return
+        run_in_db(self, import_hierarchy, rows, dry_run=False, priority=PRIORITY_BULK,
+                  on_result=self._on_imported, error_text="导入失败")
+
+    def _on_imported(self, result):
+        if not result.applied:
+            QMessageBox.warning(self, "无法导入", import_summary(result))
+            return
+        # 新节点分布在多个层级，重新按需加载整棵树
+        self._build_tree()
+        self._current_level = self._current_id = None
+        self.table.setModel(SimpleTableModel([], []))
+        QMessageBox.information(self, "完成", f"导入完成\n{import_summary(result)}")
+
     # ---- 构建树 ----
     def _build_tree(self):
-        model = QStandardItemModel()
-        root_item = model.invisibleRootItem()
+        # 打开页面只查询作业区，下级节点在展开时按需加载
+        model = HierarchyTreeModel("报表管理", ("root", None))
+        model.load_failed.connect(self._on_load_failed)
+        self.tree.setModel(model)
+        self.tree.expand(model.index(0, 0))
 
-        # —— 添加可见根节点标题 ——
-        it_root = QStandardItem("报表管理")
-        it_root.setEditable(False)
-        it_root.setData(("root", None), Qt.UserRole + 1)
-        root_item.appendRow(it_root)
+    def _on_load_failed(self, message):
+        QMessageBox.critical(self, "错误", f"加载失败: {message}")
 
-        # —— 构建新的树结构 ——
-        for area in list_root():
-            it_area = QStandardItem(f"区 | {area.area_name}")
-            it_area.setData(("area", area.area_id), Qt.UserRole + 1)
-            it_root.appendRow(it_area)
-
-            for team in list_children("area", area.area_id):
-                it_team = QStandardItem(f"班 | {team.team_name}")
-                it_team.setData(("team", team.team_id), Qt.UserRole + 1)
-                it_area.appendRow(it_team)
-
-                for room in list_children("team", team.team_id):
-                    it_room = QStandardItem(f"间 | {room.room_no}")
-                    it_room.setData(("room", room.id), Qt.UserRole + 1)
-                    it_team.appendRow(it_room)
-
-                    # 获取当前房间下的所有报
-                    for bao in list_children("room", room.id):
-                        it_bao = QStandardItem(f"报 | {bao.bao_typeid}")
-                        it_bao.setData(("bao", bao.id), Qt.UserRole + 1)
-                        it_room.appendRow(it_bao)
-
-                        # 根据报的类型决定子节点类型
-                        if "水报" in bao.bao_typeid:
-                            # 水报的子节点是井
-                            for well in list_children("bao", bao.id):
-                                it_well = QStandardItem(f"井 | {well.well_code}")
-                                it_well.setData(("well", well.id), Qt.UserRole + 1)
-                                it_bao.appendRow(it_well)
-                        elif "油报" in bao.bao_typeid:
-                            # 油报的子节点是平台 - 修改这里
-                            for platform in list_children("bao", bao.id):
-                                it_platform = QStandardItem(f"平台 | {platform.platformer_id}")
-                                # 修改这里，使用"platform"作为类型
-                                it_platform.setData(("platform", platform.id), Qt.UserRole + 1)
-                                it_bao.appendRow(it_platform)
-
-                                # 平台的子节点是井
-                                for well in list_children("platform", platform.id):  # 修改这里，使用"platform"
-                                    it_well = QStandardItem(f"井 | {well.well_code}")
-                                    it_well.setData(("well", well.id), Qt.UserRole + 1)
-                                    it_platform.appendRow(it_well)
+    # ---- 新增记录后在提交时的节点下插入子节点 ----
+    def _add_tree_node(self, level, node_id, name, index):
+        # index 为提交写入时的节点，写入期间节点被删除或树被重建时不再插入
+        if not index.isValid() or index.model() is not self.tree.model():
+            return
+        parent = QModelIndex(index)
+        self.tree.model().add_child(parent, level, node_id, name)
+        self.tree.expand(parent)
+
+    def _submit_add(self, index, level, name, message, func, *args, **kwargs):
+        """写入在数据库线程执行；name 为 None 时 func 返回 (ID, 名称)，否则返回 ID"""
+        run_in_db(self, func, *args, priority=PRIORITY_WRITE,
+                  on_result=partial(self._on_added, index, level, name, message), **kwargs)
+
+    def _on_added(self, index, level, name, message, result):
+        node_id, name = result if name is None else (result, name)
+        self._add_tree_node(level, node_id, name, index)
+        if message:
+            QMessageBox.information(self, "提示", message)
+        self._refresh_current()
+
+    def _refresh_current(self):
+        # 新节点已插入树中，只刷新当前节点的表格
+        if self.tree.currentIndex().isValid():
+            self._on_tree_clicked(self.tree.currentIndex())
 
-        self.tree.setModel(model)
-        self.tree.expandAll()
+    # ---- 显示分页日报表格 ----
+    def _show_reports(self, model):
+        model.load_failed.connect(self._on_load_failed)
+        self.table.setModel(model)
+        # 先设置排序标记再开启排序，避免开启时按第一列重新查询
+        order = Qt.DescendingOrder if model.descending else Qt.AscendingOrder
+        self.table.horizontalHeader().setSortIndicator(model.sort_column(), order)
+        self.table.setSortingEnabled(True)
+        self.table.resizeColumnsToContents()
 
-    # ---- 判断油井水井 ----
+    # ---- 判断油井水井（数据库线程中调用） ----
     def is_oil_well(self, well_id: int) -> bool:
-        with DBSession() as db:
-            well = db.get(Well, well_id)
-            if not well:
-                return False  # 默认按水井处理，防止 None 报错
-
-            if well.platform and well.platform.bao:
-                bao_typeid = getattr(well.platform.bao, "bao_typeid", "")
-            elif well.bao:
-                bao_typeid = getattr(well.bao, "bao_typeid", "")
-            else:
-                bao_typeid = ""
+        return is_oil_well(well_id)
 
-            return "油报" in bao_typeid
+    def _is_current(self, level, obj_id) -> bool:
+        return (self._current_level, self._current_id) == (level, obj_id)
 
     # ---- 树节点点击 ----
     def _on_tree_clicked(self, index):
-        level, obj_id = index.data(Qt.UserRole + 1)
+        level, obj_id = index.data(NODE_ROLE)
         self._current_level, self._current_id = level, obj_id
 
-        rows, headers = [], []
-
         if level is None:
             return
+        self.table.setSortingEnabled(False)  # 只有日报表格在数据库中排序
+
+        # 连续点击时只查询最后点击的节点
+        key = ("admin_node", id(self))
+        if level == "well":
+            run_in_db(self, is_oil_well, obj_id, key=key,
+                      on_result=partial(self._show_well_reports, obj_id),
+                      on_error=partial(self._on_node_failed, level, obj_id))
+            return
 
-        try:
-            if level == "well":
-                is_oil = self.is_oil_well(obj_id)  # 用新函数替代旧逻辑
-
-                reports = list_children("well", obj_id)
-                self._daily_reports = reports
-
-                if is_oil:
-                    print(f"当前处理油井日报，共有 {len(reports)} 条")
-
-                    headers = [
-                        "平台", "日期", "井号", "生产时间(h)", "A2冲程", "A2冲次",
-                        "套压(MPa)", "油压(MPa)", "回压(MPa)", "时间标记","合量斗数", "憋压(MPa)", "备注",
-                        "功图冲次", "有效排液冲程", "充满系数",
-                        "化验含水(%)", "上报含水(%)",
-                        "充满系数液量", "上次动管柱时间", "泵径", "区块", "变压器",
-                        "液量/斗数", "和", "液量1", "分产系数", "A2(24h)液量", "液量2", "油量", "波动范围",
-                        "停产时间", "理论排量-液量差", "理论排量", "K值",
-                        "日产液", "日产油", "井次", "时间", "产油(累计)"
-                    ]
-
-                    rows = [
-                        (
-                            fmt(r.platform),  # 平台
-                            fmt(r.create_time),  # 日期
-                            fmt(r.well_code),  # 井号
-                            fmt(r.prod_hours),  # 生产时间(h)
-                            fmt(r.a2_stroke),  # A2冲程
-                            fmt(r.a2_frequency),  # A2冲次
-                            fmt(r.casing_pressure),  # 套压(MPa)
-                            fmt(r.oil_pressure),  # 油压(MPa)
-                            fmt(r.back_pressure),  # 回压(MPa)
-                            fmt(r.time_sign),  # 时间标记
-                            fmt(r.total_bucket),  # 合量斗数
-                            fmt(r.press_data),  # 憋压(MPa) — 如果你这里用的是憋压，字段名称需确认
-                            fmt(r.remark),  # 备注
-
-                            fmt(r.work_stroke),  # 功图冲次 (对应work_stroke)
-                            fmt(r.effective_stroke),  # 有效排液冲程
-                            fmt(r.fill_coeff_test),  # 充满系数 (模型字段为 fill_coeff_test)
-
-                            fmt(r.lab_water_cut),  # 化验含水(%)
-                            fmt(r.reported_water),  # 上报含水(%)
-
-                            fmt(r.fill_coeff_liquid),  # 充满系数液量
-                            fmt(r.last_tubing_time),  # 上次动管柱时间
-                            fmt(r.pump_diameter),  # 泵径
-                            fmt(r.block),  # 区块
-                            fmt(r.transformer),  # 变压器
-
-                            fmt(r.liquid_per_bucket),  # 液量/斗数
-                            fmt(r.sum_value),  # 和
-                            fmt(r.liquid1),  # 液量1
-                            fmt(r.production_coeff),  # 分产系数
-                            fmt(r.a2_24h_liquid),  # A2(24h)液量
-                            fmt(r.liquid2),  # 液量2
-                            fmt(r.oil_volume),  # 油量
-                            fmt(r.fluctuation_range),  # 波动范围
-
-                            fmt(r.shutdown_time),  # 停产时间
-                            fmt(r.theory_diff),  # 理论排量-液量差
-                            fmt(r.theory_displacement),  # 理论排量
-                            fmt(r.k_value),  # K值
-
-                            fmt(r.daily_liquid),  # 日产液
-                            fmt(r.daily_oil),  # 日产油
-                            fmt(r.well_times),  # 井次
-                            fmt(r.production_time),  # 时间
-                            fmt(r.total_oil)  # 产油(累计)
-                        )
-                        for r in reports
-                    ]
-
-                else:
-                    print(f"当前处理水井日报，共有 {len(reports)} 条")
-
-                    headers = [
-                        "日期", "注水方式", "生产时长(h)",
-                        "干线压(MPa)", "油压(MPa)", "套压(MPa)", "井口压(MPa)",
-                        "计划注水(m³)", "实际注水(m³)", "备注",
-                        "计量阶段1", "计量阶段2", "计量阶段3"
-                    ]
-
-                    rows = [
-                        (
-                            fmt(r.report_date), fmt(r.injection_mode), fmt(r.prod_hours),
-                            fmt(r.trunk_pressure), fmt(r.oil_pressure), fmt(r.casing_pressure),
-                            fmt(r.wellhead_pressure), fmt(r.plan_inject), fmt(r.actual_inject),
-                            fmt(r.remark),
-                            fmt(r.meter_stage1), fmt(r.meter_stage2), fmt(r.meter_stage3)
-                        )
-                        for r in reports
-                    ]
-
-            elif level == "bao":
-                # 获取当前报节点所属的计量间（room）的 ID
-                index = self.tree.currentIndex()
-                item = self.tree.model().itemFromIndex(index)
-                parent_item = item.parent() if item else None
-                parent_data = parent_item.data(Qt.UserRole + 1) if parent_item else None
-                room_id = parent_data[1] if parent_data and parent_data[0] == "room" else None
-
-                # 查找该报对象
-                if room_id:
-                    bao_list = list_children("room", room_id)
-                    bao = next((b for b in bao_list if b.id == obj_id), None)
-                else:
-                    bao = next((b for b in list_children("bao", None) if b.id == obj_id), None)
-                if not bao:
-                    QMessageBox.warning(self, "提示", "找不到当前报信息")
-                    return
-                # 判断是水报还是油报
-                if "水报" in bao.bao_typeid:
-                    # 水报下的井
-                    wells = list_children("bao", obj_id)
-                    headers = ["井ID", "井编号"]
-                    if not wells:
-                        rows = []
-                    else:
-                        rows = [(w.id, w.well_code) for w in wells]
-                elif "油报" in bao.bao_typeid:
-                    # 油报下的平台
-                    platforms = list_children("bao", obj_id)
-                    headers = ["平台ID", "平台编号"]
-                    if not platforms:
-                        rows = []
-                    else:
-                        rows = [(p.id, p.platformer_id) for p in platforms]
-                else:
-                    QMessageBox.warning(self, "提示", f"未知类型的报：{bao.bao_typeid}")
-                    return
-                # 显示到表格中
-                self.table.setModel(SimpleTableModel(headers, rows))
-                self.table.resizeColumnsToContents()
-                self.table.setModel(SimpleTableModel(headers, rows))
-                self.table.resizeColumnsToContents()
-
-            elif level == "platform":
-                # 显示平台下的井
-                wells = list_children("platform", obj_id)
-
-                if not wells:
-                    headers = ["井ID", "井编号"]
-                    rows = []
-                else:
-                    headers = ["井ID", "井编号"]
-                    rows = [(w.id, w.well_code) for w in wells]
-            elif level == "root":
-                children = list_root()
-                headers = ["ID", "作业区名称"]
-                rows = [(c.area_id, c.area_name) for c in children]
-            else:
-                # 其他节点类型（作业区、班组、房间）显示下一级子节点
-                children = list_children(level, obj_id)
-
-                if not children:
-                    headers = ["ID", "名称/编号"]
-                    rows = []
-                else:
-                    map_func = {
-                        "area": lambda x: (x.team_id, x.team_name),
-                        "team": lambda x: (x.id, x.room_no),
-                        "room": lambda x: (x.id, x.bao_typeid),
-                    }
-
-                    headers = ["ID", "名称/编号"]
-                    rows = [map_func[level](c) for c in children]
-
-        except Exception as e:
-            QMessageBox.critical(self, "错误", f"处理{level}节点时出错: {str(e)}")
-            print(f"节点处理错误: {level}, {obj_id}, {str(e)}")
+        # 反复点击同一节点时使用缓存的表格内容
+        cached = node_cache.get((level, obj_id, type(self).__name__))
+        if cached is not None:
+            self._show_node_table(level, obj_id, cached)
             return
+        run_in_db(self, node_table, level, obj_id, type(self).__name__, key=key,
+                  on_result=partial(self._show_node_table, level, obj_id),
+                  on_error=partial(self._on_node_failed, level, obj_id))
 
-        # 显示数据到表格
-        self.table.setModel(SimpleTableModel(headers, rows))
-        self.table.resizeColumnsToContents()
+    def _show_well_reports(self, obj_id, is_oil):
+        if not self._is_current("well", obj_id):
+            return
+        # 只查询第一页，滚动到底部时再加载下一页
+        if is_oil:
+            model = ReportPageModel(OIL_REPORT_COLUMNS, partial(cached_report_page, obj_id, True),
+                                    "create_time", formatter=fmt)
+        else:
+            model = ReportPageModel(WATER_REPORT_COLUMNS, partial(cached_report_page, obj_id, False),
+                                    "report_date", formatter=fmt)
+        self._show_reports(model)
+
+    def _show_node_table(self, level, obj_id, table):
+        if not self._is_current(level, obj_id):
+            return
+        headers, rows = table
         self.table.setModel(SimpleTableModel(headers, rows))
         self.table.resizeColumnsToContents()
         # 添加调试信息
         print(f"加载{level}节点数据，共{len(rows)}条记录")
 
+    def _on_node_failed(self, level, obj_id, e):
+        print(f"节点处理错误: {level}, {obj_id}, {str(e)}")
+        if not self._is_current(level, obj_id):
+            return
+        if isinstance(e, LookupError):
+            QMessageBox.warning(self, "提示", str(e.args[0]) if e.args else str(e))
+        else:
+            QMessageBox.critical(self, "错误", f"处理{level}节点时出错: {str(e)}")
+
     # ---- 删除当前节点 ----
     def _delete_current(self):
         if not self._current_level:
             return
-
-        # 确认对话框
-        if QMessageBox.question(
-                self, "确认", "级联删除当前节点及其所有下级？",
-                QMessageBox.Yes | QMessageBox.No
-        ) == QMessageBox.No:
-            return
-
-        try:
-            # 根据当前节点类型调用不同的删除逻辑
-            if self._current_level == "bao":
-                # 报节点
-                delete_entity("bao", self._current_id)
-            elif self._current_level == "platformer":
-                # 平台节点
-                delete_entity("platformer", self._current_id)
-            else:
-                # 原有节点类型（作业区、注采班、计量间、井）
-                delete_entity(self._current_level, self._current_id)
-
-            QMessageBox.information(self, "完成", "已删除")
-        except Exception as e:
-            QMessageBox.critical(self, "错误", f"删除失败: {str(e)}")
-
-        # 刷新树和表格
-        self._build_tree()
-        self.table.setModel(SimpleTableModel([], []))
+        level, node_id = self._current_level, self._current_id
+        index = QPersistentModelIndex(self.tree.currentIndex())
+        # 确认对话框（附删除范围），确认后再删除
+        confirm_cascade_delete(self, level, node_id, partial(self._delete_node, index, level, node_id))
+
+    def _delete_node(self, index, level, node_id):
+        # 作业区、注采班、计量间、报、平台、井：连同下级整批删除
+        run_in_db(self, delete_entity, level, node_id, priority=PRIORITY_WRITE,
+                  on_result=partial(self._on_deleted, index, level, node_id), error_text="删除失败")
+
+    def _on_deleted(self, index, level, node_id, _):
+        # 只移除被删除的节点，不重建整棵树
+        if index.isValid() and index.model() is self.tree.model():
+            self.tree.model().remove_node(QModelIndex(index))
+        if self._is_current(level, node_id):
+            self._current_level = self._current_id = None
+            # 刷新表格
+            self.table.setModel(SimpleTableModel([], []))
+        QMessageBox.information(self, "完成", "已删除")
 
     #添加节点
     def _add_current(self):
         if not self._current_level:
             QMessageBox.warning(self, "错误", "请先选择一个节点")
             return
+        level, node_id = self._current_level, self._current_id
+        index = QPersistentModelIndex(self.tree.currentIndex())
+
+        if level == "root":
+            text, ok = QInputDialog.getText(self, "新建作业区", "请输入作业区名称:")
+            if ok and text:
+                area_name = text.strip()
+                self._submit_add(index, "area", area_name, f"作业区“{area_name}”创建成功",
+                                 upsert_work_area, area_name)
+
+        elif level == "area":
+            # 创建注采班
+            text, ok = QInputDialog.getText(self, "新建班组", "请输入班组名称:")
+            if ok and text:
+                team_name = text.strip()
+                team_no, ok2 = QInputDialog.getInt(self, "编号", "请输入班组编号:")
+                if ok2:
+                    self._submit_add(index, "team", team_name, None,
+                                     upsert_prod_team, node_id, team_no=team_no, team_name=team_name)
+
+        elif level == "team":
+            # 创建计量间
+            text, ok = QInputDialog.getText(self, "新建计量间", "请输入计量间号:")
+            if ok and text:
+                room_no = text.strip()
+                self._submit_add(index, "room", room_no, None, upsert_meter_room, node_id, room_no=room_no)
+
+        elif level == "room":
+            # 创建计量间下的报
+            items = ["水报", "油报"]
+            item, ok = QInputDialog.getItem(self, "选择报类型", "请选择报类型:", items, 0, False)
+            if ok and item:
+                self._submit_add(index, "bao", item, None, upsert_bao, node_id, bao_type=item)
+
+        elif level == "bao":
+            # 先查询当前报的类型，再弹出对应的输入框
+            run_in_db(self, bao_type, node_id, on_result=partial(self._add_under_bao, index, node_id))
+
+        elif level == "platform":
+            text, ok = QInputDialog.getText(self, "新建井", "请输入井编号:")
+            if ok and text:
+                well_code = text.strip()
+                self._submit_add(index, "well", well_code, "添加井成功", add_oil_well, node_id, well_code)
+
+        elif level == "well":
+            # 先查询所属报类型，再弹出不同对话框
+            run_in_db(self, well_info, node_id, on_result=partial(self._add_report, node_id))
+
+    def _add_under_bao(self, index, bao_id, typeid):
+        if "水报" in typeid:
+            text, ok = QInputDialog.getText(self, "新建井", "请输入井编号:")
+            if ok and text:
+                well_code = text.strip()
+                self._submit_add(index, "well", well_code, "添加井成功", add_water_well, bao_id, well_code)
+        elif "油报" in typeid:
+            text, ok = QInputDialog.getText(self, "新建平台", "请输入平台编号:")
+            if ok and text:
+                self._submit_add(index, "platform", None, None, add_platform, bao_id, text.strip())
+
+    def _add_report(self, well_id, info):
+        typeid, platform_name, well_code = info
+        if "水报" in typeid:
+            dlg, save = DailyReportDialog(self), upsert_daily_report
+        elif "油报" in typeid:
+            dlg, save = OilReportDialog(self, platform=platform_name, well_code=well_code), upsert_oil_report
+        else:
+            QMessageBox.warning(self, "错误", "无法判断报类型（非水报/油报）")
+            return
+        # 如果用户点击了确定，保存日报
+        if dlg.exec_() == QDialog.Accepted:
+            run_in_db(self, save, well_id, dlg.get_data(), priority=PRIORITY_WRITE,
+                      on_result=partial(self._on_report_saved, "日报添加成功"))
 
-        try:
-            if self._current_level == "root":
-                text, ok = QInputDialog.getText(self, "新建作业区", "请输入作业区名称:")
-                if ok and text:
-                    area_name = text.strip()
-                    from database.water_report_dao import upsert_work_area
-                    upsert_work_area(area_name)
-                    QMessageBox.information(self, "提示", f"作业区“{area_name}”创建成功")
-
-            elif self._current_level == "area":
-                # 创建注采班
-                text, ok = QInputDialog.getText(self, "新建班组", "请输入班组名称:")
-                if ok and text:
-                    team_name = text.strip()
-                    team_no, ok2 = QInputDialog.getInt(self, "编号", "请输入班组编号:")
-                    if ok2:
-                        from database.water_report_dao import upsert_prod_team
-                        upsert_prod_team(self._current_id, team_no=team_no, team_name=team_name)
-
-            elif self._current_level == "team":
-                # 创建计量间
-                text, ok = QInputDialog.getText(self, "新建计量间", "请输入计量间号:")
-                if ok and text:
-                    room_no = text.strip()
-                    from database.water_report_dao import upsert_meter_room
-                    upsert_meter_room(self._current_id, room_no=room_no)
-
-            elif self._current_level == "room":
-                # 创建计量间下的报
-                items = ["水报", "油报"]
-                item, ok = QInputDialog.getItem(self, "选择报类型", "请选择报类型:", items, 0, False)
-                if ok and item:
-                    from database.water_report_dao import upsert_bao
-                    # 确保使用bao_type参数
-                    upsert_bao(self._current_id, bao_type=item)
-
-            elif self._current_level == "bao":
-                from database.db_schema import Bao
-                # 获取当前报的类型信息
-                with DBSession() as db:
-                    current_bao = db.get(Bao, self._current_id)
-
-                if not current_bao:
-                    QMessageBox.warning(self, "错误", "找不到当前报信息")
-                    return
-
-                elif "水报" in current_bao.bao_typeid:
-                    text, ok = QInputDialog.getText(self, "新建井", "请输入井编号:")
-                    if ok and text:
-                        well_code = text.strip()
-                        from database.water_report_dao import upsert_well, upsert_daily_report
-                        from datetime import date
-                        try:
-                            well_id = upsert_well(
-                                well_code=well_code,
-                                bao_type="水报",
-                                bao_id=self._current_id
-                            )
-                            rpt_dict = {
-                                "report_date": date.today(),
-                                "injection_mode": "",  # 可设默认值
-                                "prod_hours": None,
-                                "trunk_pressure": None,
-                                "oil_pressure": None,
-                                "casing_pressure": None,
-                                "wellhead_pressure": None,
-                                "plan_inject": None,
-                                "actual_inject": None,
-                                "remark": "",
-                                "meter_stage1": None,
-                                "meter_stage2": None,
-                                "meter_stage3": None,
-                            }
-
-                            upsert_daily_report(well_id, rpt_dict)
-                            QMessageBox.information(self, "成功", f"添加井成功")
-                            self._on_tree_clicked(self.tree.currentIndex())
-                        except Exception as e:
-                            QMessageBox.warning(self, "失败", str(e))
-
-
-                elif "油报" in current_bao.bao_typeid:
-
-                    text, ok = QInputDialog.getText(self, "新建平台", "请输入平台编号:")
-                    if ok and text:
-                        platform_no = text.strip()
-                        from database.water_report_dao import upsert_platformer, upsert_well, upsert_oil_report
-                        from datetime import date
-                        try:
-                            platform_id = upsert_platformer(bao_id=self._current_id, platform_name=platform_no)
-
-                            # 查询平台名称，确保有值
-                            with DBSession() as db:
-                                platform = db.get(Platformer, platform_id)
-                                if platform:
-                                    platform_name = platform.platformer_id  # 或你想显示的字段
-                                else:
-                                    platform_name = platform_no  # 兜底，防止查不到
-
-                            # # 创建平台下的井
-                            # text, ok = QInputDialog.getText(self, "新建井", "请输入平台下井编号:")
-                            # if ok and text:
-                            #     well_code = text.strip()
-                            #     well_id = upsert_well(
-                            #         well_code=well_code,
-                            #         bao_type="油报",
-                            #         platform_id=platform_id
-                            #     )
-                            #
-                            #     rpt_dict = {
-                            #         "create_time": date.today(),
-                            #         "platform": platform_no,
-                            #         "well_code": well_code,
-                            #         "prod_hours": None,
-                            #         "a2_stroke": None,
-                            #         "a2_frequency": None,
-                            #         # 其他字段留空或补默认值
-                            #         "casing_pressure": None,
-                            #         "oil_pressure": None,
-                            #         "back_pressure": None,
-                            #         "remark": "",
-                            #     }
-                            #     upsert_oil_report(well_id, rpt_dict)
-                            #
-                            # self._on_tree_clicked(self.tree.currentIndex())
-                        except Exception as e:
-                            QMessageBox.warning(self, "失败", str(e))
-
-            elif self._current_level == "platform":
-                text, ok = QInputDialog.getText(self, "新建井", "请输入井编号:")
-                if ok and text:
-                    well_code = text.strip()
-                    from database.water_report_dao import upsert_well, upsert_oil_report
-                    from datetime import date
-                    try:
-                        # 查询平台名称
-                        with DBSession() as db:
-                            platform = db.get(Platformer, self._current_id)
-                            platform_name = platform.platformer_id if platform else ""
-                        well_id = upsert_well(
-                            well_code=well_code,
-                            bao_type="油报",
-                            platform_id=self._current_id
-                        )
-                        rpt_dict = {
-                            "create_time": date.today(),
-                            "platform": platform_name,
-                            "well_code": well_code,
-                            "prod_hours": None,
-                            "a2_stroke": None,
-                            "a2_frequency": None,
-                            "casing_pressure": None,
-                            "oil_pressure": None,
-                            "back_pressure": None,
-                            "remark": "",
-                        }
-                        upsert_oil_report(well_id, rpt_dict)
-                        QMessageBox.information(self, "成功", f"添加井成功")
-                        self._on_tree_clicked(self.tree.currentIndex())
-                    except Exception as e:
-                        QMessageBox.warning(self, "失败", str(e))
-
-            elif self._current_level == "well":
-                from database.db_schema import Well, Bao
-                with DBSession() as db:
-                    # 获取当前井对象
-                    well = db.get(Well, self._current_id)
-                    if not well:
-                        QMessageBox.warning(self, "错误", "找不到当前井信息")
-                        return
-                    # 获取所属报类型
-                    bao = db.get(Bao, well.bao_id)
-                    if not bao:
-                        QMessageBox.warning(self, "错误", "找不到所属报信息")
-                        return
-                    # 判断报类型：弹出不同对话框
-                    if "水报" in bao.bao_typeid:
-                        dlg = DailyReportDialog(self)
-                    elif "油报" in bao.bao_typeid:
-                        well = db.get(Well, self._current_id)
-                        dlg = OilReportDialog(self, platform=well.platform.platformer_id, well_code=well.well_code)
-                    else:
-                        QMessageBox.warning(self, "错误", "无法判断报类型（非水报/油报）")
-                        return
-                    # 如果用户点击了确定，保存日报
-                    if dlg.exec_() == QDialog.Accepted:
-                        rpt = dlg.get_data()
-
-                        if "水报" in bao.bao_typeid:
-                            from database.water_report_dao import upsert_daily_report
-                            upsert_daily_report(self._current_id, rpt)
-                            QMessageBox.information(self, "提示", "日报添加成功")
-                        elif "油报" in bao.bao_typeid:
-                            from database.water_report_dao import upsert_oil_report
-                            upsert_oil_report(self._current_id, rpt)
-                            QMessageBox.information(self, "提示", "日报添加成功")
-
-        except Exception as e:
-            QMessageBox.critical(self, "错误", f"操作失败: {str(e)}")
-            print(f"异常详细信息: {traceback.format_exc()}")  # 打印完整堆栈信息
-
-        # 刷新树和表格
-        self._build_tree()
-        self.table.setModel(SimpleTableModel([], []))
+    def _on_report_saved(self, message, _=None):
+        if message:
+            QMessageBox.information(self, "提示", message)
+        self._refresh_current()
 
     def _on_table_context_menu(self, pos):
         try:
@@ -1474,11 +1491,11 @@ class AdminPage(QWidget):
             if not act:
                 return
 
+            well_id = self._current_id
             row = idx.row()
-            rpt_obj = self._daily_reports[row]
+            rpt_obj = self.table.model().report(row)
 
             if act == edit_act:
-                from database.db_schema import DailyReport, OilWellDatas
                 if isinstance(rpt_obj, DailyReport):
                     dlg = DailyReportDialog(self, data=rpt_obj)
                 elif isinstance(rpt_obj, OilWellDatas):
@@ -1493,22 +1510,19 @@ class AdminPage(QWidget):
                     return
 
                 if dlg.exec_() == QDialog.Accepted:
-                    new_data = dlg.get_data()
-                    if isinstance(rpt_obj, DailyReport):
-                        from database.water_report_dao import upsert_daily_report
-                        upsert_daily_report(self._current_id, new_data)
-                    else:
-                        from database.water_report_dao import upsert_oil_report
-                        upsert_oil_report(self._current_id, new_data)
-                    self._on_tree_clicked(self.tree.currentIndex())
+                    save = upsert_daily_report if isinstance(rpt_obj, DailyReport) else upsert_oil_report
+                    run_in_db(self, save, well_id, dlg.get_data(), priority=PRIORITY_WRITE,
+                              on_result=partial(self._on_report_saved, None), error_text="操作异常")
 
             elif act == delete_act:
-                delete_entity("report", getattr(rpt_obj, "report_id", getattr(rpt_obj, "id", None)))
-                QMessageBox.information(self, "完成", "已删除")
-                self._on_tree_clicked(self.tree.currentIndex())
+                if isinstance(rpt_obj, OilWellDatas):
+                    target = ("oil_report", rpt_obj.id)
+                else:
+                    target = ("report", rpt_obj.report_id)
+                run_in_db(self, delete_entity, *target, priority=PRIORITY_WRITE,
+                          on_result=partial(self._on_report_saved, "已删除"), error_text="删除失败")
 
         except Exception as e:
-            import traceback
             traceback.print_exc()
             QMessageBox.critical(self, "错误", f"操作异常:\n{e}")
 
@@ -1551,7 +1565,6 @@ class AdvancedPage(QWidget):
 
         self._current_level = None
         self._current_id = None
-        self._daily_reports = []
 
 
     def put_account_info(self,permission_list):
@@ -1559,280 +1572,200 @@ class AdvancedPage(QWidget):
 
     # ---- 构建树 ----
     def build_tree(self):
-        model = QStandardItemModel()
-        root_item = model.invisibleRootItem()
-
-        # —— 添加可见根节点标题 ——
-        it_root = QStandardItem("报表管理")
-        it_root.setEditable(False)  # 根节点通常不允许编辑
-        it_root.setData((None, None), Qt.UserRole + 1)
-        root_item.appendRow(it_root)
-
-        it_team = QStandardItem()
-
-        for area in list_root():
-            if area.area_name == self.permission_list[1]:
-                self.area_id = area.area_id
-                for team in list_children("area", self.area_id):
-                    if team.team_name == self.permission_list[2]:
-                        self.team_id = team.team_id
-                        text = f"班 | {team.team_name}"
-                        it_team.setText(text)
-                        it_team.setData(("team", team.team_id), Qt.UserRole + 1)
-
-        it_root.appendRow(it_team)
-
-        for room in list_children("team", self.team_id):
-            it_room = QStandardItem(f"间 | {room.room_no}")
-            it_room.setData(("room", room.room_id), Qt.UserRole + 1)
-            it_team.appendRow(it_room)
-
-            for well in list_children("room", room.room_id):
-                it_well = QStandardItem(f"井 | {well.well_code}")
-                it_well.setData(("well", well.well_id), Qt.UserRole + 1)
-                it_room.appendRow(it_well)
-
+        # 只显示本账号所在的班组，计量间及以下在展开时按需加载
+        run_in_db(self, find_team_node, self.permission_list[1], self.permission_list[2],
+                  on_result=self._on_team_found, error_text="加载班组失败")
+
+    def _on_team_found(self, result):
+        self.area_id, self.team_id, top_nodes = result
+        model = HierarchyTreeModel("报表管理", (None, None), top_nodes)
+        model.load_failed.connect(self._on_load_failed)
         self.tree.setModel(model)
-        self.tree.expandAll()
+        title = model.index(0, 0)
+        self.tree.expand(title)
+        if top_nodes:
+            self.tree.expand(model.index(0, 0, title))
+
+    def _on_load_failed(self, message):
+        QMessageBox.critical(self, "错误", f"加载失败: {message}")
+
+    # ---- 新增记录后在提交时的节点下插入子节点 ----
+    def _add_tree_node(self, level, node_id, name, index):
+        # index 为提交写入时的节点，写入期间节点被删除或树被重建时不再插入
+        if not index.isValid() or index.model() is not self.tree.model():
+            return
+        parent = QModelIndex(index)
+        self.tree.model().add_child(parent, level, node_id, name)
+        self.tree.expand(parent)
+
+    def _submit_add(self, index, level, name, message, func, *args, **kwargs):
+        """写入在数据库线程执行，func 返回新节点 ID"""
+        run_in_db(self, func, *args, priority=PRIORITY_WRITE,
+                  on_result=partial(self._on_added, index, level, name, message), **kwargs)
+
+    def _on_added(self, index, level, name, message, node_id):
+        self._add_tree_node(level, node_id, name, index)
+        QMessageBox.information(self, "成功", message)
+        self._refresh_current()
+
+    def _refresh_current(self):
+        if self.tree.currentIndex().isValid():
+            self._on_tree_clicked(self.tree.currentIndex())
 
+    # ---- 显示分页日报表格 ----
+    def _show_reports(self, model):
+        model.load_failed.connect(self._on_load_failed)
+        self.table.setModel(model)
+        # 先设置排序标记再开启排序，避免开启时按第一列重新查询
+        order = Qt.DescendingOrder if model.descending else Qt.AscendingOrder
+        self.table.horizontalHeader().setSortIndicator(model.sort_column(), order)
+        self.table.setSortingEnabled(True)
+        self.table.resizeColumnsToContents()
+
+    def _is_current(self, level, obj_id) -> bool:
+        return (self._current_level, self._current_id) == (level, obj_id)
 
     # ---- 树节点点击 ----
     def _on_tree_clicked(self, index):
-        level, obj_id = index.data(Qt.UserRole + 1)
+        level, obj_id = index.data(NODE_ROLE)
         self._current_level, self._current_id = level, obj_id
 
-        rows, headers = [], []
-
         if level is None:
             return
+        self.table.setSortingEnabled(False)  # 只有日报表格在数据库中排序
 
-        try:
-            if level == "well":
-                # 显示井的日报数据
-                reports = list_children("well", obj_id)
-                self._daily_reports = reports
-
-                headers = [
-                    "日期", "注水方式", "生产时长(h)",
-                    "干线压(MPa)", "油压(MPa)", "套压(MPa)", "井口压(MPa)",
-                    "计划注水(m³)", "实际注水(m³)", "备注",
-                    "计量阶段1", "计量阶段2", "计量阶段3"
-                ]
-
-                rows = [
-                    (
-                        fmt(r.report_date), fmt(r.injection_mode), fmt(r.prod_hours),
-                        fmt(r.trunk_pressure), fmt(r.oil_pressure), fmt(r.casing_pressure),
-                        fmt(r.wellhead_pressure), fmt(r.plan_inject), fmt(r.actual_inject),
-                        fmt(r.remark),
-                        fmt(r.meter_stage1), fmt(r.meter_stage2), fmt(r.meter_stage3)
-                    )
-                    for r in reports
-                ]
-
-            elif level == "bao":
-                # 显示报下的内容（水报/油报）
-                # 修改这里：移除child_type参数
-                bao_list = list_children("room", obj_id)
-                bao = next((b for b in bao_list if b.id == obj_id), None)
-
-                if not bao:
-                    return
-
-                if "水报" in bao.bao_typeid:
-                    # 水报下的井
-                    # 修改这里：移除child_type参数
-                    wells = list_children("bao", obj_id)
-                    headers = ["井ID", "井编号"]
-                    rows = [(w.id, w.well_code) for w in wells]  # 使用w.id而非w.well_id
-                elif "油报" in bao.bao_typeid:
-                    # 油报下的平台
-                    # 修改这里：移除child_type参数
-                    platforms = list_children("bao", obj_id)
-                    headers = ["平台ID", "平台编号"]
-                    rows = [(p.id, p.platformer_id) for p in platforms]
-
-            elif level == "platform":
-                # 显示平台下的井
-                # 修改这里：移除child_type参数
-                wells = list_children("platformer", obj_id)
-                headers = ["井ID", "井编号"]
-                rows = [(w.id, w.well_code) for w in wells]  # 使用w.id而非w.well_id
-
-            else:
-                # 其他节点类型（作业区、班组、房间）显示下一级子节点
-                # 修改这里：移除child_type参数
-                children = list_children(level, obj_id)
-
-                map_func = {
-                    "area": lambda x: (x.id, x.team_name),
-                    "team": lambda x: (x.id, x.room_no),
-                    "room": lambda x: (x.id, x.bao_typeid),
-                }
-
-                headers = ["ID", "名称/编号"]
-                rows = [map_func[level](c) for c in children]
+        if level == "well":
+            # 显示井的日报数据（分页加载）
+            self._show_reports(ReportPageModel(
+                WATER_REPORT_COLUMNS, partial(cached_report_page, obj_id, False), "report_date",
+                formatter=fmt))
+            return
 
-        except Exception as e:
-            QMessageBox.critical(self, "错误", f"处理{level}节点时出错: {str(e)}")
-            print(f"节点处理错误: {level}, {obj_id}, {str(e)}")
+        # 反复点击同一节点时使用缓存的表格内容
+        cached = node_cache.get((level, obj_id, type(self).__name__))
+        if cached is not None:
+            self._show_node_table(level, obj_id, cached)
             return
+        # 连续点击时只查询最后点击的节点
+        run_in_db(self, node_table, level, obj_id, type(self).__name__, key=("admin_node", id(self)),
+                  on_result=partial(self._show_node_table, level, obj_id),
+                  on_error=partial(self._on_node_failed, level, obj_id))
 
+    def _show_node_table(self, level, obj_id, table):
+        if not self._is_current(level, obj_id):
+            return
+        headers, rows = table
         self.table.setModel(SimpleTableModel(headers, rows))
 
+    def _on_node_failed(self, level, obj_id, e):
+        print(f"节点处理错误: {level}, {obj_id}, {str(e)}")
+        if not self._is_current(level, obj_id) or isinstance(e, LookupError):
+            return  # 找不到报时保持原来的表格
+        QMessageBox.critical(self, "错误", f"处理{level}节点时出错: {str(e)}")
+
     # ---- 删除当前节点 ----
     def _delete_current(self):
         if not self._current_level:
             return
-
-        # 确认对话框
-        if QMessageBox.question(
-                self, "确认", "级联删除当前节点及其所有下级？",
-                QMessageBox.Yes | QMessageBox.No
-        ) == QMessageBox.No:
-            return
-
-        try:
-            # 根据当前节点类型调用不同的删除逻辑
-            if self._current_level == "bao":
-                # 报节点（水报/油报）
-                delete_entity("bao", self._current_id)
-            elif self._current_level == "platformer":
-                # 平台节点
-                delete_entity("platformer", self._current_id)
-            elif self._current_level == "well":
-                # 井节点
-                # 先删除该井的所有日报
-                delete_entity("report", parent_id=self._current_id)
-                # 再删除井本身
-                delete_entity("well", self._current_id)
-            else:
-                # 其他节点类型（作业区、班组、房间）
-                delete_entity(self._current_level, self._current_id)
-
-            QMessageBox.information(self, "完成", "已删除")
-        except Exception as e:
-            QMessageBox.critical(self, "错误", f"删除失败: {str(e)}")
-
-        # 刷新树和表格
-        self._build_tree()
-        self.table.setModel(SimpleTableModel([], []))
+        level, node_id = self._current_level, self._current_id
+        index = QPersistentModelIndex(self.tree.currentIndex())
+        # 确认对话框（附删除范围），确认后再删除
+        confirm_cascade_delete(self, level, node_id, partial(self._delete_node, index, level, node_id))
+
+    def _delete_node(self, index, level, node_id):
+        # 井连同日报、报连同平台和井等，整批删除当前节点及全部下级
+        run_in_db(self, delete_entity, level, node_id, priority=PRIORITY_WRITE,
+                  on_result=partial(self._on_deleted, index, level, node_id), error_text="删除失败")
+
+    def _on_deleted(self, index, level, node_id, _):
+        # 只移除被删除的节点，不重建整棵树
+        if index.isValid() and index.model() is self.tree.model():
+            self.tree.model().remove_node(QModelIndex(index))
+        if self._is_current(level, node_id):
+            self._current_level = self._current_id = None
+            # 刷新表格
+            self.table.setModel(SimpleTableModel([], []))
+        QMessageBox.information(self, "完成", "已删除")
 
     def _add_current(self):
         if not self._current_level:
             QMessageBox.warning(self, "错误", "请先选择一个节点")
             return
-
-        try:
-            if self._current_level == "area":
-                # 创建注采班
-                text, ok = QInputDialog.getText(self, "新建班组", "请输入班组名称:")
-                if ok and text:
-                    team_name = text.strip()
-                    team_no, ok2 = QInputDialog.getInt(self, "编号", "请输入班组编号:")
-                    if ok2:
-                        from database.water_report_dao import upsert_prod_team
-                        upsert_prod_team(self._current_id, team_no=team_no, team_name=team_name)
-                        QMessageBox.information(self, "成功", "班组创建成功")
-                        self._build_tree()  # 刷新树视图
-
-            elif self._current_level == "team":
-                # 创建计量间
-                text, ok = QInputDialog.getText(self, "新建计量间", "请输入计量间号:")
-                if ok and text:
-                    room_no = text.strip()
-                    from database.water_report_dao import upsert_meter_room
-                    upsert_meter_room(self._current_id, room_no=room_no)
-                    QMessageBox.information(self, "成功", "计量间创建成功")
-                    self._build_tree()  # 刷新树视图
-
-            elif self._current_level == "room":
-                # 创建计量间下的报
-                items = ["水报", "油报"]
-                item, ok = QInputDialog.getItem(self, "选择报类型", "请选择报类型:", items, 0, False)
-                if ok and item:
-                    from database.water_report_dao import upsert_bao
-                    upsert_bao(self._current_id, bao_type=item)
-                    QMessageBox.information(self, "成功", f"{item}创建成功")
-                    self._build_tree()  # 刷新树视图
-
-            elif self._current_level == "bao":
-                # 获取当前报的类型信息
-                bao_list = list_children("room", self._current_id)
-                current_bao = next((b for b in bao_list if b.id == self._current_id), None)
-
-                if not current_bao:
-                    QMessageBox.warning(self, "错误", "找不到当前报信息")
-                    return
-
-                if "水报" in current_bao.bao_typeid:
-                    # 水报下创建井
-                    text, ok = QInputDialog.getText(self, "新建井", "请输入井编号:")
-                    if ok and text:
-                        well_code = text.strip()
-                        from database.water_report_dao import upsert_well
-                        well_id = upsert_well(bao_id=self._current_id, well_code=well_code)
-                        if well_id:
-                            QMessageBox.information(self, "成功", "井创建成功")
-                            self._build_tree()  # 刷新树视图
-                            # 如果当前选中的是该报节点，刷新表格
-                            if self._current_level == "bao" and self._current_id == current_bao.id:
-                                self._on_tree_clicked(self.tree.currentIndex())
-                        else:
-                            QMessageBox.warning(self, "失败", "井创建失败")
-                elif "油报" in current_bao.bao_typeid:
-                    # 油报下创建平台
-                    text, ok = QInputDialog.getText(self, "新建平台", "请输入平台编号:")
-                    if ok and text:
-                        platform_no = text.strip()
-                        from database.water_report_dao import upsert_platformer
-                        platform_id = upsert_platformer(bao_id=self._current_id, platform_no=platform_no)
-                        if platform_id:
-                            QMessageBox.information(self, "成功", "平台创建成功")
-                            self._build_tree()  # 刷新树视图
-                            # 如果当前选中的是该报节点，刷新表格
-                            if self._current_level == "bao" and self._current_id == current_bao.id:
-                                self._on_tree_clicked(self.tree.currentIndex())
-                        else:
-                            QMessageBox.warning(self, "失败", "平台创建失败")
-
-            elif self._current_level == "platform":  # 修改为"platform"以匹配树节点类型
-                # 平台下创建井
-                text, ok = QInputDialog.getText(self, "新建井", "请输入井编号:")
-                if ok and text:
-                    well_code = text.strip()
-                    from database.water_report_dao import upsert_well
-                    well_id = upsert_well(platformer_id=self._current_id, well_code=well_code)
-                    if well_id:
-                        QMessageBox.information(self, "成功", "井创建成功")
-                        self._build_tree()  # 刷新树视图
-                        # 如果当前选中的是该平台节点，刷新表格
-                        if self._current_level == "platform":
-                            self._on_tree_clicked(self.tree.currentIndex())
-                    else:
-                        QMessageBox.warning(self, "失败", "井创建失败")
-
-            elif self._current_level == "well":
-                # 创建日报
-                dlg = DailyReportDialog(self)
-                if dlg.exec_() == QDialog.Accepted:
-                    rpt = dlg.get_data()
-                    report_id = upsert_daily_report(self._current_id, rpt)
-                    if report_id:
-                        QMessageBox.information(self, "成功", "日报创建成功")
-                        # 如果当前选中的是该井节点，刷新表格
-                        if self._current_level == "well":
-                            self._on_tree_clicked(self.tree.currentIndex())
-                    else:
-                        QMessageBox.warning(self, "失败", "日报创建失败")
-
-        except Exception as e:
-            QMessageBox.critical(self, "错误", f"操作失败: {str(e)}")
-            print(f"异常详细信息: {traceback.format_exc()}")  # 打印完整堆栈信息
-
-        # 刷新树和表格
-        # self._build_tree()  # 已在每个操作成功后单独调用
-        # self.table.setModel(SimpleTableModel([], []))
+        level, node_id = self._current_level, self._current_id
+        index = QPersistentModelIndex(self.tree.currentIndex())
+
+        if level == "area":
+            # 创建注采班
+            text, ok = QInputDialog.getText(self, "新建班组", "请输入班组名称:")
+            if ok and text:
+                team_name = text.strip()
+                team_no, ok2 = QInputDialog.getInt(self, "编号", "请输入班组编号:")
+                if ok2:
+                    self._submit_add(index, "team", team_name, "班组创建成功",
+                                     upsert_prod_team, node_id, team_no=team_no, team_name=team_name)
+
+        elif level == "team":
+            # 创建计量间
+            text, ok = QInputDialog.getText(self, "新建计量间", "请输入计量间号:")
+            if ok and text:
+                room_no = text.strip()
+                self._submit_add(index, "room", room_no, "计量间创建成功",
+                                 upsert_meter_room, node_id, room_no=room_no)
+
+        elif level == "room":
+            # 创建计量间下的报
+            items = ["水报", "油报"]
+            item, ok = QInputDialog.getItem(self, "选择报类型", "请选择报类型:", items, 0, False)
+            if ok and item:
+                self._submit_add(index, "bao", item, f"{item}创建成功", upsert_bao, node_id, bao_type=item)
+
+        elif level == "bao":
+            # 先查询当前报的类型，再弹出对应的输入框
+            run_in_db(self, bao_type, node_id, on_result=partial(self._add_under_bao, index, node_id))
+
+        elif level == "platform":
+            # 平台下创建井
+            text, ok = QInputDialog.getText(self, "新建井", "请输入井编号:")
+            if ok and text:
+                well_code = text.strip()
+                self._submit_add(index, "well", well_code, "井创建成功",
+                                 upsert_well, well_code=well_code, bao_type="油报", platform_id=node_id)
+
+        elif level == "well":
+            # 创建日报
+            dlg = DailyReportDialog(self)
+            if dlg.exec_() == QDialog.Accepted:
+                run_in_db(self, upsert_daily_report, node_id, dlg.get_data(), priority=PRIORITY_WRITE,
+                          on_result=self._on_report_created)
+
+    def _add_under_bao(self, index, bao_id, typeid):
+        if "水报" in typeid:
+            # 水报下创建井
+            text, ok = QInputDialog.getText(self, "新建井", "请输入井编号:")
+            if ok and text:
+                well_code = text.strip()
+                self._submit_add(index, "well", well_code, "井创建成功",
+                                 upsert_well, well_code=well_code, bao_type="水报", bao_id=bao_id)
+        elif "油报" in typeid:
+            # 油报下创建平台
+            text, ok = QInputDialog.getText(self, "新建平台", "请输入平台编号:")
+            if ok and text:
+                platform_no = text.strip()
+                self._submit_add(index, "platform", platform_no, "平台创建成功",
+                                 upsert_platformer, bao_id=bao_id, platform_name=platform_no)
+
+    def _on_report_created(self, report_id):
+        if report_id:
+            QMessageBox.information(self, "成功", "日报创建成功")
+            self._refresh_current()
+        else:
+            QMessageBox.warning(self, "失败", "日报创建失败")
+
+    def _on_report_changed(self, message, _=None):
+        if message:
+            QMessageBox.information(self, "完成", message)
+        # 重新加载视图
+        self._refresh_current()
 
     def _on_table_context_menu(self, pos):
         if self._current_level != "well":
@@ -1844,23 +1777,20 @@ class AdvancedPage(QWidget):
         edit_act = menu.addAction("修改报表")
         delete_act = menu.addAction("删除报表")
         act = menu.exec_(self.table.viewport().mapToGlobal(pos))
+        well_id = self._current_id
         if act == edit_act:
             row = idx.row()
-            rpt_obj = self._daily_reports[row]
+            rpt_obj = self.table.model().report(row)
             dlg = DailyReportDialog(self, data=rpt_obj)
             if dlg.exec_() == QDialog.Accepted:
-                new_data = dlg.get_data()
                 # 使用相同接口更新
-                upsert_daily_report(self._current_id, new_data)
-                # 重新加载视图
-                self._on_tree_clicked(self.tree.currentIndex())
+                run_in_db(self, upsert_daily_report, well_id, dlg.get_data(), priority=PRIORITY_WRITE,
+                          on_result=partial(self._on_report_changed, None))
         elif act == delete_act:
             row = idx.row()
-            rpt_obj = self._daily_reports[row]
-            # 恢复原有调用方式
-            delete_entity("report", rpt_obj.report_id)
-            QMessageBox.information(self, "完成", "已删除")
-            self._on_tree_clicked(self.tree.currentIndex())
+            rpt_obj = self.table.model().report(row)
+            run_in_db(self, delete_entity, "report", rpt_obj.report_id, priority=PRIORITY_WRITE,
+                      on_result=partial(self._on_report_changed, "已删除"), error_text="删除失败")
 
 # ---- 运行 ----
 if __name__ == "__main__":
@@ -0,0 +1,230 @@
+# hierarchy_tree_model.py
+"""
+作业区 → 班组 → 计量间 → 报 → 平台 → 井 的树形模型。
+
+- 节点展开时才通过 canFetchMore / fetchMore 查询下一层，打开页面只查询作业区；
+- 下一层在数据库线程中查询，结果返回后再插入行；查询期间节点被刷新或删除时丢弃结果；
+- 查询过的节点缓存在模型中，再次展开不会重复查询；
+- 增删节点后按行插入/删除，不重建整棵树。
+"""
+
+from functools import partial
+from typing import Callable, List, Optional, Tuple
+
+from PyQt5.QtCore import Qt, QAbstractItemModel, QModelIndex, pyqtSignal
+
+from src.core.db_worker import get_db_worker, PRIORITY_INTERACTIVE
+from src.database.water_report_dao import list_child_nodes
+
+NODE_ROLE = Qt.UserRole + 1  # 节点数据 (level, id)
+
+_LEVEL_LABELS = {
+    "area": "区", "team": "班", "room": "间", "bao": "报", "platform": "平台", "well": "井",
+}
+
+
+class TreeNode:
+    __slots__ = ("level", "id", "name", "parent", "children", "fetched", "has_children", "loading")
+
+    def __init__(self, level, node_id, name, parent=None, has_children=True):
+        self.level = level
+        self.id = node_id
+        self.name = name
+        self.parent: Optional["TreeNode"] = parent
+        self.children: List["TreeNode"] = []
+        self.fetched = False  # 子节点是否已查询
+        self.has_children = has_children
+        self.loading = None  # 正在查询子节点时为本次查询的标记
+
+    def attached(self) -> bool:
+        """节点仍在树中（未随上级被删除或刷新）"""
+        node = self
+        while node.parent is not None:
+            if not any(child is node for child in node.parent.children):
+                return False
+            node = node.parent
+        return True
+
+    def row(self) -> int:
+        return self.parent.children.index(self) if self.parent is not None else 0
+
+    def text(self) -> str:
+        label = _LEVEL_LABELS.get(self.level)
+        return f"{label} | {self.name}" if label else str(self.name)
+
+
+class HierarchyTreeModel(QAbstractItemModel):
+    """
+    title 为最上层的可见标题节点，title_data 为它的节点数据；
+    top_nodes 为空时标题节点下按需加载全部作业区，否则只显示给定的节点 [(level, id, name)]。
+    fetch_children 在数据库线程中调用；查询失败时发出 load_failed(错误说明)，节点可再次展开重试。
+    """
+    load_failed = pyqtSignal(str)
+
+    def __init__(self, title="报表管理", title_data=("root", None),
+                 top_nodes: Optional[List[Tuple[str, int, str]]] = None,
+                 fetch_children: Callable = list_child_nodes, parent=None):
+        super().__init__(parent)
+        self._fetch_children = fetch_children
+        self._root = TreeNode(None, None, "")
+        self._root.fetched = True
+        level, node_id = title_data
+        self._title = TreeNode(level, node_id, title, self._root)
+        self._root.children.append(self._title)
+        if top_nodes is not None:
+            self._title.children = [TreeNode(lvl, node_id, name, self._title) for lvl, node_id, name in top_nodes]
+            self._title.fetched = True
+
+    # ---------- 结构 ----------
+    def node(self, index: QModelIndex) -> TreeNode:
+        return index.internalPointer() if index.isValid() else self._root
+
+    def index(self, row, column, parent=QModelIndex()):
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        return self.createIndex(row, column, self.node(parent).children[row])
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        parent = index.internalPointer().parent
+        if parent is None or parent is self._root:
+            return QModelIndex()
+        return self.createIndex(parent.row(), 0, parent)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        return len(self.node(parent).children)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 1
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        if role == Qt.DisplayRole:
+            return node.text()
+        if role == NODE_ROLE:
+            return node.level, node.id
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    # ---------- 按需加载 ----------
+    def hasChildren(self, parent=QModelIndex()):
+        node = self.node(parent)
+        if node.fetched and node.loading is None:
+            return bool(node.children)
+        return node.has_children
+
+    def canFetchMore(self, parent):
+        node = self.node(parent)
+        return not node.fetched and node.has_children
+
+    def is_loading(self, index: QModelIndex = QModelIndex()) -> bool:
+        return self.node(index).loading is not None
+
+    def fetchMore(self, parent):
+        node = self.node(parent)
+        if node.fetched:
+            return
+        node.fetched = True
+        node.loading = token = object()
+        level = None if node is self._title else node.level
+        get_db_worker().submit(
+            self._load_children, level, node.id,
+            priority=PRIORITY_INTERACTIVE,
+            on_result=partial(self._on_children, node, token),
+            on_error=partial(self._on_children_failed, node, token),
+        )
+
+    def _load_children(self, level, node_id):
+        """数据库线程中执行，只返回普通数据"""
+        return [(child.level, child.id, child.name, has_children)
+                for child, has_children in self._fetch_children(level, node_id)]
+
+    def _node_index(self, node: TreeNode) -> QModelIndex:
+        if node is self._root:
+            return QModelIndex()
+        return self.createIndex(node.row(), 0, node)
+
+    def _on_children(self, node, token, rows):
+        if node.loading is not token or not node.attached():
+            return
+        node.loading = None
+        parent = self._node_index(node)
+        children = [TreeNode(level, node_id, name, node, has_children)
+                    for level, node_id, name, has_children in rows]
+        if children:
+            self.beginInsertRows(parent, 0, len(children) - 1)
+            node.children = children
+            self.endInsertRows()
+        else:
+            node.has_children = False
+            self.dataChanged.emit(parent, parent)
+
+    def _on_children_failed(self, node, token, error):
+        if node.loading is not token:
+            return
+        node.loading = None
+        node.fetched = False  # 再次展开时重新查询
+        if node.attached():
+            parent = self._node_index(node)
+            self.dataChanged.emit(parent, parent)
+        self.load_failed.emit(str(error))
+
+    # ---------- 增删后的行级更新 ----------
+    def find_child(self, parent: QModelIndex, level, node_id) -> QModelIndex:
+        for row, child in enumerate(self.node(parent).children):
+            if child.level == level and child.id == node_id:
+                return self.index(row, 0, parent)
+        return QModelIndex()
+
+    def add_child(self, parent: QModelIndex, level, node_id, name, has_children=False) -> QModelIndex:
+        """
+        在已写入数据库后加入子节点。父节点尚未加载或正在加载时只标记为有下级，
+        新节点会随查询结果一起出现；节点已存在（upsert 返回了已有记录）时返回原节点。
+        """
+        node = self.node(parent)
+        if not node.fetched or node.loading is not None:
+            if not node.has_children:
+                node.has_children = True
+                self.dataChanged.emit(parent, parent)
+            return QModelIndex()
+        existing = self.find_child(parent, level, node_id)
+        if existing.isValid():
+            return existing
+        row = len(node.children)
+        self.beginInsertRows(parent, row, row)
+        node.children.append(TreeNode(level, node_id, name, node, has_children))
+        self.endInsertRows()
+        return self.index(row, 0, parent)
+
+    def remove_node(self, index: QModelIndex) -> None:
+        """删除数据库记录后移除对应的节点及其子树"""
+        if not index.isValid():
+            return
+        node = index.internalPointer()
+        if node.parent is None or node.parent is self._root:
+            return
+        parent = self.parent(index)
+        row = node.row()
+        self.beginRemoveRows(parent, row, row)
+        del node.parent.children[row]
+        self.endRemoveRows()
+
+    def refresh_children(self, index: QModelIndex) -> None:
+        """丢弃节点已缓存的子节点，下次展开时重新查询"""
+        node = self.node(index)
+        if node.children:
+            self.beginRemoveRows(index, 0, len(node.children) - 1)
+            node.children = []
+            self.endRemoveRows()
+        node.fetched = False
+        node.loading = None  # 丢弃尚未返回的查询结果
+        node.has_children = True
@@ -0,0 +1,156 @@
+# report_page_model.py
+"""
+单井历史日报的分页表格模型。
+
+- 打开时只查询第一页，表格滚动到底部时通过 canFetchMore / fetchMore 查询下一页；
+- 查询在数据库线程中执行，结果返回后再插入行，查询期间不会重复请求同一页；
+- 点击表头在数据库中排序，重新从第一页开始加载，排序前尚未返回的结果被丢弃；
+- 行中保存日报对象本身，右键修改、删除时通过 report(row) 取回。
+"""
+
+from functools import partial
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, pyqtSignal
+
+from src.core.db_worker import get_db_worker, PRIORITY_INTERACTIVE
+from src.database.water_report_dao import REPORT_PAGE_SIZE
+
+# (表头, 日报字段)
+OIL_REPORT_COLUMNS: Sequence[Tuple[str, str]] = (
+    ("平台", "platform"), ("日期", "create_time"), ("井号", "well_code"),
+    ("生产时间(h)", "prod_hours"), ("A2冲程", "a2_stroke"), ("A2冲次", "a2_frequency"),
+    ("套压(MPa)", "casing_pressure"), ("油压(MPa)", "oil_pressure"), ("回压(MPa)", "back_pressure"),
+    ("时间标记", "time_sign"), ("合量斗数", "total_bucket"), ("憋压(MPa)", "press_data"),
+    ("备注", "remark"), ("功图冲次", "work_stroke"), ("有效排液冲程", "effective_stroke"),
+    ("充满系数", "fill_coeff_test"), ("化验含水(%)", "lab_water_cut"), ("上报含水(%)", "reported_water"),
+    ("充满系数液量", "fill_coeff_liquid"), ("上次动管柱时间", "last_tubing_time"),
+    ("泵径", "pump_diameter"), ("区块", "block"), ("变压器", "transformer"),
+    ("液量/斗数", "liquid_per_bucket"), ("和", "sum_value"), ("液量1", "liquid1"),
+    ("分产系数", "production_coeff"), ("A2(24h)液量", "a2_24h_liquid"), ("液量2", "liquid2"),
+    ("油量", "oil_volume"), ("波动范围", "fluctuation_range"), ("停产时间", "shutdown_time"),
+    ("理论排量-液量差", "theory_diff"), ("理论排量", "theory_displacement"), ("K值", "k_value"),
+    ("日产液", "daily_liquid"), ("日产油", "daily_oil"), ("井次", "well_times"),
+    ("时间", "production_time"), ("产油(累计)", "total_oil"),
+)
+
+WATER_REPORT_COLUMNS: Sequence[Tuple[str, str]] = (
+    ("日期", "report_date"), ("注水方式", "injection_mode"), ("生产时长(h)", "prod_hours"),
+    ("干线压(MPa)", "trunk_pressure"), ("油压(MPa)", "oil_pressure"), ("套压(MPa)", "casing_pressure"),
+    ("井口压(MPa)", "wellhead_pressure"), ("计划注水(m³)", "plan_inject"),
+    ("实际注水(m³)", "actual_inject"), ("备注", "remark"),
+    ("计量阶段1", "meter_stage1"), ("计量阶段2", "meter_stage2"), ("计量阶段3", "meter_stage3"),
+)
+
+
+class ReportPageModel(QAbstractTableModel):
+    """
+    fetch_page(sort_key, descending, offset, after, limit) 返回一页日报对象；
+    date_key 为日期字段，按日期排序时把上一页最后一行的日期作为 after 传入，按索引续查。
+    fetch_page 在数据库线程中调用；查询失败时发出 load_failed(错误说明)，不再自动续查。
+    """
+    load_failed = pyqtSignal(str)
+
+    def __init__(self, columns: Sequence[Tuple[str, str]], fetch_page: Callable, date_key: str,
+                 formatter: Callable = str, descending: bool = True,
+                 page_size: int = REPORT_PAGE_SIZE, parent=None):
+        super().__init__(parent)
+        self.columns = list(columns)
+        self._fetch_page = fetch_page
+        self._date_key = date_key
+        self._formatter = formatter
+        self._page_size = page_size
+        self.sort_key = date_key
+        self.descending = descending
+        self._rows: List = []
+        self._exhausted = False  # 已加载到最后一页
+        self._loading = False  # 有一页正在查询
+        self._generation = 0  # 排序后递增，丢弃排序前的查询结果
+        self.fetchMore(QModelIndex())
+
+    # ---------- 表格 ----------
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.DisplayRole:
+            report = self._rows[index.row()]
+            return self._formatter(getattr(report, self.columns[index.column()][1]))
+        if role == Qt.TextAlignmentRole:
+            return Qt.AlignCenter
+        return None
+
+    def headerData(self, section, orient, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orient == Qt.Horizontal:
+            if 0 <= section < len(self.columns):
+                return self.columns[section][0]
+        return None
+
+    def report(self, row: int) -> Optional[object]:
+        """表格第 row 行对应的日报对象"""
+        return self._rows[row] if 0 <= row < len(self._rows) else None
+
+    def sort_column(self) -> int:
+        """当前排序字段所在的列"""
+        return next((i for i, (_, key) in enumerate(self.columns) if key == self.sort_key), 0)
+
+    # ---------- 分页 ----------
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._exhausted and not self._loading
+
+    def is_loading(self) -> bool:
+        return self._loading
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._exhausted or self._loading:
+            return
+        after = None
+        if self._rows and self.sort_key == self._date_key:
+            after = getattr(self._rows[-1], self._date_key)
+        self._loading = True
+        get_db_worker().submit(
+            self._fetch_page, self.sort_key, self.descending, len(self._rows), after, self._page_size,
+            priority=PRIORITY_INTERACTIVE,
+            on_result=partial(self._on_page, self._generation),
+            on_error=partial(self._on_page_failed, self._generation),
+        )
+
+    def _on_page(self, generation, page):
+        if generation != self._generation:
+            return
+        self._loading = False
+        if len(page) < self._page_size:
+            self._exhausted = True
+        if page:
+            start = len(self._rows)
+            self.beginInsertRows(QModelIndex(), start, start + len(page) - 1)
+            self._rows.extend(page)
+            self.endInsertRows()
+
+    def _on_page_failed(self, generation, error):
+        if generation != self._generation:
+            return
+        self._loading = False
+        self._exhausted = True  # 视图会反复调用 fetchMore，失败后不再自动重试
+        self.load_failed.emit(str(error))
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        if not 0 <= column < len(self.columns):
+            return
+        sort_key = self.columns[column][1]
+        descending = order == Qt.DescendingOrder
+        if (sort_key, descending) == (self.sort_key, self.descending):
+            return
+        self.beginResetModel()
+        self.sort_key, self.descending = sort_key, descending
+        self._rows = []
+        self._exhausted = False
+        self._loading = False
+        self._generation += 1
+        self.endResetModel()
+        self.fetchMore(QModelIndex())
@@ -137,7 +137,8 @@ if __name__ == "__main__":
     app.exec_()'''
 
 import datetime
-from PyQt5.QtWidgets import QApplication, QWidget, QLineEdit, QLabel, QScrollArea, QVBoxLayout, QPushButton
+from PyQt5.QtWidgets import (QApplication, QWidget, QLineEdit, QLabel, QScrollArea, QVBoxLayout, QPushButton,
+                             QProgressBar)
 from PyQt5 import uic
 
 from assets.ui.storage_oil_view_ui import Ui_Form
@@ -157,6 +158,13 @@ class OilStorageView(QWidget):
         self.ui.label_9.setFont(font)
         self.resize(1000, 800)
 
+        # 后台公式计算进度，计算期间显示在标题下方
+        self.recalc_progress = QProgressBar(self.ui.widget_6)
+        self.recalc_progress.setFormat("公式计算中 %v/%m")
+        self.recalc_progress.setMaximumHeight(16)
+        self.recalc_progress.hide()
+        self.ui.verticalLayout_4.addWidget(self.recalc_progress)
+
         # 缩放相关初始化
         self.scale_factor = 1.0
         self.scale_widgets = []
@@ -200,6 +208,15 @@ class OilStorageView(QWidget):
             self.scale_factor -= 0.1
             self.apply_scale()
 
+    def set_recalc_progress(self, done, total):
+        """更新后台计算进度，计算完成（done >= total）时隐藏"""
+        if total <= 0 or done >= total:
+            self.recalc_progress.hide()
+            return
+        self.recalc_progress.setRange(0, total)
+        self.recalc_progress.setValue(done)
+        self.recalc_progress.show()
+
     def apply_scale(self):
         for widget in self.scale_widgets:
             original_size = self.original_font_sizes.get(widget, 10)
@@ -8,7 +8,7 @@ from src.interface.user_account_ui import Ui_Form
 from src.database.user_account_dao import (
     create_user, delete_user, get_user_by_username, list_users
 )
-from src.database.water_report_dao import list_children, list_root
+from src.database.water_report_dao import load_hierarchy
 from src.core.enums import AccountPermissionEnum
 from typing import List
 import sys
@@ -44,49 +44,50 @@ class HierarchySelectDialog(QDialog):
         self.tree.itemChanged.connect(self.on_item_changed)
 
     def _build_tree(self):
-        for area in list_root():
-            it_area = QTreeWidgetItem(self.tree, [area.area_name])
+        # 一次加载整棵层级快照，不再逐层调用 list_children
+        hierarchy = load_hierarchy()
+        for area in hierarchy.roots():
+            it_area = QTreeWidgetItem(self.tree, [area.name])
             it_area.setFlags(it_area.flags() & ~Qt.ItemIsUserCheckable)
-            it_area.setData(0, Qt.UserRole, ("area", area.area_id))
+            it_area.setData(0, Qt.UserRole, ("area", area.id))
 
-            for team in list_children("area", area.area_id):
-                it_team = QTreeWidgetItem(it_area, [team.team_name])
+            for team in hierarchy.children(area, "team"):
+                it_team = QTreeWidgetItem(it_area, [team.name])
                 it_team.setFlags(it_team.flags() | Qt.ItemIsUserCheckable)
                 it_team.setCheckState(0, Qt.Unchecked)
-                it_team.setData(0, Qt.UserRole, ("team", team.team_id))
+                it_team.setData(0, Qt.UserRole, ("team", team.id))
 
-                for room in list_children("team", team.team_id):
-                    it_room = QTreeWidgetItem(it_team, [room.room_no])
+                for room in hierarchy.children(team, "room"):
+                    it_room = QTreeWidgetItem(it_team, [room.name])
                     it_room.setFlags(it_room.flags() & ~Qt.ItemIsUserCheckable)
                     it_room.setData(0, Qt.UserRole, ("room", room.id))
 
                     # 先列出所有 Bao（报）
-                    baos = list_children("room", room.id)
-                    for bao in baos:
-                        if bao.bao_typeid == "水报":
+                    for bao in hierarchy.children(room, "bao"):
+                        if bao.name == "水报":
                             it_water = QTreeWidgetItem(it_room, ["水报"])
                             it_water.setFlags(it_water.flags() | Qt.ItemIsUserCheckable)
                             it_water.setCheckState(0, Qt.Unchecked)
                             it_water.setData(0, Qt.UserRole, ("water", bao.id))
 
-                            for well in list_children("bao", bao.id):
-                                it_well = QTreeWidgetItem(it_water, [well.well_code])
+                            for well in hierarchy.children(bao, "well"):
+                                it_well = QTreeWidgetItem(it_water, [well.name])
                                 it_well.setFlags(it_well.flags() & ~Qt.ItemIsUserCheckable)
                                 it_well.setData(0, Qt.UserRole, ("well", well.id))
 
-                        elif bao.bao_typeid == "油报":
+                        elif bao.name == "油报":
                             it_oil = QTreeWidgetItem(it_room, ["油报"])
                             it_oil.setFlags(it_oil.flags() | Qt.ItemIsUserCheckable)
                             it_oil.setCheckState(0, Qt.Unchecked)
                             it_oil.setData(0, Qt.UserRole, ("oil", bao.id))
 
-                            for platform in list_children("bao", bao.id):
-                                it_platform = QTreeWidgetItem(it_oil, [platform.platformer_id])
+                            for platform in hierarchy.children(bao, "platform"):
+                                it_platform = QTreeWidgetItem(it_oil, [platform.name])
                                 it_platform.setFlags(it_platform.flags() & ~Qt.ItemIsUserCheckable)
                                 it_platform.setData(0, Qt.UserRole, ("platform", platform.id))
 
-                                for well in list_children("platform", platform.id):
-                                    it_well = QTreeWidgetItem(it_platform, [well.well_code])
+                                for well in hierarchy.children(platform, "well"):
+                                    it_well = QTreeWidgetItem(it_platform, [well.name])
                                     it_well.setFlags(it_well.flags() & ~Qt.ItemIsUserCheckable)
                                     it_well.setData(0, Qt.UserRole, ("well", well.id))
 